@@ -0,0 +1,137 @@
+"""
+Download throughput benchmark against a local, rate-limited HTTP server
+
+Compares the old fixed 64 KB iter_content loop with the adaptive
+readinto loop used by GitHubReleaseManager, reporting wall-clock
+throughput and the client's CPU time (the server runs in its own process).
+
+Usage:
+    python benchmarks/download_benchmark.py [--size-mb 256] [--rate-mbit 1000]
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.downloader import GitHubAsset, GitHubReleaseManager, get_session  # noqa: E402
+from src.core.downloader.stream import iter_response  # noqa: E402
+from src.core.progress import ProgressBus  # noqa: E402
+
+BLOCK = 256 * 1024
+
+
+def serve(port_queue, size: int, rate: float):
+    """Serve /payload of the given size at rate bytes per second"""
+    block = os.urandom(BLOCK)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(size))
+            self.send_header("ETag", '"bench"')
+            self.end_headers()
+            started = time.monotonic()
+            sent = 0
+            while sent < size:
+                data = block[: min(BLOCK, size - sent)]
+                self.wfile.write(data)
+                sent += len(data)
+                ahead = sent / rate - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def fixed_chunks(url: str, path: str) -> int:
+    """The previous loop: 64 KB iter_content chunks, default buffering"""
+    reads = 0
+    digest = hashlib.sha256()
+    response = get_session().get(url, stream=True)
+    with response, open(path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            f.write(chunk)
+            digest.update(chunk)
+            reads += 1
+    return reads
+
+
+def adaptive_chunks(url: str, path: str) -> int:
+    """The current loop: adaptive readinto into a reusable buffer"""
+    reads = 0
+    digest = hashlib.sha256()
+    response = get_session().get(url, stream=True)
+    with response, open(path, "wb", buffering=1024 * 1024) as f:
+        for chunk in iter_response(response):
+            f.write(chunk)
+            digest.update(chunk)
+            reads += 1
+    return reads
+
+
+def download_asset(url: str, path: str) -> int:
+    """End to end through GitHubReleaseManager.download_asset"""
+    asset = GitHubAsset("payload", 0, url)
+    manager = GitHubReleaseManager("bench", "bench", segments=1)
+    ok, msg = manager.download_asset(asset, path, progress=ProgressBus([]))
+    if not ok:
+        raise RuntimeError(msg)
+    os.unlink(path)
+    return 0
+
+
+def run(name, func, url: str, size: int, workdir: str):
+    path = os.path.join(workdir, name)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    reads = func(url, path)
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    if os.path.exists(path):
+        os.unlink(path)
+    mb = size / (1024 * 1024)
+    reads_text = str(reads) if reads else "-"
+    print(f"{name:<16} {mb / wall:9.1f} MB/s {cpu:8.2f} s CPU {reads_text:>8} reads")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--rate-mbit", type=float, default=1000.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    rate = args.rate_mbit * 1000 * 1000 / 8
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, size, rate), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{port_queue.get()}/payload"
+
+    print(f"{args.size_mb} MB at {args.rate_mbit:.0f} Mbit/s, {args.repeat} run(s) each")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for _ in range(args.repeat):
+                run("fixed 64 KB", fixed_chunks, url, size, workdir)
+                run("adaptive", adaptive_chunks, url, size, workdir)
+                run("download_asset", download_asset, url, size, workdir)
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Read-back benchmark for download target files
+
+Writes two files at once in 64 KB steps, like two downloads running side
+by side. "append" grows both files as data arrives (the old behaviour);
+"preallocated" reserves each file with posix_fallocate first. Each file is
+then synced and evicted from the page cache, and the time to read it back
+is measured. The extent count from filefrag is shown when it is installed.
+
+Run it on the card you want to measure, e.g.:
+    python benchmarks/preallocation_benchmark.py --dir /run/media/mmcblk0p1
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.downloader.stream import preallocate  # noqa: E402
+
+STEP = 64 * 1024
+
+
+def write_pair(paths, size: int, prealloc: bool):
+    """Write two files in alternating 64 KB steps"""
+    block = os.urandom(STEP)
+    files = [open(path, "wb") for path in paths]
+    try:
+        if prealloc:
+            for f in files:
+                preallocate(f.fileno(), size)
+        for _ in range(0, size, STEP):
+            for f in files:
+                f.write(block)
+                f.flush()
+        for f in files:
+            os.fsync(f.fileno())
+    finally:
+        for f in files:
+            f.close()
+
+
+def evict(path: str):
+    """Drop a synced file from the page cache"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def read_back(path: str) -> float:
+    """Get the seconds needed to read a file sequentially"""
+    evict(path)
+    started = time.perf_counter()
+    with open(path, "rb", buffering=0) as f:
+        while f.read(4 * 1024 * 1024):
+            pass
+    return time.perf_counter() - started
+
+
+def count_extents(path: str) -> str:
+    if not shutil.which("filefrag"):
+        return "-"
+    output = subprocess.run(["filefrag", path], capture_output=True, text=True).stdout
+    match = re.search(r"(\d+) extents? found", output)
+    return match.group(1) if match else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", default=None, help="Directory on the device to test")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    mb = args.size_mb
+    print(f"2 x {mb} MB in {args.dir or tempfile.gettempdir()}, {args.repeat} run(s) each")
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        paths = [os.path.join(workdir, "a.bin"), os.path.join(workdir, "b.bin")]
+        for _ in range(args.repeat):
+            for name, prealloc in (("append", False), ("preallocated", True)):
+                write_pair(paths, size, prealloc)
+                seconds = read_back(paths[0])
+                print(
+                    f"{name:<13} read {mb / seconds:8.1f} MB/s  "
+                    f"extents {count_extents(paths[0]):>6}"
+                )
+                for path in paths:
+                    os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
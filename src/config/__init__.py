@@ -3,9 +3,15 @@ Configuration management module
 """
 
 import os
-from typing import Dict, Any, Optional, List
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Tuple, Callable, Iterator
 import json
 
+try:
+    import fcntl
+except ImportError:  # Non-POSIX platforms: fall back to unlocked access
+    fcntl = None
+
 
 class TargetLanguage:
     """Target language configuration"""
@@ -25,6 +31,12 @@ class TargetLanguage:
         JAPANESE: {"zh": "日本語", "en": "Japanese"},
     }
 
+    # Windows ANSI/OEM codepage for each language
+    CODEPAGES = {
+        CHINESE: "936",
+        JAPANESE: "932",
+    }
+
     @classmethod
     def get_locale(cls, lang: str) -> str:
         """Get locale code for target language"""
@@ -35,6 +47,11 @@ class TargetLanguage:
         """Get display name for target language"""
         return cls.NAMES.get(lang, cls.NAMES[cls.CHINESE]).get(display_lang, "Unknown")
 
+    @classmethod
+    def get_codepage(cls, lang: str) -> str:
+        """Get Windows codepage for target language"""
+        return cls.CODEPAGES.get(lang, cls.CODEPAGES[cls.CHINESE])
+
 
 class Config:
     """Configuration management class"""
@@ -43,6 +60,20 @@ class Config:
     FONTS_DIR = None  # Will be set dynamically to ~/.fonts
     TEMP_EXTRACT_DIR = "/tmp/galgame_fonts_extract"
     CONFIG_FILE_NAME = ".steamdeck_galgame_config.json"
+    GAMES_FILE_NAME = ".steamdeck_galgame_games.json"
+
+    # Config sections, each stored in its own file and loaded on demand
+    SECTION_SETTINGS = "settings"
+    SECTION_GAMES = "games"
+
+    # Schema version of the section files (1 = single legacy file)
+    SCHEMA_VERSION = 2
+
+    # Default GitHub API endpoint (overridable with "github_api_url")
+    GITHUB_API_URL = "https://api.github.com"
+
+    # Default MB a download writes between data syncs ("download_sync_mb", 0 disables)
+    DEFAULT_DOWNLOAD_SYNC_MB = 32
 
     # Application configuration
     APP_NAME = "SteamDeck Chinese Environment Config Tool"
@@ -53,6 +84,18 @@ class Config:
     _default_font_path: Optional[str] = None
     _config_file: Optional[str] = None
     _steam_dir: Optional[str] = None
+    _steam_root: Optional[str] = None
+
+    # Keys stored in section files that are not part of the section data
+    META_KEYS = ("schema_version", "version")
+
+    # List-valued keys merged per record on conflict: key -> record id fields,
+    # the first one a record has set identifies it (games like add_game)
+    RECORD_KEYS = {"managed_games": ("exe_path", "name")}
+
+    # Parsed sections keyed by name -> (file signature, version, data)
+    _sections: Dict[str, Tuple[Optional[Tuple[int, int]], int, Dict[str, Any]]] = {}
+    _migrated: bool = False
 
     @classmethod
     def _get_home_dir(cls) -> str:
@@ -102,6 +145,13 @@ class Config:
             cls._steam_dir = os.path.join(cls._get_home_dir(), ".steam/root/userdata")
         return cls._steam_dir
 
+    @classmethod
+    def get_steam_root(cls) -> str:
+        """Get Steam installation root directory (~/.steam/root)"""
+        if cls._steam_root is None:
+            cls._steam_root = os.path.join(cls._get_home_dir(), ".steam", "root")
+        return cls._steam_root
+
     @classmethod
     def get_app_info(cls) -> Dict[str, str]:
         """Get application information"""
@@ -115,7 +165,7 @@ class Config:
         """Get current target language (default: Chinese)"""
         if cls._target_language is None:
             # Load from config file
-            config = cls.load_config()
+            config = cls.load_section(cls.SECTION_SETTINGS)
             cls._target_language = config.get("target_language", TargetLanguage.CHINESE)
         return cls._target_language
 
@@ -130,7 +180,7 @@ class Config:
         """Get default font zip package search path"""
         if cls._default_font_path is None:
             # Load from config file
-            config = cls.load_config()
+            config = cls.load_section(cls.SECTION_SETTINGS)
             cls._default_font_path = config.get("default_font_path")
         return cls._default_font_path
 
@@ -140,56 +190,336 @@ class Config:
         cls._default_font_path = path
         cls.save_config({"default_font_path": path})
 
+    @classmethod
+    def get_download_mirrors(cls) -> List[str]:
+        """Get release download mirrors (URL templates, base URLs or local directories)"""
+        config = cls.load_section(cls.SECTION_SETTINGS)
+        return list(config.get("download_mirrors", []))
+
+    @classmethod
+    def set_download_mirrors(cls, mirrors: List[str]):
+        """Set release download mirrors and save to config"""
+        cls.save_config({"download_mirrors": list(mirrors)})
+
+    @classmethod
+    def get_github_api_url(cls) -> str:
+        """Get the GitHub API endpoint used for release metadata"""
+        config = cls.load_section(cls.SECTION_SETTINGS)
+        return config.get("github_api_url") or cls.GITHUB_API_URL
+
+    @classmethod
+    def get_download_sync_interval(cls) -> int:
+        """Get bytes a download writes between data syncs (0 = only the OS decides)"""
+        config = cls.load_section(cls.SECTION_SETTINGS)
+        try:
+            megabytes = int(config.get("download_sync_mb", cls.DEFAULT_DOWNLOAD_SYNC_MB))
+        except (TypeError, ValueError):
+            megabytes = cls.DEFAULT_DOWNLOAD_SYNC_MB
+        return max(0, megabytes) * 1024 * 1024
+
+    @classmethod
+    def get_peer_caches(cls) -> List[str]:
+        """Get LAN peer caches to ask before GitHub ("host", "host:port" or URLs)"""
+        config = cls.load_section(cls.SECTION_SETTINGS)
+        return list(config.get("peer_caches", []))
+
+    @classmethod
+    def get_peer_discovery(cls) -> bool:
+        """Check whether LAN peer caches are discovered over mDNS"""
+        config = cls.load_section(cls.SECTION_SETTINGS)
+        return bool(config.get("peer_discovery", False))
+
+    @classmethod
+    def get_peer_cache_serve(cls) -> bool:
+        """Check whether this device shares its download cache with LAN peers"""
+        config = cls.load_section(cls.SECTION_SETTINGS)
+        return bool(config.get("peer_cache_serve", False))
+
     @classmethod
     def get_managed_games(cls) -> List[Dict[str, Any]]:
         """Get list of games managed by this program"""
-        config = cls.load_config()
+        config = cls.load_section(cls.SECTION_GAMES)
         return config.get("managed_games", [])
 
     @classmethod
     def set_managed_games(cls, games: List[Dict[str, Any]]):
         """Set managed games list and save to config"""
-        cls.save_config({"managed_games": games})
+        cls.save_section(cls.SECTION_GAMES, {"managed_games": games})
 
     @classmethod
     def add_managed_game(cls, game: Dict[str, Any]):
         """Add a game to the managed games list"""
-        games = cls.get_managed_games()
         # Ensure the game is marked as managed by GUI
         game["managed_by_gui"] = True
-        # Check if game already exists (by name or path)
-        for existing_game in games:
-            if existing_game.get("name") == game.get("name") or existing_game.get(
-                "exe_path"
-            ) == game.get("exe_path"):
-                # Update existing game
-                existing_game.update(game)
-                cls.set_managed_games(games)
-                return
-        # Add new game
-        games.append(game)
-        cls.set_managed_games(games)
+
+        def add(data: Dict[str, Any]):
+            games = data.setdefault("managed_games", [])
+            # Check if game already exists (by name or path)
+            for existing_game in games:
+                if existing_game.get("name") == game.get("name") or existing_game.get(
+                    "exe_path"
+                ) == game.get("exe_path"):
+                    # Update existing game
+                    existing_game.update(game)
+                    return
+            # Add new game
+            games.append(game)
+
+        cls.update_section(cls.SECTION_GAMES, add)
 
     @classmethod
-    def load_config(cls) -> Dict[str, Any]:
-        """Load configuration from file"""
+    def _get_section_file(cls, section: str) -> str:
+        """Get the file backing a config section"""
+        if section == cls.SECTION_SETTINGS:
+            return cls._get_config_file()
+        if section == cls.SECTION_GAMES:
+            config_dir = os.path.dirname(cls._get_config_file())
+            return os.path.join(config_dir, cls.GAMES_FILE_NAME)
+        raise ValueError(f"Unknown config section: {section}")
+
+    @staticmethod
+    @contextmanager
+    def _locked(path: str, exclusive: bool) -> Iterator[None]:
+        """
+        Hold a shared or exclusive lock for a config file
+
+        The lock is taken on a sidecar ".lock" file, because writers replace
+        the config file itself atomically.
+        """
+        if fcntl is None:
+            yield
+            return
+
+        lock_file = open(f"{path}.lock", "a+")
         try:
-            config_file = cls._get_config_file()
-            if os.path.exists(config_file):
-                with open(config_file, "r") as f:
-                    return json.load(f)
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            lock_file.close()
+
+    @staticmethod
+    def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+        """Get (mtime_ns, size) of a file, None if missing"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _read_json(path: str) -> Dict[str, Any]:
+        """Read a JSON object from file, empty dict if missing or invalid"""
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
         except Exception:
             pass
         return {}
 
+    @staticmethod
+    def _write_json(path: str, data: Dict[str, Any]):
+        """Atomically write a JSON object to file"""
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
     @classmethod
-    def save_config(cls, config: Dict[str, Any]):
-        """Save configuration to file"""
+    def _migrate_v1(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Move managed_games out of the legacy single config file"""
+        games = data.pop("managed_games", None)
+        if games is not None:
+            games_file = cls._get_section_file(cls.SECTION_GAMES)
+            with cls._locked(games_file, exclusive=True):
+                games_data = cls._read_json(games_file)
+                if not games_data.get("managed_games"):
+                    games_data["managed_games"] = games
+                games_data["schema_version"] = cls.SCHEMA_VERSION
+                games_data["version"] = games_data.get("version", 0) + 1
+                cls._write_json(games_file, games_data)
+        return data
+
+    @classmethod
+    def _ensure_migrated(cls):
+        """Upgrade the on-disk config to the current schema (once per process)"""
+        if cls._migrated:
+            return
+        cls._migrated = True
+
         try:
             config_file = cls._get_config_file()
-            existing = cls.load_config()
-            existing.update(config)
-            with open(config_file, "w") as f:
-                json.dump(existing, f, indent=2)
+            if not os.path.exists(config_file):
+                return
+            with cls._locked(config_file, exclusive=True):
+                data = cls._read_json(config_file)
+                version = data.get("schema_version", 1)
+                if version >= cls.SCHEMA_VERSION:
+                    return
+
+                migrations = {1: cls._migrate_v1}
+                while version < cls.SCHEMA_VERSION:
+                    data = migrations[version](data)
+                    version += 1
+                data["schema_version"] = cls.SCHEMA_VERSION
+                data["version"] = data.get("version", 0) + 1
+                cls._write_json(config_file, data)
+        except Exception as e:
+            print(f"Warning: Failed to migrate config: {e}")
+
+    @classmethod
+    def _read_section(cls, section: str) -> Tuple[int, Dict[str, Any]]:
+        """Read a section file from disk, returns (version, data)"""
+        path = cls._get_section_file(section)
+        data = cls._read_json(path)
+        version = data.get("version", 0)
+        for key in cls.META_KEYS:
+            data.pop(key, None)
+        cls._sections[section] = (cls._file_signature(path), version, data)
+        return version, data
+
+    @classmethod
+    def _write_section(cls, section: str, version: int, data: Dict[str, Any]):
+        """Write a section file (caller holds the exclusive lock)"""
+        path = cls._get_section_file(section)
+        cls._write_json(
+            path, dict(data, schema_version=cls.SCHEMA_VERSION, version=version)
+        )
+        cls._sections[section] = (cls._file_signature(path), version, data)
+
+    @staticmethod
+    def _copy(data: Any) -> Any:
+        """Deep copy of JSON-compatible data"""
+        return json.loads(json.dumps(data))
+
+    @classmethod
+    def _merge_records(
+        cls,
+        base: List[Dict[str, Any]],
+        ours: List[Dict[str, Any]],
+        theirs: List[Dict[str, Any]],
+        id_fields: Tuple[str, ...],
+    ) -> List[Dict[str, Any]]:
+        """
+        Three-way merge of record lists keyed by id_fields
+
+        Records we added, changed or removed relative to base are applied on
+        top of theirs; everything else keeps the concurrent writer's state.
+        """
+
+        def record_id(record: Dict[str, Any]) -> Tuple[str, Any]:
+            for field in id_fields:
+                if record.get(field):
+                    return field, record[field]
+            return id_fields[-1], record.get(id_fields[-1])
+
+        base_map = {record_id(r): r for r in base}
+        ours_map = {record_id(r): r for r in ours}
+        merged = {record_id(r): r for r in theirs}
+
+        for record_id, record in ours_map.items():
+            if base_map.get(record_id) != record:
+                merged[record_id] = record
+        for record_id in base_map:
+            if record_id not in ours_map:
+                merged.pop(record_id, None)
+        return list(merged.values())
+
+    @classmethod
+    def get_section_version(cls, section: str) -> int:
+        """Get the version stamp of a section as last seen by this process"""
+        cls.load_section(section)
+        return cls._sections[section][1]
+
+    @classmethod
+    def load_section(cls, section: str) -> Dict[str, Any]:
+        """
+        Load a single config section
+
+        Only the file backing the requested section is parsed, and the
+        parsed result is reused until the file changes on disk.
+
+        Args:
+            section: Section name (SECTION_SETTINGS or SECTION_GAMES)
+
+        Returns:
+            Copy of the section data
+        """
+        cls._ensure_migrated()
+        path = cls._get_section_file(section)
+        cached = cls._sections.get(section)
+
+        if cached is None or cached[0] != cls._file_signature(path):
+            with cls._locked(path, exclusive=False):
+                cls._read_section(section)
+            cached = cls._sections[section]
+        return cls._copy(cached[2])
+
+    @classmethod
+    def save_section(cls, section: str, values: Dict[str, Any]):
+        """
+        Update keys of a single config section and save it
+
+        The section is re-read under an exclusive lock. If another process
+        wrote it since this process last loaded it, only the keys (and, for
+        record lists, the records) changed here are applied on top.
+
+        Args:
+            section: Section name (SECTION_SETTINGS or SECTION_GAMES)
+            values: Keys to update
+        """
+        try:
+            cls._ensure_migrated()
+            base_version, base = 0, {}
+            if section in cls._sections:
+                _, base_version, base = cls._sections[section]
+
+            path = cls._get_section_file(section)
+            with cls._locked(path, exclusive=True):
+                version, data = cls._read_section(section)
+                for key, value in values.items():
+                    if version == base_version:
+                        data[key] = value
+                    elif key in cls.RECORD_KEYS:
+                        data[key] = cls._merge_records(
+                            base.get(key, []),
+                            value,
+                            data.get(key, []),
+                            cls.RECORD_KEYS[key],
+                        )
+                    elif base.get(key) != value:
+                        data[key] = value
+                cls._write_section(section, version + 1, cls._copy(data))
         except Exception as e:
             print(f"Warning: Failed to save config: {e}")
+
+    @classmethod
+    def update_section(cls, section: str, update: Callable[[Dict[str, Any]], None]):
+        """
+        Atomically read-modify-write a config section
+
+        Args:
+            section: Section name (SECTION_SETTINGS or SECTION_GAMES)
+            update: Function that mutates the current section data in place
+        """
+        try:
+            cls._ensure_migrated()
+            path = cls._get_section_file(section)
+            with cls._locked(path, exclusive=True):
+                version, data = cls._read_section(section)
+                data = cls._copy(data)
+                update(data)
+                cls._write_section(section, version + 1, data)
+        except Exception as e:
+            print(f"Warning: Failed to save config: {e}")
+
+    @classmethod
+    def load_config(cls) -> Dict[str, Any]:
+        """Load settings section (game library lives in its own section)"""
+        return cls.load_section(cls.SECTION_SETTINGS)
+
+    @classmethod
+    def save_config(cls, config: Dict[str, Any]):
+        """Save keys to the settings section"""
+        cls.save_section(cls.SECTION_SETTINGS, config)
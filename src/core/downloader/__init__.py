@@ -3,9 +3,32 @@ Download managers for GitHub releases
 """
 
 from .font import FontReleaseDownloader, GitHubReleaseManager, GitHubAsset
+from .cache import DownloadCache
+from .cancel import CancellationToken, DownloadCancelled
+from .http import get_session
+from .manager import DownloadJob, DownloadManager
+from .mirrors import Mirror, MirrorScores, MirrorSet
+from .partial import PartialDownload
+from .peer import PeerCache, PeerCacheServer
+from .remote_zip import HTTPRangeFile, RangeNotSupported, RemoteZip
 
 __all__ = [
     "FontReleaseDownloader",
     "GitHubReleaseManager", 
     "GitHubAsset",
+    "PartialDownload",
+    "DownloadCache",
+    "get_session",
+    "CancellationToken",
+    "DownloadCancelled",
+    "DownloadJob",
+    "DownloadManager",
+    "Mirror",
+    "MirrorScores",
+    "MirrorSet",
+    "HTTPRangeFile",
+    "RangeNotSupported",
+    "RemoteZip",
+    "PeerCache",
+    "PeerCacheServer",
 ]
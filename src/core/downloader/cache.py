@@ -0,0 +1,176 @@
+"""
+Content-addressed download cache under ~/.cache/steamdeck-galgame/downloads
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+from src.utils import get_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX platforms: fall back to unlocked access
+    fcntl = None
+
+if TYPE_CHECKING:
+    from .font import GitHubAsset
+
+
+class DownloadCache:
+    """
+    Persistent cache of downloaded release assets
+
+    Layout:
+        objects/<sha256>/<asset name>   verified downloads
+        staging/<asset name>            downloads in progress (.part files)
+        index.json                      {sha256: {"name", "size", "version", "last_used"}}
+
+    Entries are found by SHA-256 when the release publishes a digest, and by
+    (name, size, version) otherwise, so a re-uploaded asset of the same size
+    is not mistaken for the cached one. The least recently used entries are
+    evicted once the cache grows past max_bytes. The index is shared by
+    every process using the cache and locked through a sidecar file.
+    """
+
+    CACHE_DIR_NAME = "downloads"
+    INDEX_FILE = "index.json"
+    DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or os.path.join(get_cache_dir(), self.CACHE_DIR_NAME)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Hold the index lock across threads and processes
+
+        The lock is taken on a sidecar ".lock" file, because the index
+        itself is replaced atomically.
+        """
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+
+            os.makedirs(self.root, exist_ok=True)
+            lock_file = open(os.path.join(self.root, f"{self.INDEX_FILE}.lock"), "a+")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+            finally:
+                lock_file.close()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Load the cache index"""
+        try:
+            with open(os.path.join(self.root, self.INDEX_FILE), "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict]):
+        """Write the cache index atomically"""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, self.INDEX_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(f"{path}.tmp", path)
+
+    def get_object_path(self, sha256: str, name: str) -> str:
+        """Get the cache path of a stored asset"""
+        return os.path.join(self.root, "objects", sha256, name)
+
+    def get_staging_path(self, asset: "GitHubAsset") -> str:
+        """Get the path an asset is downloaded to before being added"""
+        return os.path.join(self.root, "staging", asset.name)
+
+    def lookup(self, asset: "GitHubAsset") -> Optional[str]:
+        """
+        Find a cached copy of an asset
+
+        Returns:
+            Path of the cached file, None on a miss
+        """
+        with self._locked():
+            index = self._load_index()
+            if asset.sha256:
+                candidates = [asset.sha256] if asset.sha256 in index else []
+            else:
+                candidates = [
+                    sha256
+                    for sha256, entry in index.items()
+                    if entry["name"] == asset.name
+                    and entry["size"] == asset.size
+                    and entry.get("version") == asset.get_version()
+                ]
+            return self._use(index, candidates)
+
+    def lookup_sha256(self, sha256: str) -> Optional[str]:
+        """
+        Find a cached object by its SHA-256 alone
+
+        Returns:
+            Path of the cached file, None on a miss
+        """
+        with self._locked():
+            index = self._load_index()
+            return self._use(index, [sha256] if sha256 in index else [])
+
+    def _use(self, index: Dict[str, Dict], candidates: List[str]) -> Optional[str]:
+        """Get the most recently used intact candidate and mark it used"""
+        for sha256 in sorted(candidates, key=lambda key: index[key]["last_used"], reverse=True):
+            entry = index[sha256]
+            path = self.get_object_path(sha256, entry["name"])
+            if os.path.isfile(path) and os.path.getsize(path) == entry["size"]:
+                entry["last_used"] = time.time()
+                self._save_index(index)
+                return path
+        return None
+
+    def add(self, path: str, asset: "GitHubAsset") -> str:
+        """
+        Move a verified download into the cache
+
+        Args:
+            path: Downloaded file (moved, not copied)
+            asset: Asset with sha256 set
+
+        Returns:
+            Path of the cached file
+        """
+        target = self.get_object_path(asset.sha256, asset.name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        with self._locked():
+            index = self._load_index()
+            index[asset.sha256] = {
+                "name": asset.name,
+                "size": os.path.getsize(target),
+                "version": asset.get_version(),
+                "last_used": time.time(),
+            }
+            self._evict(index, keep=asset.sha256)
+            self._save_index(index)
+        return target
+
+    def get_total_size(self) -> int:
+        """Get the total size of cached assets in bytes"""
+        return sum(entry["size"] for entry in self._load_index().values())
+
+    def _evict(self, index: Dict[str, Dict], keep: Optional[str] = None):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        total = sum(entry["size"] for entry in index.values())
+        for sha256 in sorted(index, key=lambda key: index[key]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            total -= index[sha256]["size"]
+            shutil.rmtree(os.path.join(self.root, "objects", sha256), ignore_errors=True)
+            del index[sha256]
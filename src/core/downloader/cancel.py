@@ -0,0 +1,124 @@
+"""
+Cancellation tokens for downloads
+"""
+
+import contextlib
+import logging
+import socket
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadCancelled(Exception):
+    """Raised inside a download when its token is cancelled"""
+
+
+class CancellationToken:
+    """
+    Thread-safe cancel flag passed into a download
+
+    Downloads check it between chunks and register their open responses
+    with abort_on_cancel(), so cancel() also unblocks a read that is
+    waiting on the network instead of letting it run until the next chunk.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+        self.keep_partial = True
+
+    def cancel(self, reason: str = "cancelled", keep_partial: bool = True):
+        """
+        Request cancellation
+
+        Args:
+            reason: Reported in the download's message
+            keep_partial: Keep the .part file so the download can resume
+                later, otherwise it is removed
+        """
+        with self._lock:
+            self.reason = reason
+            self.keep_partial = keep_partial
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Cancel callback failed: {e}")
+
+    @property
+    def is_cancelled(self) -> bool:
+        """Check if cancellation was requested"""
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise DownloadCancelled if cancellation was requested"""
+        if self._event.is_set():
+            raise DownloadCancelled(self.reason or "cancelled")
+
+    def add_callback(self, callback: Callable[[], None]):
+        """Run callback on cancel (at once if already cancelled)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]):
+        """Unregister a cancel callback"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def abort_response(response):
+    """
+    Shut down a streamed response's socket from another thread
+
+    A plain close() does not wake a recv() blocked in another thread on
+    Linux; shutdown() does, and the reader then fails at once. The reader
+    closes the response itself.
+    """
+    connection = getattr(response.raw, "_connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        response.close()
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def abort_on_cancel(token: Optional[CancellationToken], response):
+    """
+    Abort a streamed response when the token is cancelled
+
+    Errors raised by the aborted read, and a stream that ends early after
+    the abort, surface as DownloadCancelled.
+    """
+    if token is None:
+        yield
+        return
+
+    def callback():
+        abort_response(response)
+
+    token.raise_if_cancelled()
+    token.add_callback(callback)
+    try:
+        yield
+    except DownloadCancelled:
+        raise
+    except Exception:
+        token.raise_if_cancelled()
+        raise
+    finally:
+        token.remove_callback(callback)
+    token.raise_if_cancelled()
@@ -3,24 +3,54 @@ GitHub Release download manager
 """
 
 import requests
+import hashlib
 import os
 import json
-import sys
-from typing import List, Dict, Optional, Tuple, BinaryIO
+from typing import Callable, List, Dict, Optional, Set, Tuple, BinaryIO
 from pathlib import Path
+from urllib.parse import urlsplit
 import logging
 import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.config import Config
+from src.utils import get_cache_dir
+from src.core.progress import STAGE_DOWNLOAD, ProgressBus, get_progress_bus
+from .cache import DownloadCache
+from .cancel import CancellationToken, DownloadCancelled, abort_on_cancel
+from .http import get_session
+from .mirrors import DIRECT_SOURCE, MirrorSet, MirrorSource
+from .partial import PartialDownload
+from .peer import DEFAULT_PEER_PORT, PeerCache, PeerCacheServer
+from .stream import DataSyncer, iter_response, preallocate
 
 logger = logging.getLogger(__name__)
 
+# Write buffer of the partial file
+WRITE_BUFFER = 1024 * 1024
+
 
 class GitHubAsset:
     """GitHub Release asset object"""
     
-    def __init__(self, name: str, size: int, download_url: str):
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        download_url: str,
+        sha256: Optional[str] = None,
+        updated_at: Optional[str] = None
+    ):
         self.name = name
         self.size = size
         self.download_url = download_url
+        self.sha256 = sha256
+        self.updated_at = updated_at
+    
+    def get_version(self) -> str:
+        """Get what identifies this upload: its update time, else the URL (has the tag)"""
+        return self.updated_at or self.download_url
     
     def get_size_mb(self) -> float:
         """Get file size in MB"""
@@ -30,50 +60,93 @@ class GitHubAsset:
         return f"{self.name} ({self.get_size_mb():.1f} MB)"
 
 
-class ProgressWriter:
-    """Real-time progress writer that bypasses buffering"""
+class TeeReader(io.RawIOBase):
+    """
+    Readable view of a streamed response that copies every byte read to a
+    file and a SHA-256 digest, so a consumer can process the stream while it
+    is being saved
+    """
     
-    def __init__(self):
-        self.last_output = ""
+    def __init__(
+        self, response, sink: BinaryIO, total_size: int = 0,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ):
+        self.raw = response.raw
+        self.raw.decode_content = True
+        self.sink = sink
+        self.digest = hashlib.sha256()
+        self.downloaded = 0
+        self.total_size = total_size
+        self.progress_callback = progress_callback
     
-    def update(self, downloaded: int, total: int, filename: str = ""):
-        """Update progress display with unbuffered output"""
-        if total <= 0:
-            return
-        
-        percent = (downloaded / total) * 100
-        mb_downloaded = downloaded / (1024 * 1024)
-        mb_total = total / (1024 * 1024)
-        
-        # Format: [████████░░░░░░░░░░] 45.2% 23.5/52.1 MB
-        bar_length = 30
-        filled = int(bar_length * downloaded / total)
-        bar = "█" * filled + "░" * (bar_length - filled)
-        
-        progress_line = f"\r[{bar}] {percent:5.1f}% {mb_downloaded:6.1f}/{mb_total:6.1f} MB"
-        
-        # Write directly to raw stdout/stderr to bypass buffering
-        try:
-            # Try using os.write for maximum unbuffered output
-            os.write(2, (progress_line).encode('utf-8', errors='ignore'))
-        except:
-            # Fallback to sys.stderr
-            sys.stderr.write(progress_line)
-            sys.stderr.flush()
-    
-    def finish(self):
-        """Clear progress line"""
-        try:
-            os.write(2, b"\n")
-        except:
-            sys.stderr.write("\n")
-            sys.stderr.flush()
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        data = self.raw.read(len(buffer))
+        count = len(data)
+        buffer[:count] = data
+        if count:
+            self.sink.write(data)
+            self.digest.update(data)
+            self.downloaded += count
+            if self.progress_callback:
+                self.progress_callback(self.downloaded, self.total_size)
+        return count
+    
+    def drain(self):
+        """Read (and save) whatever the consumer left unread"""
+        while self.read(1024 * 1024):
+            pass
+
+
+def _hash_file(path: str, digest=None, limit: Optional[int] = None):
+    """Feed a file (or its first limit bytes) into a SHA-256 digest (a new one by default)"""
+    if digest is None:
+        digest = hashlib.sha256()
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            block = f.read(1024 * 1024 if remaining is None else min(1024 * 1024, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest
+
+
+class RemoteFileChanged(Exception):
+    """The remote file no longer matches the partial download"""
 
 
 class GitHubReleaseManager:
     """GitHub Release download manager"""
     
-    def __init__(self, owner: str, repo: str, timeout: int = 10):
+    # Assets at least this large are fetched as parallel byte-range segments
+    SEGMENT_MIN_SIZE = 16 * 1024 * 1024
+    
+    # Attempts per segment before the download fails
+    SEGMENT_RETRIES = 3
+    
+    # API responses with their ETags, shared by all instances
+    API_CACHE_FILE = "github_api_cache.json"
+    
+    # Age after which cached release metadata is revalidated
+    RELEASE_TTL = 6 * 60 * 60
+    _api_cache: Optional[Dict[str, Dict]] = None
+    _api_cache_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        owner: str,
+        repo: str,
+        timeout: int = 10,
+        segments: int = 4,
+        mirrors: Optional[MirrorSet] = None,
+        api_base: str = Config.GITHUB_API_URL,
+        sync_interval: int = Config.DEFAULT_DOWNLOAD_SYNC_MB * 1024 * 1024
+    ):
         """
         Initialize
         
@@ -81,45 +154,130 @@ class GitHubReleaseManager:
             owner: GitHub username
             repo: Repository name
             timeout: Request timeout in seconds
+            segments: Concurrent byte ranges for large assets (1 disables)
+            mirrors: Download mirrors to rank against the asset URL
+            api_base: GitHub API endpoint (or a compatible mirror)
+            sync_interval: Bytes written between data syncs (0 disables)
         """
         self.owner = owner
         self.repo = repo
         self.timeout = timeout
-        self.api_url = f"https://api.github.com/repos/{owner}/{repo}"
+        self.segments = segments
+        self.mirrors = mirrors
+        self.sync_interval = sync_interval
+        self.api_base = api_base
+        self.api_url = f"{api_base.rstrip('/')}/repos/{owner}/{repo}"
+    
+    @classmethod
+    def _get_cached_response(cls, url: str) -> Optional[Dict]:
+        """Get the stored {"etag", "body"} of an API URL"""
+        with cls._api_cache_lock:
+            if cls._api_cache is None:
+                try:
+                    with open(os.path.join(get_cache_dir(), cls.API_CACHE_FILE), "r") as f:
+                        cls._api_cache = json.load(f)
+                except Exception:
+                    cls._api_cache = {}
+            return cls._api_cache.get(url)
+    
+    @classmethod
+    def _store_cached_response(cls, url: str, etag: Optional[str], body: Dict):
+        """Remember an API response and its ETag, stamped with the fetch time"""
+        with cls._api_cache_lock:
+            cls._api_cache = dict(cls._api_cache or {})
+            cls._api_cache[url] = {"etag": etag, "body": body, "fetched_at": time.time()}
+            try:
+                path = os.path.join(get_cache_dir(), cls.API_CACHE_FILE)
+                with open(f"{path}.tmp", "w") as f:
+                    json.dump(cls._api_cache, f)
+                os.replace(f"{path}.tmp", path)
+            except OSError as e:
+                logger.warning(f"Failed to save API cache: {e}")
+    
+    def get_cached_release(self) -> Tuple[Optional[Dict], bool]:
+        """
+        Get the last known latest release without network I/O
+        
+        Returns:
+            (release dictionary or None, fresh_flag) where fresh_flag is
+            False once the entry is older than RELEASE_TTL
+        """
+        cached = self._get_cached_response(f"{self.api_url}/releases/latest")
+        if not cached:
+            return None, False
+        age = time.time() - cached.get("fetched_at", 0)
+        return cached["body"], age < self.RELEASE_TTL
     
-    def get_latest_release(self) -> Optional[Dict]:
+    def get_latest_release(self, max_age: Optional[float] = None) -> Optional[Dict]:
         """
         Get latest release information
         
+        Sends If-None-Match with the stored ETag; a 304 reply (which does
+        not count against GitHub's rate limit) is served from the stored body.
+        When the request fails, the stored body is returned so the app keeps
+        working offline.
+        
+        Args:
+            max_age: Return the stored body without a request if it was
+                fetched less than this many seconds ago
+        
         Returns:
             Release information dictionary, None on failure
         """
+        url = f"{self.api_url}/releases/latest"
+        cached = self._get_cached_response(url)
+        if cached and max_age is not None:
+            if time.time() - cached.get("fetched_at", 0) < max_age:
+                return cached["body"]
         try:
-            url = f"{self.api_url}/releases/latest"
-            response = requests.get(url, timeout=self.timeout)
+            headers = {"Accept": "application/vnd.github+json"}
+            if cached and cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            
+            response = get_session().get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached:
+                self._store_cached_response(url, cached.get("etag"), cached["body"])
+                return cached["body"]
             response.raise_for_status()
-            return response.json()
+            
+            release = response.json()
+            self._store_cached_response(url, response.headers.get("ETag"), release)
+            return release
         except requests.RequestException as e:
+            if cached:
+                logger.warning(f"Failed to get release info, using last known release: {e}")
+                return cached["body"]
             logger.error(f"Failed to get release info: {e}")
             return None
     
-    def get_release_assets(self) -> List[GitHubAsset]:
+    def get_release_assets(self, max_age: Optional[float] = None) -> List[GitHubAsset]:
         """
         Get all assets from latest release
         
+        Args:
+            max_age: See get_latest_release
+        
         Returns:
             List of assets
         """
-        release = self.get_latest_release()
+        return self.parse_assets(self.get_latest_release(max_age))
+    
+    @staticmethod
+    def parse_assets(release: Optional[Dict]) -> List[GitHubAsset]:
+        """Get the assets of a release dictionary"""
         if not release:
             return []
         
         assets = []
         for asset in release.get("assets", []):
+            # GitHub publishes "digest": "sha256:<hex>" for release assets
+            digest = asset.get("digest") or ""
             ga = GitHubAsset(
                 name=asset["name"],
                 size=asset["size"],
-                download_url=asset["browser_download_url"]
+                download_url=asset["browser_download_url"],
+                sha256=digest[7:] if digest.startswith("sha256:") else None,
+                updated_at=asset.get("updated_at")
             )
             assets.append(ga)
         
@@ -144,106 +302,637 @@ class GitHubReleaseManager:
             "assets_count": len(release.get("assets", []))
         }
     
+    def get_remote_url(self, asset: GitHubAsset) -> Optional[str]:
+        """
+        Get the URL download_asset would fetch an asset from
+
+        Ranks the configured mirrors the same way download_asset does.
+
+        Returns:
+            HTTP URL, None when a local mirror holds the asset (reading it
+            whole is cheaper than any remote access)
+        """
+        if self.mirrors is None:
+            return asset.download_url
+        source = self.mirrors.rank(asset)[0]
+        return None if source.is_local else source.location
+    
     def download_asset(
         self,
         asset: GitHubAsset,
         dest_path: str,
-        progress_callback=None
+        progress_callback=None,
+        progress: Optional[ProgressBus] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Tuple[bool, str]:
         """
-        Download asset with real-time unbuffered progress display
+        Download asset, reporting throttled progress
+        
+        Data goes to <dest_path>.part first. Large assets are fetched as
+        parallel byte-range segments when the server supports ranges; other
+        downloads use a single stream that resumes from the partial file.
+        The file is moved into place only after its size and SHA-256 have
+        been verified; the checksum is computed while streaming and stored
+        on asset.sha256 when the release did not publish one.
         
         Args:
             asset: Asset to download
             dest_path: Destination path
             progress_callback: Legacy progress callback function (downloaded, total)
+            progress: Progress bus (defaults to a terminal progress line)
+            cancel_token: Cancelling closes the connection at once and keeps
+                or removes the partial file as the token requests
             
         Returns:
             (success_flag, message)
         """
+        bus = get_progress_bus(progress, progress_callback)
+        part = PartialDownload(dest_path)
+        if self.mirrors is not None:
+            sources = self.mirrors.rank(asset)
+        else:
+            sources = [MirrorSource(DIRECT_SOURCE, asset.download_url)]
         try:
             # Create target directory
             os.makedirs(os.path.dirname(dest_path), exist_ok=True)
             
-            logger.info(f"Starting download: {asset.name}")
-            
-            # Send request with streaming enabled
-            response = requests.get(
-                asset.download_url,
-                timeout=self.timeout,
-                stream=True
-            )
-            response.raise_for_status()
-            
-            # Get file size
-            total_size = int(response.headers.get('content-length', 0))
-            
-            if total_size == 0:
-                logger.warning("Content-Length header not provided, downloading without progress")
-            
-            # Create progress writer
-            progress_writer = ProgressWriter()
+            for index, source in enumerate(sources):
+                started = time.monotonic()
+                try:
+                    success, msg, sha256 = self._download_from(
+                        source, asset, part, bus, cancel_token
+                    )
+                except requests.RequestException as e:
+                    # The partial file is kept so the next attempt can resume
+                    success, msg, sha256 = False, f"Download failed: {str(e)}", None
+                if success and asset.sha256 and sha256 != asset.sha256:
+                    part.discard()
+                    success, msg = False, f"Checksum mismatch: {asset.name}"
+                if success:
+                    asset.sha256 = sha256
+                    part.commit()
+                    if self.mirrors is not None:
+                        elapsed = max(time.monotonic() - started, 1e-6)
+                        self.mirrors.scores.record(source.key, asset.size / elapsed)
+                    logger.info(f"Download complete: {dest_path}")
+                    return success, msg
+                
+                logger.error(msg)
+                if self.mirrors is not None:
+                    self.mirrors.scores.record_failure(source.key)
+                if index + 1 < len(sources):
+                    next_source = sources[index + 1]
+                    logger.warning(f"Switching to mirror: {next_source.key}")
+                    if asset.sha256 and not next_source.is_local:
+                        # Keep the bytes so far, the checksum still guards the result
+                        part.retarget(next_source.location)
+            return False, msg
+        
+        except DownloadCancelled as e:
+            if not cancel_token.keep_partial:
+                part.discard()
+            logger.info(f"Download {e}: {asset.name}")
+            return False, f"Download {e}: {asset.name}"
+        except requests.RequestException as e:
+            # The partial file is kept so the next attempt can resume
+            error_msg = f"Download failed: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+        except IOError as e:
+            error_msg = f"Failed to save file: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+        except Exception as e:
+            error_msg = f"Exception: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+    
+    def stream_asset(
+        self,
+        asset: GitHubAsset,
+        dest_path: str,
+        consumer: Callable[[BinaryIO], Tuple[bool, str]],
+        progress_callback=None,
+        progress: Optional[ProgressBus] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Tuple[bool, str]:
+        """
+        Download an asset while handing the bytes to a consumer as they arrive
+        
+        The consumer reads a file-like stream (e.g. a streaming tar reader);
+        everything it reads is also written to <dest_path>.part and hashed.
+        After the consumer returns, the rest of the stream is saved and the
+        file is verified and moved into place like download_asset.
+        
+        Args:
+            asset: Asset to download
+            dest_path: Destination path of the saved copy
+            consumer: Called with the stream, returns (success_flag, message)
+            progress_callback: Legacy progress callback function (downloaded, total)
+            progress: Progress bus (defaults to a terminal progress line)
+            cancel_token: Cancellation token (the partial file is always removed)
             
-            # Download file with very small chunks for real-time updates
-            downloaded = 0
-            chunk_size = 64 * 1024  # 64KB chunks for more frequent updates
+        Returns:
+            (success_flag, message), the consumer's message on success
+        """
+        bus = get_progress_bus(progress, progress_callback)
+        part = PartialDownload(dest_path)
+        try:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            part.discard()
+            logger.info(f"Starting streamed download: {asset.name}")
             
-            with open(dest_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        # Update progress display in real-time
-                        if total_size > 0:
-                            progress_writer.update(downloaded, total_size, asset.name)
-                        
-                        # Call legacy progress callback if provided
-                        if progress_callback:
-                            progress_callback(downloaded, total_size)
+            url = asset.download_url
+            if self.mirrors is not None:
+                remote = [source for source in self.mirrors.rank(asset) if not source.is_local]
+                if remote:
+                    url = remote[0].location
+            response = get_session().get(url, timeout=self.timeout, stream=True)
+            with response, abort_on_cancel(cancel_token, response):
+                response.raise_for_status()
+                total_size = int(response.headers.get('content-length', 0)) or asset.size
+                with open(part.part_path, "wb") as f:
+                    stream = TeeReader(
+                        response, f, total_size, bus.callback(STAGE_DOWNLOAD, asset.name)
+                    )
+                    success, msg = consumer(io.BufferedReader(stream, 1024 * 1024))
+                    if success:
+                        stream.drain()
+                    bus.finish(STAGE_DOWNLOAD, stream.downloaded, total_size, asset.name)
             
-            # Clear progress line
-            progress_writer.finish()
+            if not success:
+                part.discard()
+                return False, msg
+            if total_size and stream.downloaded != total_size:
+                part.discard()
+                return False, f"Download incomplete: {stream.downloaded}/{total_size} bytes"
+            sha256 = stream.digest.hexdigest()
+            if asset.sha256 and sha256 != asset.sha256:
+                part.discard()
+                return False, f"Checksum mismatch: {asset.name}"
             
+            asset.sha256 = sha256
+            part.commit()
             logger.info(f"Download complete: {dest_path}")
-            return True, f"Download complete: {asset.name}"
+            return True, msg
         
+        except DownloadCancelled as e:
+            part.discard()
+            logger.info(f"Download {e}: {asset.name}")
+            return False, f"Download {e}: {asset.name}"
         except requests.RequestException as e:
+            part.discard()
             error_msg = f"Download failed: {str(e)}"
             logger.error(error_msg)
             return False, error_msg
-        except IOError as e:
-            error_msg = f"Failed to save file: {str(e)}"
-            logger.error(error_msg)
-            return False, error_msg
         except Exception as e:
+            part.discard()
             error_msg = f"Exception: {str(e)}"
             logger.error(error_msg)
             return False, error_msg
-
+    
+    @staticmethod
+    def _get_validators(response) -> Dict[str, Optional[str]]:
+        """Get the response's If-Range validators for the partial sidecar"""
+        etag = response.headers.get("ETag", "")
+        return {
+            # Weak ETags are not valid for If-Range
+            "etag": etag if etag and not etag.startswith("W/") else None,
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+    
+    def _download_from(
+        self,
+        source: MirrorSource,
+        asset: GitHubAsset,
+        part: PartialDownload,
+        bus: ProgressBus,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        Download from one source
+        
+        Returns:
+            (success_flag, message, sha256 of the partial file)
+        """
+        if source.is_local:
+            return self._copy_local(source.location, asset, part, bus, cancel_token)
+        result = None
+        if self.segments > 1 and asset.size >= self.SEGMENT_MIN_SIZE:
+            result = self._download_segmented(source.location, asset, part, bus, cancel_token)
+        if result is None:
+            result = self._download_stream(source.location, asset, part, bus, cancel_token)
+        return result
+    
+    def _copy_local(
+        self,
+        path: str,
+        asset: GitHubAsset,
+        part: PartialDownload,
+        bus: ProgressBus,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        Copy an asset from a local directory mirror
+        
+        Returns:
+            (success_flag, message, sha256 of the partial file)
+        """
+        logger.info(f"Copying from local mirror: {path}")
+        part.discard()
+        digest = hashlib.sha256()
+        copied = 0
+        with open(path, "rb") as src, open(part.part_path, "wb") as dst:
+            for block in iter(lambda: src.read(1024 * 1024), b""):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                dst.write(block)
+                digest.update(block)
+                copied += len(block)
+                bus.update(STAGE_DOWNLOAD, copied, asset.size, asset.name)
+        bus.finish(STAGE_DOWNLOAD, copied, asset.size, asset.name)
+        
+        if asset.size and copied != asset.size:
+            part.discard()
+            return False, f"Mirror copy incomplete: {copied}/{asset.size} bytes", None
+        return True, f"Copied from local mirror: {asset.name}", digest.hexdigest()
+    
+    def _download_stream(
+        self,
+        url: str,
+        asset: GitHubAsset,
+        part: PartialDownload,
+        bus: ProgressBus,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        Download with one stream, resuming the partial file with a Range
+        request when the sidecar's URL and ETag/Last-Modified still match
+        
+        Returns:
+            (success_flag, message, sha256 of the partial file)
+        """
+        offset = part.get_resume_offset(url, asset.size)
+        headers = {}
+        if offset:
+            logger.info(f"Resuming download: {asset.name} from byte {offset}")
+            headers["Range"] = f"bytes={offset}-"
+            # None after a mirror switch (requests then omits the header)
+            headers["If-Range"] = part.get_validator()
+        else:
+            logger.info(f"Starting download: {asset.name}")
+            part.discard()
+        
+        # Send request with streaming enabled
+        response = get_session().get(
+            url,
+            headers=headers,
+            timeout=self.timeout,
+            stream=True
+        )
+        
+        digest = hashlib.sha256()
+        if response.status_code == 416 and offset:
+            # Nothing left to fetch: the partial file is already complete
+            response.close()
+            state = part.load()
+            total_size = state.get("size") or asset.size
+            _hash_file(part.part_path, digest, offset)
+        else:
+            response.raise_for_status()
+            if response.status_code != 206:
+                # Range ignored or remote file changed: start over
+                offset = 0
+            
+            # Get file size
+            total_size = offset + int(response.headers.get('content-length', 0))
+            if total_size == offset:
+                total_size = asset.size
+                logger.warning("Content-Length header not provided, downloading without progress")
+            
+            preallocated = bool(offset and part.load().get("preallocated"))
+            state = dict(
+                self._get_validators(response),
+                url=url,
+                size=total_size,
+                # Bytes of the partial file that are valid
+                written=offset,
+            )
+            if preallocated:
+                state["preallocated"] = True
+            part.save(state)
+            
+            if offset:
+                # Bytes fetched by an earlier attempt
+                _hash_file(part.part_path, digest, offset)
+            
+            # Read sizes follow the link speed; the bus throttles progress
+            # separately, so large reads do not make the UI choppy
+            with response, abort_on_cancel(cancel_token, response), \
+                    open(part.part_path, 'r+b' if offset else 'wb', buffering=WRITE_BUFFER) as f:
+                f.seek(offset)
+                if not preallocated and total_size > offset and preallocate(f.fileno(), total_size):
+                    state["preallocated"] = True
+                    part.save(state)
+                syncer = DataSyncer(
+                    f.fileno(), self.sync_interval, f.flush, lambda: part.save(state)
+                )
+                try:
+                    for chunk in iter_response(response):
+                        if cancel_token is not None:
+                            cancel_token.raise_if_cancelled()
+                        f.write(chunk)
+                        digest.update(chunk)
+                        state["written"] += len(chunk)
+                        syncer.add(len(chunk))
+                        
+                        bus.update(STAGE_DOWNLOAD, state["written"], total_size, asset.name)
+                finally:
+                    # Record how far the file is valid so a retry resumes
+                    # there, once that data is on disk
+                    syncer.sync()
+            
+            bus.finish(STAGE_DOWNLOAD, state["written"], total_size, asset.name)
+        
+        if state.get("preallocated"):
+            actual_size = state.get("written", 0)
+        else:
+            actual_size = os.path.getsize(part.part_path)
+        if total_size and actual_size != total_size:
+            if actual_size > total_size:
+                part.discard()
+            return False, f"Download incomplete: {actual_size}/{total_size} bytes", None
+        return True, f"Download complete: {asset.name}", digest.hexdigest()
+    
+    def _download_segmented(
+        self,
+        url: str,
+        asset: GitHubAsset,
+        part: PartialDownload,
+        bus: ProgressBus,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Optional[Tuple[bool, str, Optional[str]]]:
+        """
+        Download byte ranges concurrently into a preallocated partial file
+        
+        Each segment's progress is kept in the sidecar (saved only once the
+        data it covers is synced to disk), so a failed segment
+        is retried (now or on the next call) from where it stopped while
+        completed segments are left alone.
+        
+        Segments arrive out of order, so the checksum is computed with one
+        read of the finished file (still in the page cache).
+        
+        Returns:
+            (success_flag, message, sha256), None when the server does not
+            support ranges and a single stream should be used instead
+        """
+        state = part.load()
+        if not (
+            state.get("segments")
+            and state.get("url") == url
+            and state.get("size") == asset.size
+            and os.path.exists(part.part_path)
+        ):
+            # Probe range support with the first byte
+            probe = get_session().get(
+                url,
+                headers={"Range": "bytes=0-0"},
+                timeout=self.timeout,
+                stream=True
+            )
+            probe.close()
+            content_range = probe.headers.get("Content-Range", "")
+            validators = self._get_validators(probe)
+            if probe.status_code != 206 or not any(validators.values()) or "/" not in content_range:
+                return None
+            total_size = int(content_range.rsplit("/", 1)[1])
+            
+            part.discard()
+            with open(part.part_path, "wb") as f:
+                if not preallocate(f.fileno(), total_size):
+                    f.truncate(total_size)
+            step = -(-total_size // self.segments)
+            state = dict(
+                validators,
+                url=url,
+                size=total_size,
+                # [start, end (exclusive), next byte to fetch]
+                segments=[
+                    [start, min(start + step, total_size), start]
+                    for start in range(0, total_size, step)
+                ],
+            )
+            part.save(state)
+            logger.info(f"Starting segmented download: {asset.name} ({len(state['segments'])} segments)")
+        else:
+            logger.info(f"Resuming segmented download: {asset.name}")
+        
+        total_size = state["size"]
+        validator = state.get("etag") or state.get("last_modified")
+        lock = threading.Lock()
+        progress = {"downloaded": sum(pos - start for start, _, pos in state["segments"])}
+        
+        checkpoint = {}
+        
+        def snapshot_state():
+            # Only positions reached before the sync are known to be on disk
+            with lock:
+                checkpoint["state"] = dict(
+                    state, segments=[list(segment) for segment in state["segments"]]
+                )
+        
+        def save_state():
+            part.save(checkpoint["state"])
+        
+        def add_progress(count: int):
+            with lock:
+                progress["downloaded"] += count
+                downloaded = progress["downloaded"]
+            syncer.add(count)
+            bus.update(STAGE_DOWNLOAD, downloaded, total_size, asset.name)
+        
+        def fetch(fd: int, segment: List[int]):
+            error = None
+            for _ in range(self.SEGMENT_RETRIES):
+                if segment[2] >= segment[1]:
+                    return
+                try:
+                    response = get_session().get(
+                        url,
+                        headers={
+                            "Range": f"bytes={segment[2]}-{segment[1] - 1}",
+                            "If-Range": validator,
+                        },
+                        timeout=self.timeout,
+                        stream=True
+                    )
+                    with response, abort_on_cancel(cancel_token, response):
+                        if response.status_code != 206:
+                            raise RemoteFileChanged(f"{asset.name} changed on the server")
+                        for chunk in iter_response(response, segment[1] - segment[2]):
+                            if cancel_token is not None:
+                                cancel_token.raise_if_cancelled()
+                            os.pwrite(fd, chunk, segment[2])
+                            segment[2] += len(chunk)
+                            add_progress(len(chunk))
+                except requests.RequestException as e:
+                    error = e
+                finally:
+                    # The sidecar is saved only after the data it records
+                    syncer.sync()
+            if segment[2] < segment[1]:
+                raise error or IOError(f"Segment at byte {segment[0]} incomplete")
+        
+        fd = os.open(part.part_path, os.O_WRONLY)
+        syncer = DataSyncer(
+            fd, self.sync_interval, flush=snapshot_state, on_sync=save_state
+        )
+        try:
+            with ThreadPoolExecutor(max_workers=self.segments) as pool:
+                futures = [pool.submit(fetch, fd, segment) for segment in state["segments"]]
+                errors = [future.exception() for future in futures if future.exception()]
+        finally:
+            os.close(fd)
+            bus.finish(STAGE_DOWNLOAD, progress["downloaded"], total_size, asset.name)
+        
+        for error in errors:
+            if isinstance(error, DownloadCancelled):
+                raise error
+            if isinstance(error, RemoteFileChanged):
+                part.discard()
+                return False, f"Download failed: {error}", None
+        if errors:
+            # Completed segments stay recorded for the next attempt
+            return False, f"Download failed: {errors[0]}", None
+        
+        actual_size = os.path.getsize(part.part_path)
+        if actual_size != total_size:
+            part.discard()
+            return False, f"Download incomplete: {actual_size}/{total_size} bytes", None
+        return True, f"Download complete: {asset.name}", _hash_file(part.part_path).hexdigest()
 
 class FontReleaseDownloader:
     """Font Release downloader (easy-galgame-fonts)"""
     
     OWNER = "yikolemon"
     REPO = "easy-galgame-fonts"
-    DOWNLOAD_DIR = "/tmp/steamdeck_fonts"
     
-    def __init__(self):
-        self.manager = GitHubReleaseManager(self.OWNER, self.REPO)
+    def __init__(self, cache: Optional[DownloadCache] = None, peers: Optional[PeerCache] = None):
+        """
+        Initialize
+        
+        Args:
+            cache: Download cache (the default one if omitted)
+            peers: LAN peer caches (from the "peer_caches" and
+                "peer_discovery" settings if omitted)
+        """
+        mirrors = Config.get_download_mirrors()
+        if peers is None and (Config.get_peer_caches() or Config.get_peer_discovery()):
+            peers = PeerCache(Config.get_peer_caches(), discover=Config.get_peer_discovery())
+        self.peers = peers
+        self.manager = GitHubReleaseManager(
+            self.OWNER,
+            self.REPO,
+            mirrors=MirrorSet(mirrors) if mirrors else None,
+            api_base=Config.get_github_api_url(),
+            sync_interval=Config.get_download_sync_interval()
+        )
+        self.cache = cache or DownloadCache()
     
-    def list_available_fonts(self) -> List[GitHubAsset]:
-        """List available font packages"""
-        return self.manager.get_release_assets()
+    def list_available_fonts(self, max_age: Optional[float] = None) -> List[GitHubAsset]:
+        """List available font packages (see GitHubReleaseManager.get_latest_release)"""
+        return self.manager.get_release_assets(max_age)
+    
+    def list_cached_fonts(self) -> Tuple[List[GitHubAsset], bool]:
+        """
+        List the last known font packages without network I/O
+        
+        Returns:
+            (assets, fresh_flag)
+        """
+        release, fresh = self.manager.get_cached_release()
+        return self.manager.parse_assets(release), fresh
     
     def get_release_info(self) -> Dict:
         """Get release information"""
         return self.manager.get_release_info()
     
+    def get_local_copy(
+        self,
+        asset: GitHubAsset,
+        progress: Optional[ProgressBus] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Optional[str]:
+        """
+        Find an asset in the download cache or, by SHA-256, on a LAN peer
+        
+        Peers are only asked for digests published in GitHub's release
+        metadata, and a copy fetched from a peer is verified against it
+        before it is added to the cache.
+        
+        Returns:
+            Path of the cached file, None if it has to be downloaded
+        """
+        cached_path = self.cache.lookup(asset)
+        if cached_path:
+            logger.info(f"Cache hit: {asset.name}")
+            return cached_path
+        if self.peers is None or asset.sha256 not in self.get_published_digests():
+            return None
+        
+        # Next to the staging file, so a partial GitHub download is kept
+        peer_path = self.cache.get_staging_path(asset) + ".peer"
+        if self.peers.fetch(asset, peer_path, progress, cancel_token):
+            return self.cache.add(peer_path, asset)
+        return None
+    
+    def get_published_digests(self) -> Set[str]:
+        """Get the SHA-256 digests in the cached GitHub release metadata"""
+        release, _ = self.manager.get_cached_release()
+        return {asset.sha256 for asset in self.manager.parse_assets(release) if asset.sha256}
+    
+    def serve_peer_cache(self, port: int = DEFAULT_PEER_PORT, advertise: bool = True) -> PeerCacheServer:
+        """
+        Share the download cache with LAN peers
+        
+        Only assets whose digest GitHub published are served.
+        
+        Returns:
+            The running server (call stop() to end it)
+        """
+        server = PeerCacheServer(
+            self.cache, self.get_published_digests, port=port, advertise=advertise
+        )
+        return server.start()
+    
+    def get_source_host(self, asset: GitHubAsset) -> str:
+        """
+        Get the host an asset will be fetched from
+
+        Checks the cache, then LAN peers, then the preferred mirror. Used to
+        spread concurrent downloads over hosts, so nothing is transferred.
+
+        Returns:
+            Host (netloc), "" when the asset is local (cache or local mirror)
+        """
+        if self.cache.lookup(asset):
+            return ""
+        if self.peers is not None and asset.sha256 in self.get_published_digests():
+            peer = self.peers.locate(asset)
+            if peer is not None:
+                return urlsplit(peer).netloc
+        if self.manager.mirrors is None:
+            return urlsplit(asset.download_url).netloc
+        source = self.manager.mirrors.get_preferred(asset)
+        return "" if source.is_local else urlsplit(source.location).netloc
+    
     def download_font(
         self,
         asset: GitHubAsset,
-        progress_callback=None
+        progress_callback=None,
+        progress: Optional[ProgressBus] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Tuple[bool, str, Optional[str]]:
         """
         Download font package
@@ -251,24 +940,56 @@ class FontReleaseDownloader:
         Args:
             asset: Font resource to download
             progress_callback: Progress callback
+            progress: Progress bus
+            cancel_token: Cancellation token
             
         Returns:
             (success_flag, message, local_path)
         """
-        # Create download directory
-        os.makedirs(self.DOWNLOAD_DIR, exist_ok=True)
+        # An unchanged asset is served from the cache or a LAN peer
+        bus = get_progress_bus(progress, progress_callback)
+        cached_path = self.get_local_copy(asset, bus, cancel_token)
+        if cached_path:
+            return True, f"Using cached download: {asset.name}", cached_path
         
-        # Target path
-        dest_path = os.path.join(self.DOWNLOAD_DIR, asset.name)
-        
-        # Download
+        # Download into the cache's staging area
+        dest_path = self.cache.get_staging_path(asset)
         success, msg = self.manager.download_asset(
             asset,
             dest_path,
-            progress_callback
+            progress=bus,
+            cancel_token=cancel_token
         )
         
         if success:
-            return True, msg, dest_path
+            return True, msg, self.cache.add(dest_path, asset)
         else:
             return False, msg, None
+    
+    def discard_partial(self, asset: GitHubAsset):
+        """Remove the partial download of an asset"""
+        PartialDownload(self.cache.get_staging_path(asset)).discard()
+    
+    def stream_font(
+        self,
+        asset: GitHubAsset,
+        consumer: Callable[[BinaryIO], Tuple[bool, str]],
+        progress_callback=None,
+        progress: Optional[ProgressBus] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        Download a font package while a consumer processes the stream
+        
+        The saved copy goes into the download cache.
+        
+        Returns:
+            (success_flag, consumer message, local_path)
+        """
+        dest_path = self.cache.get_staging_path(asset)
+        success, msg = self.manager.stream_asset(
+            asset, dest_path, consumer, progress_callback, progress, cancel_token
+        )
+        if success:
+            return True, msg, self.cache.add(dest_path, asset)
+        return False, msg, None
@@ -0,0 +1,329 @@
+"""
+Download queue - several release assets downloaded concurrently, with
+priorities and per-job pause/cancel, scheduled on an asyncio event loop
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from src.core.progress import ProgressBus, ProgressEvent
+from .cancel import CancellationToken
+from .font import FontReleaseDownloader, GitHubAsset
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_PAUSED = "paused"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+# Token reason used to stop a running job that should be resumed later
+PAUSE_REASON = "paused"
+
+
+class DownloadJob:
+    """One queued asset download"""
+
+    def __init__(
+        self, manager: "DownloadManager", asset: GitHubAsset, priority: int, install: bool = False
+    ):
+        self.asset = asset
+        self.priority = priority
+        self.install = install  # Install while downloading instead of only downloading
+        self.state = JOB_QUEUED
+        self.message = ""
+        self.path: Optional[str] = None
+        self.progress: Optional[ProgressEvent] = None
+        # Host of the resolved source ("" if local), None until resolved
+        self.host: Optional[str] = None
+        self._manager = manager
+        self._token = CancellationToken()
+        self._finished = threading.Event()
+        self._settled = threading.Event()  # Finished or paused
+
+    def get_host(self) -> str:
+        """Get the host the asset is downloaded from (mirror or peer once resolved)"""
+        if self.host is not None:
+            return self.host
+        return urlsplit(self.asset.download_url).netloc
+
+    def is_finished(self) -> bool:
+        """Check if the job is done, failed or cancelled"""
+        return self.state in FINISHED_STATES
+
+    def pause(self):
+        """Pause the job, keeping its partial file for resuming"""
+        self._manager.pause(self)
+
+    def resume(self):
+        """Queue a paused job again"""
+        self._manager.resume(self)
+
+    def cancel(self):
+        """Cancel the job"""
+        self._manager.cancel(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the job is finished
+
+        Returns:
+            False on timeout
+        """
+        return self._finished.wait(timeout)
+
+    def __repr__(self) -> str:
+        return f"DownloadJob({self.asset.name}, {self.state})"
+
+
+class DownloadManager:
+    """
+    Downloads queued assets concurrently
+
+    Scheduling runs on a private asyncio event loop in a background thread;
+    the transfers themselves run in a thread pool. Higher priority jobs
+    start first, and at most max_concurrent jobs run at once, with at most
+    max_per_host against one host so a single server is not flooded. The
+    host is the source each job resolves to (mirror, LAN peer or GitHub)
+    before it starts; assets found locally are not limited.
+
+    All public methods are thread-safe. on_update is called with the job
+    whenever its state changes and on throttled progress events, from the
+    loop or worker threads.
+    """
+
+    def __init__(
+        self,
+        downloader: Optional[FontReleaseDownloader] = None,
+        max_concurrent: int = 3,
+        max_per_host: int = 2,
+        on_update: Optional[Callable[[DownloadJob], None]] = None,
+    ):
+        self.downloader = downloader or FontReleaseDownloader()
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host
+        self.on_update = on_update
+        self.jobs: List[DownloadJob] = []
+
+        # Loop-confined scheduling state
+        self._queue: List[Tuple[int, int, DownloadJob]] = []
+        self._active = 0
+        self._host_active: Dict[str, int] = {}
+        self._seq = itertools.count()
+
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def submit(self, asset: GitHubAsset, priority: int = 0, install: bool = False) -> DownloadJob:
+        """
+        Queue an asset for download
+
+        An asset that is already queued or running returns its existing job.
+
+        Args:
+            asset: Asset to download
+            priority: Higher values start first
+            install: Install the fonts as well, streaming tar packs and
+                delta-updating installed zip packs (job.path stays None)
+
+        Returns:
+            The job
+        """
+        with self._lock:
+            for job in self.jobs:
+                if job.asset.name == asset.name and not job.is_finished():
+                    return job
+            job = DownloadJob(self, asset, priority, install)
+            self.jobs.append(job)
+        self._loop.call_soon_threadsafe(self._enqueue, job)
+        return job
+
+    def pause(self, job: DownloadJob):
+        """Pause a queued or running job"""
+        self._loop.call_soon_threadsafe(self._pause, job)
+
+    def resume(self, job: DownloadJob):
+        """Queue a paused job again"""
+        self._loop.call_soon_threadsafe(self._resume, job)
+
+    def cancel(self, job: DownloadJob):
+        """Cancel a job and remove its partial file"""
+        # Abort a running transfer right away, the loop updates the state
+        job._token.cancel(keep_partial=False)
+        self._loop.call_soon_threadsafe(self._cancel, job)
+
+    def cancel_all(self):
+        """Cancel every unfinished job"""
+        for job in list(self.jobs):
+            if not job.is_finished():
+                self.cancel(job)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every job is finished or paused
+
+        Returns:
+            False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in list(self.jobs):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job._settled.wait(remaining):
+                return False
+        return True
+
+    def shutdown(self):
+        """Cancel all jobs and stop the event loop"""
+        self.cancel_all()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._executor.shutdown(wait=False)
+        self._loop.close()
+
+    def _notify(self, job: DownloadJob):
+        """Report a job update"""
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(job)
+        except Exception as e:
+            logger.warning(f"Download update callback failed: {e}")
+
+    def _set_state(self, job: DownloadJob, state: str, message: str = ""):
+        """Change a job's state (loop thread)"""
+        job.state = state
+        if message:
+            job.message = message
+        if job.is_finished():
+            job._finished.set()
+        if job.is_finished() or state == JOB_PAUSED:
+            job._settled.set()
+        else:
+            job._settled.clear()
+        self._notify(job)
+
+    def _enqueue(self, job: DownloadJob):
+        job.host = None
+        heapq.heappush(self._queue, (-job.priority, next(self._seq), job))
+        self._set_state(job, JOB_QUEUED)
+        self._loop.create_task(self._resolve(job))
+
+    async def _resolve(self, job: DownloadJob):
+        """Find the job's source host off the loop, then try to start it"""
+        try:
+            host = await self._loop.run_in_executor(
+                None, self.downloader.get_source_host, job.asset
+            )
+        except Exception as e:
+            logger.warning(f"Failed to resolve download source of {job.asset.name}: {e}")
+            host = urlsplit(job.asset.download_url).netloc
+        job.host = host
+        self._dispatch()
+
+    def _dequeue(self, job: DownloadJob) -> bool:
+        """Remove a job from the queue, False if it was not queued"""
+        for entry in self._queue:
+            if entry[2] is job:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                return True
+        return False
+
+    def _dispatch(self):
+        """Start the highest priority jobs whose host has a free slot"""
+        while self._queue and self._active < self.max_concurrent:
+            for entry in sorted(self._queue):
+                host = entry[2].host
+                if host is None:
+                    # Wait for it rather than letting a lower priority job pass
+                    return
+                if not host or self._host_active.get(host, 0) < self.max_per_host:
+                    break
+            else:
+                return
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            job = entry[2]
+            self._active += 1
+            self._host_active[job.host] = self._host_active.get(job.host, 0) + 1
+            # Off the queue means running, so a cancel now goes through the token
+            self._set_state(job, JOB_RUNNING)
+            self._loop.create_task(self._run(job))
+
+    async def _run(self, job: DownloadJob):
+        """Run one job in the thread pool and record the outcome"""
+        try:
+            if job._token.is_cancelled:
+                # Paused or cancelled before the transfer started
+                if not job._token.keep_partial:
+                    self.downloader.discard_partial(job.asset)
+                success, msg, path = False, f"Download {job._token.reason}: {job.asset.name}", None
+            else:
+                success, msg, path = await self._loop.run_in_executor(
+                    self._executor, self._download, job
+                )
+        except Exception as e:
+            success, msg, path = False, f"Exception: {e}", None
+        finally:
+            self._active -= 1
+            self._host_active[job.host] -= 1
+
+        if success:
+            job.path = path
+            self._set_state(job, JOB_DONE, msg)
+        elif job._token.is_cancelled and job._token.reason == PAUSE_REASON:
+            self._set_state(job, JOB_PAUSED, msg)
+        elif job._token.is_cancelled:
+            self._set_state(job, JOB_CANCELLED, msg)
+        else:
+            self._set_state(job, JOB_FAILED, msg)
+        self._dispatch()
+
+    def _download(self, job: DownloadJob) -> Tuple[bool, str, Optional[str]]:
+        """Download (and for install jobs, install) a job's asset (worker thread)"""
+
+        def on_progress(event: ProgressEvent):
+            job.progress = event
+            self._notify(job)
+
+        bus = ProgressBus([on_progress])
+        if job.install:
+            from src.core.installers.font import download_and_install_fonts
+
+            success, msg = download_and_install_fonts(
+                job.asset, progress=bus, cancel_token=job._token, downloader=self.downloader
+            )
+            return success, msg, None
+        return self.downloader.download_font(job.asset, progress=bus, cancel_token=job._token)
+
+    def _pause(self, job: DownloadJob):
+        if job.state == JOB_QUEUED and self._dequeue(job):
+            self._set_state(job, JOB_PAUSED)
+        elif job.state == JOB_RUNNING and not job._token.is_cancelled:
+            # The download stops at its next chunk; _run marks it paused
+            job._token.cancel(PAUSE_REASON)
+
+    def _resume(self, job: DownloadJob):
+        if job.state == JOB_PAUSED:
+            job._token = CancellationToken()
+            self._enqueue(job)
+
+    def _cancel(self, job: DownloadJob):
+        if job.state in (JOB_QUEUED, JOB_PAUSED):
+            self._dequeue(job)
+            if job.state == JOB_PAUSED:
+                self.downloader.discard_partial(job.asset)
+            self._set_state(job, JOB_CANCELLED, f"Download cancelled: {job.asset.name}")
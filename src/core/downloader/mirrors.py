@@ -0,0 +1,258 @@
+"""
+Release download mirrors - probed and ranked by measured throughput
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+import requests
+from src.utils import get_cache_dir
+from .http import get_session
+
+if TYPE_CHECKING:
+    from .font import GitHubAsset
+
+logger = logging.getLogger(__name__)
+
+# Key of the asset's own browser_download_url in the score history
+DIRECT_SOURCE = "direct"
+
+# GitHub release layout, appended to mirrors without placeholders
+RELEASE_LAYOUT = "{owner}/{repo}/releases/download/{tag}/{name}"
+
+_RELEASE_URL_RE = re.compile(r"^/([^/]+)/([^/]+)/releases/download/([^/]+)/([^/]+)$")
+
+
+def parse_release_url(url: str) -> Optional[Dict[str, str]]:
+    """
+    Split a release asset URL into its owner, repo, tag and name
+
+    Returns:
+        Placeholder values for mirror templates, None if the URL does not
+        follow the GitHub release layout
+    """
+    match = _RELEASE_URL_RE.match(urlsplit(url).path)
+    if not match:
+        return None
+    owner, repo, tag, name = (unquote(part) for part in match.groups())
+    return {"owner": owner, "repo": repo, "tag": tag, "name": name}
+
+
+class MirrorSource:
+    """Where one mirror serves one asset"""
+
+    def __init__(self, key: str, location: str, is_local: bool = False):
+        self.key = key
+        self.location = location  # URL, or file path for local mirrors
+        self.is_local = is_local
+
+    def __repr__(self) -> str:
+        return f"MirrorSource({self.key}, {self.location})"
+
+
+class Mirror:
+    """
+    One configured mirror
+
+    Spec formats:
+        https://proxy.example/{url}      template ({url}, {owner}, {repo},
+                                         {tag}, {name} placeholders)
+        https://mirror.example/releases  base URL in the GitHub release layout
+        /media/usb/mirror, file:///...   local directory in the same layout
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        self.is_local = not re.match(r"^https?://", spec)
+
+    def resolve(self, asset: "GitHubAsset") -> Optional[MirrorSource]:
+        """Get this mirror's source for an asset, None if it cannot serve it"""
+        values = parse_release_url(asset.download_url) or {}
+        values["url"] = asset.download_url
+        template = self.spec
+        if "{" not in template:
+            template = template.rstrip("/") + "/" + RELEASE_LAYOUT
+        try:
+            location = template.format(**values)
+        except (KeyError, IndexError, ValueError):
+            return None
+        if self.is_local:
+            if location.startswith("file://"):
+                location = unquote(location[len("file://") :])
+            location = os.path.expanduser(location)
+        return MirrorSource(self.spec, location, self.is_local)
+
+
+class MirrorScores:
+    """
+    Throughput history per mirror, persisted in the cache directory
+
+    Probes and finished downloads add samples in bytes per second; a
+    failure adds a zero sample, so a flaky mirror sinks in the ranking.
+    """
+
+    SCORES_FILE_NAME = "mirror_scores.json"
+    MAX_SAMPLES = 10
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(get_cache_dir(), self.SCORES_FILE_NAME)
+        self._lock = threading.Lock()
+        self._history: Optional[Dict[str, List[float]]] = None
+
+    def _load(self) -> Dict[str, List[float]]:
+        if self._history is None:
+            try:
+                with open(self.path, "r") as f:
+                    self._history = json.load(f)
+            except Exception:
+                self._history = {}
+        return self._history
+
+    def _save(self):
+        try:
+            with open(f"{self.path}.tmp", "w") as f:
+                json.dump(self._history, f)
+            os.replace(f"{self.path}.tmp", self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save mirror scores: {e}")
+
+    def record(self, key: str, throughput: float):
+        """Add a throughput sample (bytes per second)"""
+        with self._lock:
+            samples = self._load().setdefault(key, [])
+            samples.append(throughput)
+            del samples[: -self.MAX_SAMPLES]
+            self._save()
+
+    def record_failure(self, key: str):
+        """Add a failed attempt"""
+        self.record(key, 0.0)
+
+    def get_history(self, key: str) -> List[float]:
+        """Get the recorded samples of a mirror, oldest first"""
+        with self._lock:
+            return list(self._load().get(key, []))
+
+    def get_score(self, key: str) -> float:
+        """Get a mirror's score, weighting recent samples more"""
+        samples = self.get_history(key)
+        if not samples:
+            return 0.0
+        weights = range(1, len(samples) + 1)
+        return sum(w * s for w, s in zip(weights, samples)) / sum(weights)
+
+
+class MirrorSet:
+    """
+    Configured mirrors plus the asset's own URL, ranked per asset
+
+    Each candidate is probed with a small ranged request (local mirrors by
+    checking the file size); candidates that fail the probe are dropped,
+    the rest are ordered by their score history including the new probe.
+    """
+
+    PROBE_BYTES = 64 * 1024
+
+    def __init__(
+        self,
+        specs: List[str],
+        scores: Optional[MirrorScores] = None,
+        timeout: float = 5.0,
+    ):
+        self.mirrors = [Mirror(spec) for spec in specs]
+        self.scores = scores or MirrorScores()
+        self.timeout = timeout
+
+    def get_candidates(self, asset: "GitHubAsset") -> List[MirrorSource]:
+        """Get every source of an asset, unranked"""
+        sources = [MirrorSource(DIRECT_SOURCE, asset.download_url)]
+        for mirror in self.mirrors:
+            source = mirror.resolve(asset)
+            if source is not None:
+                sources.append(source)
+        return sources
+
+    def get_preferred(self, asset: "GitHubAsset") -> MirrorSource:
+        """
+        Guess the source rank() will put first, without probing
+
+        A local mirror holding the asset wins, otherwise the remote source
+        with the best score history (the asset's own URL on a tie).
+        """
+        candidates = self.get_candidates(asset)
+        for source in candidates:
+            if source.is_local and self.probe(source, asset) is not None:
+                return source
+        remote = [source for source in candidates if not source.is_local]
+        return max(remote, key=lambda source: self.scores.get_score(source.key))
+
+    def probe(self, source: MirrorSource, asset: "GitHubAsset") -> Optional[float]:
+        """
+        Measure a source's throughput
+
+        Returns:
+            Bytes per second, None if the source cannot serve the asset
+        """
+        if source.is_local:
+            try:
+                size = os.path.getsize(source.location)
+            except OSError:
+                return None
+            # Local copies always win over the network
+            return float("inf") if size == asset.size else None
+
+        want = min(self.PROBE_BYTES, asset.size) or self.PROBE_BYTES
+        started = time.monotonic()
+        try:
+            response = get_session().get(
+                source.location,
+                headers={"Range": f"bytes=0-{want - 1}"},
+                timeout=self.timeout,
+                stream=True,
+            )
+            with response:
+                if response.status_code not in (200, 206):
+                    return None
+                received = 0
+                for chunk in response.iter_content(chunk_size=16 * 1024):
+                    received += len(chunk)
+                    if received >= want:
+                        break
+        except requests.RequestException as e:
+            logger.info(f"Mirror probe failed: {source.key}: {e}")
+            return None
+        return received / max(time.monotonic() - started, 1e-6)
+
+    def rank(self, asset: "GitHubAsset") -> List[MirrorSource]:
+        """
+        Probe all sources in parallel and order them best first
+
+        Returns:
+            Usable sources, the asset's own URL when every probe fails
+        """
+        candidates = self.get_candidates(asset)
+        if len(candidates) == 1:
+            return candidates
+        with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+            results = list(pool.map(lambda source: self.probe(source, asset), candidates))
+
+        ranked = []
+        for source, throughput in zip(candidates, results):
+            if throughput is None:
+                self.scores.record_failure(source.key)
+            elif throughput == float("inf"):
+                ranked.append((float("inf"), source))
+            else:
+                self.scores.record(source.key, throughput)
+                ranked.append((self.scores.get_score(source.key), source))
+        if not ranked:
+            return candidates[:1]
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        logger.info("Mirror ranking: " + ", ".join(source.key for _, source in ranked))
+        return [source for _, source in ranked]
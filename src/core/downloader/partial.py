@@ -0,0 +1,99 @@
+"""
+Partial download state - <dest>.part data plus a <dest>.part.json sidecar
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+
+class PartialDownload:
+    """
+    In-progress download of one file
+
+    The sidecar records the URL, validator (ETag or Last-Modified) and
+    expected size, so an interrupted download can resume with a Range request
+    only when it still refers to the same remote file.
+    """
+
+    PART_SUFFIX = ".part"
+    META_SUFFIX = ".part.json"
+
+    def __init__(self, dest_path: str):
+        self.dest_path = dest_path
+        self.part_path = dest_path + self.PART_SUFFIX
+        self.meta_path = dest_path + self.META_SUFFIX
+
+    def load(self) -> Dict:
+        """Load the sidecar state, empty if missing or unreadable"""
+        try:
+            with open(self.meta_path, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def save(self, state: Dict):
+        """Write the sidecar state atomically"""
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def get_resume_offset(self, url: str, size: Optional[int]) -> int:
+        """
+        Get the byte offset to resume from
+
+        Args:
+            url: URL being downloaded
+            size: Expected total size, if known
+
+        Returns:
+            Bytes already on disk, 0 when the partial file cannot be reused
+        """
+        state = self.load()
+        if state.get("url") != url or not os.path.exists(self.part_path):
+            return 0
+        if state.get("segments"):
+            # Preallocated segmented file: its size says nothing about progress
+            return 0
+        if size and state.get("size") and state["size"] != size:
+            return 0
+        if not (state.get("etag") or state.get("last_modified") or state.get("retargeted")):
+            return 0
+        offset = os.path.getsize(self.part_path)
+        if state.get("preallocated"):
+            # Full-size file: only the recorded prefix holds data
+            offset = min(state.get("written", 0), offset)
+        if state.get("size") and offset > state["size"]:
+            return 0
+        return offset
+
+    def get_validator(self) -> Optional[str]:
+        """Get the If-Range value for a resumed request"""
+        state = self.load()
+        return state.get("etag") or state.get("last_modified")
+
+    def retarget(self, url: str):
+        """
+        Continue the partial file from another URL serving the same file
+
+        The validators of the old URL do not apply to the new one, so the
+        caller must verify the finished file (e.g. by checksum).
+        """
+        state = self.load()
+        if not state:
+            return
+        state.update(url=url, etag=None, last_modified=None, retargeted=True)
+        self.save(state)
+
+    def discard(self):
+        """Remove the partial file and its sidecar"""
+        for path in (self.part_path, self.meta_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def commit(self):
+        """Move the finished partial file into place"""
+        os.replace(self.part_path, self.dest_path)
+        if os.path.exists(self.meta_path):
+            os.unlink(self.meta_path)
@@ -0,0 +1,329 @@
+"""
+LAN peer cache - one device serves its download cache over HTTP, the
+others fetch assets from it by SHA-256 before going to GitHub
+
+Peers are not authenticated, so only content is exchanged: release
+metadata (and with it every digest) always comes from GitHub.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Callable, List, Optional, Set
+import requests
+from src.core.progress import STAGE_DOWNLOAD, ProgressBus
+from .cache import DownloadCache
+from .cancel import CancellationToken, DownloadCancelled, abort_on_cancel
+from .http import get_session
+from .stream import iter_response
+
+try:
+    from zeroconf import ServiceBrowser, ServiceInfo, Zeroconf
+except ImportError:  # mDNS is optional: static peers still work
+    Zeroconf = None
+
+if TYPE_CHECKING:
+    from .font import GitHubAsset
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PEER_PORT = 47631
+
+# mDNS service type the cache is advertised under
+SERVICE_TYPE = "_galgame-cache._tcp.local."
+
+_OBJECT_PATH_RE = re.compile(r"^/objects/([0-9a-f]{64})$")
+
+
+def _get_lan_address() -> str:
+    """Get the address other devices on the LAN reach this one at"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            # No packet is sent, this only picks the outgoing interface
+            sock.connect(("10.255.255.255", 1))
+            return sock.getsockname()[0]
+        except OSError:
+            return "127.0.0.1"
+
+
+class PeerRequestHandler(BaseHTTPRequestHandler):
+    """Serves cached objects (GET and HEAD)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(f"Peer request from {self.client_address[0]}: {format % args}")
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body: bool):
+        match = _OBJECT_PATH_RE.match(self.path)
+        if match and match.group(1) in self.server.get_digests():
+            path = self.server.cache.lookup_sha256(match.group(1))
+            if path:
+                self._send_file(path, send_body)
+                return
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_file(self, path: str, send_body: bool):
+        with open(path, "rb") as f:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.end_headers()
+            if send_body:
+                shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+
+
+class PeerCacheServer(ThreadingHTTPServer):
+    """
+    HTTP server sharing a DownloadCache with other devices on the LAN
+
+    Routes:
+        GET /objects/<sha256>   cached asset with that hash (HEAD to check)
+
+    Only cached assets whose digest GitHub published are served; clients
+    verify everything they receive against that digest. The server is
+    advertised over mDNS when zeroconf is installed.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        cache: DownloadCache,
+        get_digests: Callable[[], Set[str]],
+        host: str = "",
+        port: int = DEFAULT_PEER_PORT,
+        advertise: bool = True,
+    ):
+        """
+        Initialize
+
+        Args:
+            cache: Download cache to share
+            get_digests: Returns the SHA-256 digests GitHub published
+            host: Address to listen on (all interfaces by default)
+            port: Port to listen on (0 picks a free one)
+            advertise: Announce the server over mDNS if zeroconf is available
+        """
+        super().__init__((host, port), PeerRequestHandler)
+        self.cache = cache
+        self.get_digests = get_digests
+        self.advertise = advertise
+        self._thread: Optional[threading.Thread] = None
+        self._zeroconf = None
+        self._service_info = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "PeerCacheServer":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        if self.advertise and Zeroconf is not None:
+            try:
+                self._register_service()
+            except Exception as e:
+                logger.warning(f"Failed to advertise peer cache over mDNS: {e}")
+        logger.info(f"Peer cache serving on port {self.port}")
+        return self
+
+    def stop(self):
+        """Stop serving and withdraw the mDNS announcement"""
+        if self._zeroconf is not None:
+            self._zeroconf.unregister_service(self._service_info)
+            self._zeroconf.close()
+            self._zeroconf = None
+        if self._thread is not None:
+            self.shutdown()
+            self._thread = None
+        self.server_close()
+
+    def _register_service(self):
+        address = _get_lan_address()
+        self._service_info = ServiceInfo(
+            SERVICE_TYPE,
+            f"{socket.gethostname()}-{self.port}.{SERVICE_TYPE}",
+            addresses=[socket.inet_aton(address)],
+            port=self.port,
+        )
+        self._zeroconf = Zeroconf()
+        self._zeroconf.register_service(self._service_info)
+
+
+class _PeerListener:
+    """Collects peer URLs from mDNS announcements"""
+
+    def __init__(self):
+        self.peers: List[str] = []
+
+    def add_service(self, zeroconf, service_type: str, name: str):
+        info = zeroconf.get_service_info(service_type, name, timeout=1000)
+        if info is None:
+            return
+        for address in info.parsed_addresses():
+            self.peers.append(f"http://{address}:{info.port}")
+
+    def update_service(self, zeroconf, service_type: str, name: str):
+        pass
+
+    def remove_service(self, zeroconf, service_type: str, name: str):
+        pass
+
+
+class PeerCache:
+    """
+    Client side of the LAN peer cache
+
+    Peers come from static configuration ("host", "host:port" or a URL)
+    and, with discover set, from a short mDNS browse on first use. Every
+    object is checked against the requested SHA-256 before it is accepted.
+    """
+
+    DISCOVERY_SECONDS = 1.5
+
+    def __init__(self, peers: Optional[List[str]] = None, discover: bool = False, timeout: float = 3.0):
+        self.static_peers = [self.normalize(peer) for peer in peers or []]
+        self.discover = discover and Zeroconf is not None
+        self.timeout = timeout
+        self._discovered: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(peer: str) -> str:
+        """Turn a configured peer into a base URL"""
+        peer = peer.strip().rstrip("/")
+        if not re.match(r"^https?://", peer):
+            peer = f"http://{peer}"
+        if not re.search(r":\d+$", peer.split("://", 1)[1]):
+            peer = f"{peer}:{DEFAULT_PEER_PORT}"
+        return peer
+
+    def get_peers(self) -> List[str]:
+        """Get the base URLs of all known peers, static ones first"""
+        with self._lock:
+            if self.discover and self._discovered is None:
+                self._discovered = self._browse()
+            peers = list(self.static_peers)
+            for peer in self._discovered or []:
+                if peer not in peers:
+                    peers.append(peer)
+            return peers
+
+    def _browse(self) -> List[str]:
+        listener = _PeerListener()
+        try:
+            zeroconf = Zeroconf()
+        except Exception as e:
+            logger.warning(f"mDNS discovery unavailable: {e}")
+            return []
+        try:
+            ServiceBrowser(zeroconf, SERVICE_TYPE, listener)
+            time.sleep(self.DISCOVERY_SECONDS)
+        finally:
+            zeroconf.close()
+        logger.info(f"Discovered {len(listener.peers)} peer cache(s)")
+        return listener.peers
+
+    def locate(self, asset: "GitHubAsset") -> Optional[str]:
+        """
+        Find the first peer holding an asset, without transferring it
+
+        Returns:
+            Peer base URL, None if no peer has the asset's SHA-256
+        """
+        if not asset.sha256:
+            return None
+        for peer in self.get_peers():
+            try:
+                response = get_session().head(
+                    f"{peer}/objects/{asset.sha256}", timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                logger.info(f"Peer lookup failed: {peer}: {e}")
+                continue
+            if response.status_code == 200:
+                return peer
+        return None
+
+    def fetch(
+        self,
+        asset: "GitHubAsset",
+        dest_path: str,
+        bus: Optional[ProgressBus] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> bool:
+        """
+        Fetch an asset from the first peer that has it
+
+        Args:
+            asset: Asset with the sha256 GitHub published
+            dest_path: Where to write the verified file
+            bus: Progress bus
+            cancel_token: Cancelling stops the transfer (nothing is kept)
+
+        Returns:
+            True if dest_path now holds the asset
+        """
+        if not asset.sha256:
+            return False
+        for peer in self.get_peers():
+            if cancel_token is not None and cancel_token.is_cancelled:
+                return False
+            try:
+                if self._fetch_from(peer, asset, dest_path, bus, cancel_token):
+                    logger.info(f"Fetched {asset.name} from peer {peer}")
+                    return True
+            except (requests.RequestException, DownloadCancelled, OSError) as e:
+                logger.info(f"Peer fetch failed: {peer}: {e}")
+            if os.path.exists(dest_path):
+                os.unlink(dest_path)
+        return False
+
+    def _fetch_from(
+        self,
+        peer: str,
+        asset: "GitHubAsset",
+        dest_path: str,
+        bus: Optional[ProgressBus],
+        cancel_token: Optional[CancellationToken],
+    ) -> bool:
+        url = f"{peer}/objects/{asset.sha256}"
+        response = get_session().get(url, timeout=self.timeout, stream=True)
+        with response:
+            if response.status_code != 200:
+                return False
+            digest = hashlib.sha256()
+            received = 0
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with abort_on_cancel(cancel_token, response), open(dest_path, "wb") as f:
+                # Never take more than the asset's size from a peer
+                for chunk in iter_response(response, limit=asset.size + 1):
+                    received += len(chunk)
+                    if received > asset.size:
+                        break
+                    f.write(chunk)
+                    digest.update(chunk)
+                    if bus is not None:
+                        bus.update(STAGE_DOWNLOAD, received, asset.size, asset.name)
+        if received != asset.size or digest.hexdigest() != asset.sha256:
+            logger.warning(f"Peer {peer} sent data not matching {asset.name}, ignoring it")
+            return False
+        if bus is not None:
+            bus.finish(STAGE_DOWNLOAD, received, asset.size, asset.name)
+        return True
@@ -0,0 +1,150 @@
+"""
+Remote zip reading - the central directory and single members of a zip on
+an HTTP server, fetched with Range requests
+"""
+
+import io
+import logging
+import zipfile
+from typing import List, Optional
+from .cancel import CancellationToken, abort_on_cancel
+from .http import get_session
+
+logger = logging.getLogger(__name__)
+
+
+class RangeNotSupported(IOError):
+    """The server did not answer a Range request with 206"""
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """
+    Seekable read-only file over HTTP Range requests
+
+    Reads are served from one buffered window; a miss fetches at least
+    READ_AHEAD bytes. prefetch() loads an exact byte span with a single
+    request, so a whole zip member can be read without further requests.
+    """
+
+    READ_AHEAD = 64 * 1024
+
+    # End of central directory (22 bytes) plus the longest zip comment
+    TAIL_SIZE = 22 + 65535
+
+    def __init__(
+        self, url: str, timeout: int = 10, cancel_token: Optional[CancellationToken] = None
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.cancel_token = cancel_token
+        self.size = 0
+        self.requests = 0
+        self.bytes_fetched = 0
+        self._validator: Optional[str] = None
+        self._pos = 0
+        self._window_start = 0
+        self._window = b""
+
+        # The tail request also tells the total size
+        self._fetch(f"bytes=-{self.TAIL_SIZE}")
+
+    def _fetch(self, byte_range: str):
+        """Load a byte range into the window"""
+        headers = {"Range": byte_range}
+        if self._validator:
+            headers["If-Range"] = self._validator
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        response = get_session().get(
+            self.url, headers=headers, timeout=self.timeout, stream=True
+        )
+        self.requests += 1
+        with response, abort_on_cancel(self.cancel_token, response):
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code != 206 or not content_range.startswith("bytes "):
+                raise RangeNotSupported(f"Range request not supported: {self.url}")
+            span, total = content_range[len("bytes ") :].split("/", 1)
+            self.size = int(total)
+            self._validator = response.headers.get("ETag") or response.headers.get(
+                "Last-Modified"
+            )
+            self._window_start = int(span.split("-", 1)[0])
+            self._window = response.content
+        self.bytes_fetched += len(self._window)
+
+    def prefetch(self, start: int, end: int):
+        """Load bytes [start, end) with one request"""
+        if self._window_start <= start and end <= self._window_start + len(self._window):
+            return
+        self._fetch(f"bytes={start}-{min(end, self.size) - 1}")
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        want = min(len(buffer), self.size - self._pos)
+        if want <= 0:
+            return 0
+        window_end = self._window_start + len(self._window)
+        if not (self._window_start <= self._pos and self._pos + want <= window_end):
+            end = min(self._pos + max(want, self.READ_AHEAD), self.size)
+            self._fetch(f"bytes={self._pos}-{end - 1}")
+        offset = self._pos - self._window_start
+        data = self._window[offset : offset + want]
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+class RemoteZip:
+    """
+    Zip archive on an HTTP server
+
+    Opening costs one request for the tail (end record and, for packs with
+    a normal number of members, the whole central directory); each member
+    read costs one request covering exactly its local header and data.
+    """
+
+    def __init__(
+        self, url: str, timeout: int = 10, cancel_token: Optional[CancellationToken] = None
+    ):
+        self.file = HTTPRangeFile(url, timeout, cancel_token)
+        self.zip = zipfile.ZipFile(self.file)
+        self._ends = {}
+        offsets = sorted(info.header_offset for info in self.zip.infolist())
+        offsets.append(self.zip.start_dir)
+        for start, end in zip(offsets, offsets[1:]):
+            self._ends[start] = end
+
+    def infolist(self) -> List[zipfile.ZipInfo]:
+        """Get the central directory entries"""
+        return self.zip.infolist()
+
+    def open(self, info: zipfile.ZipInfo):
+        """Open a member for reading, fetching it with one Range request"""
+        end = self._ends.get(info.header_offset, self.zip.start_dir)
+        self.file.prefetch(info.header_offset, end)
+        return self.zip.open(info)
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self) -> "RemoteZip":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
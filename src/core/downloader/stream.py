@@ -0,0 +1,150 @@
+"""
+Response reading and target file handling - adaptive read sizes into a
+reusable buffer, preallocated files and periodic data syncs
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Iterator, Optional
+import requests
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+
+
+class ChunkSizer:
+    """
+    Picks read sizes so one read takes about TARGET_SECONDS
+
+    Slow links keep small reads (regular progress, prompt cancel checks);
+    fast links grow towards MAX_CHUNK so the per-read Python overhead stops
+    mattering. Sizes are powers of two.
+    """
+
+    MIN_CHUNK = 64 * 1024
+    MAX_CHUNK = 4 * 1024 * 1024
+    TARGET_SECONDS = 0.1
+
+    def __init__(self):
+        self.size = self.MIN_CHUNK
+
+    def update(self, count: int, elapsed: float):
+        """Adjust the next read size from the last read's throughput"""
+        if count < self.size:
+            # Short read (end of stream or a limited range): says nothing
+            return
+        if elapsed <= 0:
+            target = self.MAX_CHUNK
+        else:
+            target = count / elapsed * self.TARGET_SECONDS
+        if target >= self.size * 2 and self.size < self.MAX_CHUNK:
+            self.size *= 2
+        elif target < self.size // 2 and self.size > self.MIN_CHUNK:
+            self.size //= 2
+
+
+def iter_response(
+    response, limit: int = 0, clock: Callable[[], float] = time.monotonic
+) -> Iterator[memoryview]:
+    """
+    Read a streamed response into one reusable buffer
+
+    Each yielded view is only valid until the next iteration, so it must be
+    written out (or copied) right away.
+
+    Args:
+        response: Streamed requests response
+        limit: Stop after this many bytes (0 = read to the end)
+    """
+    raw = response.raw
+    raw.decode_content = True
+    sizer = ChunkSizer()
+    view = memoryview(bytearray(ChunkSizer.MAX_CHUNK))
+    remaining = limit
+    while True:
+        size = sizer.size if not limit else min(sizer.size, remaining)
+        if size <= 0:
+            return
+        started = clock()
+        # Translate urllib3 errors like Response.iter_content does
+        try:
+            count = raw.readinto(view[:size])
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        if not count:
+            return
+        sizer.update(count, clock() - started)
+        if limit:
+            remaining -= count
+        yield view[:count]
+
+
+def preallocate(fd: int, size: int) -> bool:
+    """
+    Reserve disk space for a whole file up front
+
+    One contiguous reservation avoids the scattered extents a slowly
+    growing file gets on a fragmented card. The file size becomes size.
+
+    Returns:
+        False if the platform or filesystem does not support it
+    """
+    if not hasattr(os, "posix_fallocate") or size <= 0:
+        return False
+    try:
+        os.posix_fallocate(fd, 0, size)
+        return True
+    except OSError:
+        return False
+
+
+class DataSyncer:
+    """
+    Flushes written data to disk every interval bytes
+
+    Bounds the dirty page cache a download builds up, so writeback does
+    not stall other I/O (e.g. a running game) in one large burst.
+    flush is called before and on_sync after each sync, when everything
+    written before the flush is on disk. Syncs are serialized, so the two
+    calls of one sync always pair up.
+    """
+
+    def __init__(
+        self,
+        fd: int,
+        interval: int,
+        flush: Optional[Callable[[], None]] = None,
+        on_sync: Optional[Callable[[], None]] = None,
+    ):
+        self.fd = fd
+        self.interval = interval
+        self.flush = flush
+        self.on_sync = on_sync
+        self._pending = 0
+        self._lock = threading.RLock()
+
+    def add(self, count: int):
+        """Account written bytes, syncing when the interval is reached"""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            self._pending += count
+            if self._pending < self.interval:
+                return
+            self._pending = 0
+            self.sync()
+
+    def sync(self):
+        """Write buffered data to disk now"""
+        with self._lock:
+            if self.flush is not None:
+                self.flush()
+            if hasattr(os, "fdatasync"):
+                os.fdatasync(self.fd)
+            else:
+                os.fsync(self.fd)
+            if self.on_sync is not None:
+                self.on_sync()
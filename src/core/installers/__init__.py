@@ -14,6 +14,7 @@ from .font import (
     get_fonts_count,
     download_and_install_fonts,
     list_available_fonts,
+    list_cached_fonts,
     get_fonts_release_info,
 )
 
@@ -27,5 +28,6 @@ __all__ = [
     "get_fonts_count",
     "download_and_install_fonts",
     "list_available_fonts",
+    "list_cached_fonts",
     "get_fonts_release_info",
 ]
@@ -4,14 +4,32 @@ Chinese Fonts installer
 
 import os
 import zipfile
+import zlib
 import tarfile
 import shutil
 import subprocess
-from typing import Tuple, Optional, Callable, Dict, List
+import threading
+from typing import BinaryIO, Tuple, Optional, Callable, Dict, List
 from src.utils import is_fonts_installed
 from src.config import Config
 from .base import BaseInstaller
-from src.core.downloader import FontReleaseDownloader, GitHubAsset
+from src.core.downloader import (
+    CancellationToken,
+    DownloadCancelled,
+    FontReleaseDownloader,
+    GitHubAsset,
+    RemoteZip,
+)
+from src.core.prefix import PrefixFontLinker, apply_font_substitutes
+from src.core.progress import (
+    STAGE_COPY,
+    STAGE_DOWNLOAD,
+    STAGE_EXTRACT,
+    STAGE_FC_CACHE,
+    UNIT_FILES,
+    ProgressBus,
+    get_progress_bus,
+)
 
 # Supported font file extensions
 FONT_EXTENSIONS = (".ttf", ".otf", ".ttc", ".woff", ".woff2")
@@ -19,6 +37,13 @@ FONT_EXTENSIONS = (".ttf", ".otf", ".ttc", ".woff", ".woff2")
 # Supported archive extensions
 ARCHIVE_EXTENSIONS = (".zip", ".7z", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
 
+# Archives that can be read front to back while downloading (zip and 7z
+# keep their index at the end)
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+# Concurrent installs (download queue) share the font cache and prefix registries
+_FINISH_LOCK = threading.Lock()
+
 
 class FontInstaller(BaseInstaller):
     """Chinese fonts installer - supports zip, 7z, tar, and direct font files"""
@@ -107,6 +132,192 @@ class FontInstaller(BaseInstaller):
                     font_files.append((src_file, normalized_name))
         return font_files
 
+    @staticmethod
+    def is_streamable(name: str) -> bool:
+        """Check if a font file or archive can be installed straight from a stream"""
+        return name.lower().endswith(FONT_EXTENSIONS + TAR_EXTENSIONS)
+
+    def _install_font_stream(self, src: BinaryIO, filename: str, replace: bool = False) -> bool:
+        """
+        Write one font from a stream into the fonts dir
+
+        Returns:
+            False if the font already existed and replace is off (cp -n behavior)
+        """
+        dst_file = os.path.join(self.fonts_dir, self._normalize_font_filename(filename))
+        if os.path.exists(dst_file) and not replace:
+            return False
+        tmp_file = f"{dst_file}.tmp"
+        with open(tmp_file, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp_file, dst_file)
+        return True
+
+    def install_from_stream(
+        self, stream: BinaryIO, name: str, progress: Optional[ProgressBus] = None
+    ) -> Tuple[bool, str]:
+        """
+        Install fonts from a single-font or tar stream as it is read
+
+        Only font members are written, straight into the fonts dir; nothing
+        is extracted to a temporary directory.
+
+        Args:
+            stream: Readable binary stream (file or download)
+            name: Font or archive file name, used to detect the format
+            progress: Progress bus for the extract and fc-cache stages
+        """
+        bus = get_progress_bus(progress)
+        try:
+            os.makedirs(self.fonts_dir, exist_ok=True)
+            font_count = 0
+
+            if self._is_font_file(name):
+                print("[1/2] Installing font file...")
+                self._install_font_stream(stream, os.path.basename(name))
+                font_count = 1
+
+            elif name.lower().endswith(TAR_EXTENSIONS):
+                print("[1/2] Installing fonts from archive stream...")
+                with tarfile.open(fileobj=stream, mode="r|*") as tar_ref:
+                    for member in tar_ref:
+                        if member.isfile() and self._is_font_file(member.name):
+                            self._install_font_stream(
+                                tar_ref.extractfile(member), os.path.basename(member.name)
+                            )
+                            font_count += 1
+                            bus.update(STAGE_EXTRACT, font_count, 0, member.name, UNIT_FILES)
+                bus.finish(STAGE_EXTRACT, font_count, font_count, name, UNIT_FILES)
+                if not font_count:
+                    return False, "ERROR: No font files found in the archive"
+
+            else:
+                return False, f"ERROR: Unsupported stream format: {name}"
+
+            print("[2/2] Updating font cache...")
+            return self._finish_install(font_count, bus)
+
+        except Exception as e:
+            return False, f"ERROR: Exception occurred: {str(e)}"
+
+    def _get_installed_path(self, info: zipfile.ZipInfo) -> str:
+        """Get the path a zip member is installed to"""
+        filename = self._normalize_font_filename(os.path.basename(info.filename))
+        return os.path.join(self.fonts_dir, filename)
+
+    def _is_font_current(self, info: zipfile.ZipInfo) -> bool:
+        """Check if a zip member is installed with the same size and CRC-32"""
+        dst_file = self._get_installed_path(info)
+        try:
+            if os.path.getsize(dst_file) != info.file_size:
+                return False
+            crc = 0
+            with open(dst_file, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    crc = zlib.crc32(block, crc)
+        except OSError:
+            return False
+        return crc == info.CRC
+
+    def update_from_remote_zip(
+        self,
+        url: str,
+        progress: Optional[ProgressBus] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional[Tuple[bool, str]]:
+        """
+        Update installed fonts from a zip pack on a server, fetching only
+        the members that are missing or differ (by size and CRC-32)
+
+        The central directory and each needed member are read with Range
+        requests, so an upgrade costs about the size of the changed fonts.
+
+        Args:
+            url: Zip pack URL
+            progress: Progress bus for the download and fc-cache stages
+            cancel_token: Cancellation token, checked before every request
+
+        Returns:
+            (success_flag, detailed_message), None when no font of the pack
+            is installed yet or the server does not support ranges, in
+            which case the whole pack should be downloaded
+        """
+        bus = get_progress_bus(progress)
+        try:
+            with RemoteZip(url, cancel_token=cancel_token) as remote:
+                fonts = [
+                    info
+                    for info in remote.infolist()
+                    if not info.is_dir() and self._is_font_file(info.filename)
+                ]
+                # Hashing is only worth it once some font of the pack exists
+                if not any(os.path.exists(self._get_installed_path(info)) for info in fonts):
+                    return None
+                changed = [info for info in fonts if not self._is_font_current(info)]
+                if len(changed) == len(fonts):
+                    return None
+                if not changed:
+                    return True, f"SUCCESS: All {len(fonts)} font(s) are up to date"
+
+                print(f"[1/2] Updating {len(changed)} of {len(fonts)} font(s)...")
+                os.makedirs(self.fonts_dir, exist_ok=True)
+                for index, info in enumerate(changed):
+                    bus.update(STAGE_DOWNLOAD, index, len(changed), info.filename, UNIT_FILES)
+                    with remote.open(info) as src:
+                        self._install_font_stream(src, os.path.basename(info.filename), replace=True)
+                bus.finish(STAGE_DOWNLOAD, len(changed), len(changed), "fonts", UNIT_FILES)
+                print(f"Fetched {remote.file.bytes_fetched} bytes in {remote.file.requests} request(s)")
+        except DownloadCancelled as e:
+            return False, f"ERROR: Font update {e}"
+        except (IOError, zipfile.BadZipFile) as e:
+            print(f"Warning: Delta update unavailable, downloading the full pack: {e}")
+            return None
+
+        print("[2/2] Updating font cache...")
+        return self._finish_install(len(changed), bus)
+
+    def _finish_install(self, font_count: int, bus: ProgressBus) -> Tuple[bool, str]:
+        """Refresh the font cache, link fonts into Proton prefixes and report"""
+        with _FINISH_LOCK:
+            return self._finish_install_locked(font_count, bus)
+
+    def _finish_install_locked(self, font_count: int, bus: ProgressBus) -> Tuple[bool, str]:
+        # Update font cache (optional, runs without sudo)
+        bus.update(STAGE_FC_CACHE, 0, 1, "fc-cache", UNIT_FILES)
+        try:
+            subprocess.run(["fc-cache", "-fv"], capture_output=True, timeout=30)
+        except Exception:
+            pass  # Font cache update is optional
+        bus.finish(STAGE_FC_CACHE, 1, 1, "fc-cache", UNIT_FILES)
+
+        # Windows games only see fonts inside their prefix
+        links = PrefixFontLinker(store_dir=self.fonts_dir).apply()
+        for failure in links["failed"]:
+            print(f"Warning: Failed to link fonts: {failure}")
+
+        # Point the faces games ask for (MS Gothic, SimSun, ...) at the new font
+        substituted, substitute_msg = apply_font_substitutes(
+            Config.get_target_language(), store_dir=self.fonts_dir
+        )
+        print(substitute_msg if substituted else f"Warning: {substitute_msg}")
+
+        # Count installed fonts
+        installed_count = 0
+        if os.path.isdir(self.fonts_dir):
+            installed_count = len(
+                [
+                    f
+                    for f in os.listdir(self.fonts_dir)
+                    if os.path.isfile(os.path.join(self.fonts_dir, f))
+                ]
+            )
+
+        return (
+            True,
+            f"SUCCESS: Font installation completed!\nProcessed {font_count} font file(s)\nTotal installed fonts: {installed_count}"
+            f"\nLinked into {len(links['updated'])} Proton prefix(es)",
+        )
+
     def _normalize_font_filename(self, filename: str) -> str:
         """
         Normalize font filename by converting extension to lowercase
@@ -120,6 +331,7 @@ class FontInstaller(BaseInstaller):
         self,
         font_path: Optional[str] = None,
         progress_callback: Optional[Callable] = None,
+        progress: Optional[ProgressBus] = None,
     ) -> Tuple[bool, str]:
         """
         Install fonts from archive or font file
@@ -132,6 +344,7 @@ class FontInstaller(BaseInstaller):
         """
         if font_path:
             self.font_path = font_path
+        bus = get_progress_bus(progress, progress_callback)
 
         if not self.font_path:
             return False, "ERROR: Font file or archive path not specified"
@@ -143,6 +356,11 @@ class FontInstaller(BaseInstaller):
 
             font_files = []
 
+            # Tar archives are read front to back without a temp extraction
+            if self.font_path.lower().endswith(TAR_EXTENSIONS):
+                with open(self.font_path, "rb") as f:
+                    return self.install_from_stream(f, self.font_path, bus)
+
             # Handle direct font file
             if self._is_font_file(self.font_path):
                 print("[1/3] Processing font file...")
@@ -163,7 +381,9 @@ class FontInstaller(BaseInstaller):
 
                 # Extract archive
                 print("[2/4] Extracting font archive...")
+                bus.update(STAGE_EXTRACT, 0, 0, os.path.basename(self.font_path))
                 success, error = self._extract_archive(self.font_path, self.temp_dir)
+                bus.finish(STAGE_EXTRACT, 0, 0, os.path.basename(self.font_path))
                 if not success:
                     shutil.rmtree(self.temp_dir)
                     return False, f"ERROR: {error}"
@@ -187,7 +407,8 @@ class FontInstaller(BaseInstaller):
 
             # Copy each font file
             font_count = 0
-            for src_file, filename in font_files:
+            for index, (src_file, filename) in enumerate(font_files):
+                bus.update(STAGE_COPY, index, len(font_files), "fonts", UNIT_FILES)
                 dst_file = os.path.join(self.fonts_dir, filename)
                 # Only copy if destination doesn't exist (cp -n behavior)
                 if not os.path.exists(dst_file):
@@ -198,12 +419,7 @@ class FontInstaller(BaseInstaller):
                         print(f"Warning: Failed to copy {filename}: {e}")
                 else:
                     font_count += 1  # Count existing files too
-
-            # Update font cache (optional, runs without sudo)
-            try:
-                subprocess.run(["fc-cache", "-fv"], capture_output=True, timeout=30)
-            except Exception:
-                pass  # Font cache update is optional
+            bus.finish(STAGE_COPY, len(font_files), len(font_files), "fonts", UNIT_FILES)
 
             # Clean up temp directory
             step = "[3/3]" if not use_temp_dir else "[4/4]"
@@ -211,21 +427,7 @@ class FontInstaller(BaseInstaller):
             if use_temp_dir and os.path.exists(self.temp_dir):
                 shutil.rmtree(self.temp_dir)
 
-            # Count installed fonts
-            installed_count = 0
-            if os.path.isdir(self.fonts_dir):
-                installed_count = len(
-                    [
-                        f
-                        for f in os.listdir(self.fonts_dir)
-                        if os.path.isfile(os.path.join(self.fonts_dir, f))
-                    ]
-                )
-
-            return (
-                True,
-                f"SUCCESS: Font installation completed!\nProcessed {font_count} font file(s)\nTotal installed fonts: {installed_count}",
-            )
+            return self._finish_install(font_count, bus)
 
         except Exception as e:
             # Clean up on error
@@ -259,23 +461,58 @@ def setup_fonts(font_path: str) -> Tuple[bool, str]:
 
 
 def download_and_install_fonts(
-    asset: GitHubAsset, progress_callback: Optional[Callable] = None
+    asset: GitHubAsset,
+    progress_callback: Optional[Callable] = None,
+    progress: Optional[ProgressBus] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    downloader: Optional[FontReleaseDownloader] = None,
 ) -> Tuple[bool, str]:
     """
     Download and install fonts from GitHub Release
 
     Args:
         asset: The font resource to download
-        progress_callback: Progress callback function
+        progress_callback: Progress callback function (downloaded, total)
+        progress: Progress bus covering download and install stages
+        cancel_token: Cancellation token, also stops a streaming install
+        downloader: Downloader to use (a new one by default)
 
     Returns:
         (success_flag, detailed_message)
     """
-    downloader = FontReleaseDownloader()
+    downloader = downloader or FontReleaseDownloader()
+    bus = get_progress_bus(progress, progress_callback)
+
+    # A copy in the cache or on a LAN peer skips the streaming paths
+    local_path = downloader.get_local_copy(asset, bus, cancel_token)
+
+    # Tar and single-font packages are installed while they download
+    if FontInstaller.is_streamable(asset.name) and not local_path:
+        print(f"Downloading and installing font package: {asset.name}...")
+        installer = FontInstaller(asset=asset)
+        success, msg, _ = downloader.stream_font(
+            asset,
+            lambda stream: installer.install_from_stream(stream, asset.name, bus),
+            progress=bus,
+            cancel_token=cancel_token,
+        )
+        return success, msg
+
+    # Zip packs that are already installed only fetch the changed fonts
+    if asset.name.lower().endswith(".zip") and not local_path:
+        # A local mirror is read whole, which beats any remote access
+        remote_url = downloader.manager.get_remote_url(asset)
+        if remote_url:
+            installer = FontInstaller(asset=asset)
+            result = installer.update_from_remote_zip(remote_url, bus, cancel_token)
+            if result is not None:
+                return result
 
     # Download fonts
     print(f"[1/2] Downloading font package: {asset.name}...")
-    success, msg, zip_path = downloader.download_font(asset, progress_callback)
+    success, msg, zip_path = downloader.download_font(
+        asset, progress=bus, cancel_token=cancel_token
+    )
 
     if not success:
         return False, msg
@@ -283,19 +520,23 @@ def download_and_install_fonts(
     # Install fonts
     print("\n[2/2] Starting font installation...")
     installer = FontInstaller(zip_path)
-    return installer.install(progress_callback=progress_callback)
+    return installer.install(progress=bus)
 
 
-def list_available_fonts() -> Tuple[bool, list]:
+def list_available_fonts(max_age: Optional[float] = None) -> Tuple[bool, list]:
     """
     List available font packages
 
+    Args:
+        max_age: Use the stored list without a request if it is younger
+            than this many seconds
+
     Returns:
         (success_flag, resources_list)
     """
     try:
         downloader = FontReleaseDownloader()
-        assets = downloader.list_available_fonts()
+        assets = downloader.list_available_fonts(max_age)
         if assets:
             return True, assets
         else:
@@ -305,6 +546,21 @@ def list_available_fonts() -> Tuple[bool, list]:
         return False, []
 
 
+def list_cached_fonts() -> Tuple[list, bool]:
+    """
+    List the last known font packages instantly, without network I/O
+
+    Returns:
+        (resources_list, fresh_flag) - revalidate with list_available_fonts()
+        when fresh_flag is False
+    """
+    try:
+        return FontReleaseDownloader().list_cached_fonts()
+    except Exception as e:
+        print(f"Warning: Failed to read cached font list: {e}")
+        return [], False
+
+
 def get_fonts_release_info() -> Dict:
     """Get font Release information"""
     try:
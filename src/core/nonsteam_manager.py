@@ -5,34 +5,152 @@ Non-Steam game management module
 import os
 from typing import List, Dict, Any, Tuple, Optional
 from src.config import Config
+from src.utils import vdf
+
+
+class CompatTool:
+    """Steam compatibility tool (Proton build)"""
+
+    def __init__(self, name: str, display_name: str, path: str):
+        self.name = name  # Internal name used by Steam's CompatToolMapping
+        self.display_name = display_name
+        self.path = path  # Tool install directory
+
+    def __repr__(self) -> str:
+        return f"{self.display_name} ({self.name})"
 
 
 class NonSteamManager:
     """Manager for non-Steam games"""
 
+    # Discovered tools: (directory mtimes key, tools)
+    _compat_cache: Optional[Tuple[Tuple, List[CompatTool]]] = None
+
     @staticmethod
-    def get_compatibility_layers() -> List[str]:
-        """Get list of available Steam compatibility layers"""
-        steam_root = os.path.join(Config._get_home_dir(), ".steam", "root")
-        compat_dir = os.path.join(steam_root, "compatibilitytools.d")
+    def _get_compat_tool_dirs() -> List[str]:
+        """Get directories that may contain custom compatibility tools"""
+        steam_root = Config.get_steam_root()
+        candidates = [
+            os.path.join(steam_root, "compatibilitytools.d"),
+            os.path.join(Config._get_home_dir(), ".local/share/Steam/compatibilitytools.d"),
+            "/usr/share/steam/compatibilitytools.d",
+        ]
+        dirs = []
+        seen = set()
+        for path in candidates:
+            real = os.path.realpath(path)
+            if real not in seen and os.path.isdir(path):
+                seen.add(real)
+                dirs.append(path)
+        return dirs
 
-        layers = []
-        if os.path.exists(compat_dir):
+    @staticmethod
+    def _read_custom_tools(tools_dir: str) -> List[CompatTool]:
+        """Read tools from compatibilitytool.vdf manifests in a tools directory"""
+        tools = []
+        for entry in os.scandir(tools_dir):
+            if not entry.is_dir():
+                continue
+            manifest = os.path.join(entry.path, "compatibilitytool.vdf")
+            if not os.path.isfile(manifest):
+                continue
             try:
-                for item in os.listdir(compat_dir):
-                    item_path = os.path.join(compat_dir, item)
-                    if os.path.isdir(item_path):
-                        layers.append(item)
-            except Exception:
+                data = vdf.find_key(vdf.load(manifest), "compatibilitytools", {})
+                for name, info in vdf.find_key(data, "compat_tools", {}).items():
+                    if not isinstance(info, dict):
+                        continue
+                    install_path = vdf.find_key(info, "install_path", ".")
+                    tools.append(
+                        CompatTool(
+                            name=name,
+                            display_name=vdf.find_key(info, "display_name", name),
+                            path=os.path.normpath(os.path.join(entry.path, install_path)),
+                        )
+                    )
+            except Exception as e:
+                print(f"Warning: Failed to read {manifest}: {e}")
+        return tools
+
+    @staticmethod
+    def _read_valve_tools(common_dir: str) -> List[CompatTool]:
+        """Find Valve Proton builds installed under steamapps/common"""
+        tools = []
+        for entry in os.scandir(common_dir):
+            if not entry.name.startswith("Proton") or not entry.is_dir():
+                continue
+            if not os.path.isfile(os.path.join(entry.path, "proton")):
+                continue
+            # "Proton 9.0" -> proton_9, "Proton 5.13" -> proton_513,
+            # "Proton - Experimental" -> proton_experimental
+            suffix = entry.name[len("Proton"):].strip(" -").lower()
+            major, _, minor = suffix.partition(".")
+            if major.isdigit():
+                suffix = major if minor in ("", "0") else major + minor
+            name = f"proton_{suffix.replace(' ', '_')}" if suffix else "proton"
+            tools.append(CompatTool(name=name, display_name=entry.name, path=entry.path))
+        return tools
+
+    @staticmethod
+    def get_compatibility_tools() -> List[CompatTool]:
+        """
+        Get installed Steam compatibility tools
+
+        Custom tools are read from their compatibilitytool.vdf manifests and
+        Valve Proton builds are found in every library's steamapps/common.
+        The result is cached until one of the scanned directories changes,
+        so repeated calls only cost a few stats.
+        """
+        from src.core.steam_manager import SteamManager
+
+        tool_dirs = NonSteamManager._get_compat_tool_dirs()
+        common_dirs = [
+            os.path.join(library, "steamapps", "common")
+            for library in SteamManager.get_library_dirs()
+        ]
+
+        stamps = []
+        for path in tool_dirs + common_dirs:
+            try:
+                stamps.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
                 pass
+        key = tuple(stamps)
 
-        # Add built-in layers if not already present
-        builtin_layers = ["Steam Linux Runtime", "Proton Experimental"]
-        for layer in builtin_layers:
-            if layer not in layers:
-                layers.append(layer)
+        cached = NonSteamManager._compat_cache
+        if cached is not None and cached[0] == key:
+            return list(cached[1])
 
-        return sorted(layers)
+        tools: List[CompatTool] = []
+        for path, _ in key:
+            try:
+                if path in tool_dirs:
+                    tools.extend(NonSteamManager._read_custom_tools(path))
+                else:
+                    tools.extend(NonSteamManager._read_valve_tools(path))
+            except OSError as e:
+                print(f"Warning: Failed to scan {path}: {e}")
+
+        # First occurrence wins when the same tool is installed twice
+        unique: Dict[str, CompatTool] = {}
+        for tool in tools:
+            unique.setdefault(tool.name, tool)
+        tools = sorted(unique.values(), key=lambda t: t.display_name.lower())
+
+        NonSteamManager._compat_cache = (key, tools)
+        return list(tools)
+
+    @staticmethod
+    def find_compatibility_tool(layer: str) -> Optional[CompatTool]:
+        """Find an installed tool by internal or display name"""
+        for tool in NonSteamManager.get_compatibility_tools():
+            if layer in (tool.name, tool.display_name):
+                return tool
+        return None
+
+    @staticmethod
+    def get_compatibility_layers() -> List[str]:
+        """Get display names of available Steam compatibility layers"""
+        return [tool.display_name for tool in NonSteamManager.get_compatibility_tools()]
 
     @staticmethod
     def add_game(
@@ -74,6 +192,37 @@ class NonSteamManager:
                 return True, "Game updated successfully"
         return False, f"Game not found: {name}"
 
+    @staticmethod
+    def remove_game(name: str) -> Tuple[bool, str]:
+        """Remove a managed game (its Steam shortcut is removed on next sync)"""
+        result = {"found": False}
+
+        def remove(data: Dict[str, Any]):
+            games = []
+            for game in data.get("managed_games", []):
+                if game.get("name") != name:
+                    games.append(game)
+                    continue
+                result["found"] = True
+                synced = game.get("steam_sync")
+                if synced:
+                    data.setdefault("removed_shortcuts", []).append(synced["appid"])
+                    # Names the prefix left behind when offering to clean it up
+                    data.setdefault("removed_names", {})[str(synced["appid"])] = name
+            data["managed_games"] = games
+
+        Config.update_section(Config.SECTION_GAMES, remove)
+        if result["found"]:
+            return True, "Game removed successfully"
+        return False, f"Game not found: {name}"
+
+    @staticmethod
+    def sync_with_steam() -> Tuple[bool, str]:
+        """Two-way sync of managed games with Steam shortcuts"""
+        from src.core.shortcut_sync import ShortcutSync
+
+        return ShortcutSync.sync()
+
     @staticmethod
     def get_steam_shortcut_command(game: Dict[str, Any]) -> str:
         """Generate Steam shortcut command for the game"""
@@ -83,7 +232,11 @@ class NonSteamManager:
         launch_options = game.get("properties", {}).get("launch_options", "")
 
         # Basic Proton command
-        if "Proton" in compat_layer:
+        tool = NonSteamManager.find_compatibility_tool(compat_layer)
+        if tool is not None:
+            proton_path = os.path.join(tool.path, "proton")
+            cmd = f'"{proton_path}" run "{exe_path}"'
+        elif "Proton" in compat_layer:
             proton_path = f"~/.steam/root/compatibilitytools.d/{compat_layer}/proton"
             cmd = f'"{proton_path}" run "{exe_path}"'
         else:
@@ -0,0 +1,65 @@
+"""
+Proton prefix (compatdata) management
+"""
+
+from .common import get_prefixes, get_pfx_path, get_running_prefixes, is_immutable_file
+from .template import PrefixTemplateManager, clone_tree, reflink_file
+from .dedup import PrefixDeduplicator, DedupReport
+from .fonts import (
+    FontFace,
+    PrefixFontLinker,
+    find_substitute_font,
+    link_fonts_to_prefixes,
+    read_font_face,
+)
+from .registry import (
+    WineRegistryFile,
+    apply_font_substitutes,
+    apply_registry_edits,
+    build_font_edits,
+)
+from .codepage import apply_codepage_profile, read_codepage, set_prefix_codepages
+from .backup import SaveBackupManager, BackupResult, backup_saves, chunk_data, restore_saves
+from .orphans import (
+    OrphanedPrefix,
+    PrefixSizeScanner,
+    delete_prefixes,
+    find_orphaned_prefixes,
+    get_known_app_names,
+    get_owned_appids,
+)
+
+__all__ = [
+    "get_prefixes",
+    "get_pfx_path",
+    "get_running_prefixes",
+    "is_immutable_file",
+    "PrefixTemplateManager",
+    "clone_tree",
+    "reflink_file",
+    "PrefixDeduplicator",
+    "DedupReport",
+    "FontFace",
+    "PrefixFontLinker",
+    "find_substitute_font",
+    "link_fonts_to_prefixes",
+    "read_font_face",
+    "WineRegistryFile",
+    "apply_font_substitutes",
+    "apply_registry_edits",
+    "build_font_edits",
+    "apply_codepage_profile",
+    "read_codepage",
+    "set_prefix_codepages",
+    "OrphanedPrefix",
+    "PrefixSizeScanner",
+    "delete_prefixes",
+    "find_orphaned_prefixes",
+    "get_known_app_names",
+    "get_owned_appids",
+    "SaveBackupManager",
+    "BackupResult",
+    "backup_saves",
+    "chunk_data",
+    "restore_saves",
+]
@@ -0,0 +1,336 @@
+"""
+Incremental save-data backup - files under a prefix's user profile are
+split into content-defined chunks stored once in a shared chunk store
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.utils import get_data_dir
+from .common import get_prefixes, get_pfx_path
+
+# Wine user profile inside the prefix
+PROFILE_SUBDIR = os.path.join("drive_c", "users", "steamuser")
+
+# Profile folders games write saves to
+SAVE_DIRS = ("AppData", "Documents", "Saved Games")
+
+# Folders under the save dirs that hold Wine/Windows state rather than saves
+EXCLUDED_DIRS = ("Microsoft", "Temp", "Wine Mono", "wine_gecko")
+
+# Content-defined chunking: cut where the rolling hash has its low bits zero
+MIN_CHUNK = 2 * 1024
+AVG_CHUNK_BITS = 13  # ~8 KB average
+MAX_CHUNK = 64 * 1024
+
+_CUT_MASK = (1 << AVG_CHUNK_BITS) - 1
+
+# Fixed gear table so chunk boundaries are stable across runs
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "little") for i in range(256)]
+# The cut test only sees the hash's low bits, and those only depend on the
+# low bits of each term, so the hash is kept at AVG_CHUNK_BITS bits
+_GEAR_CUT = [value & _CUT_MASK for value in _GEAR]
+
+
+def chunk_data(data: bytes) -> Iterator[bytes]:
+    """
+    Split data into content-defined chunks with a gear rolling hash
+
+    An insertion only changes the chunks around it, so edited saves
+    mostly reuse chunks already in the store.
+    """
+    length = len(data)
+    start = 0
+    view = memoryview(data)
+    gear = _GEAR_CUT
+    mask = _CUT_MASK
+    while start < length:
+        if length - start <= MIN_CHUNK:
+            yield data[start:]
+            return
+        end = min(start + MAX_CHUNK, length)
+        cut = end
+        h = 0
+        # No boundary within MIN_CHUNK of the last one, so those bytes are skipped
+        for i, byte in enumerate(view[start + MIN_CHUNK : end], start + MIN_CHUNK + 1):
+            h = ((h << 1) + gear[byte]) & mask
+            if not h:
+                cut = i
+                break
+        yield data[start:cut]
+        start = cut
+
+
+class BackupResult:
+    """Result of backing up one prefix"""
+
+    def __init__(self, appid: str):
+        self.appid = appid
+        self.backup_id: Optional[str] = None
+        self.files = 0
+        self.files_reused = 0
+        self.chunks_written = 0
+        self.bytes_written = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.appid}: {self.files} file(s), {self.files_reused} unchanged, "
+            f"{self.chunks_written} new chunk(s), {self.bytes_written} bytes stored"
+        )
+
+
+class SaveBackupManager:
+    """
+    Chunk store and per-game manifests under ~/.local/share/.../save_backups
+
+    Layout:
+        chunks/<id[:2]>/<sha256>      zlib-compressed chunk data
+        manifests/<appid>/<id>.json   {"files": {relpath: {size, mtime_ns, chunks}}}
+
+    Files whose size and mtime match the previous manifest reuse its chunk
+    list without being read.
+    """
+
+    BACKUPS_DIR_NAME = "save_backups"
+
+    def __init__(self, root: Optional[str] = None, max_workers: int = 4):
+        self.root = root or os.path.join(get_data_dir(), self.BACKUPS_DIR_NAME)
+        self.max_workers = max_workers
+
+    def _chunk_path(self, chunk_id: str) -> str:
+        """Get the store path of a chunk"""
+        return os.path.join(self.root, "chunks", chunk_id[:2], chunk_id)
+
+    def _manifest_dir(self, appid: str) -> str:
+        """Get the manifest directory of a game"""
+        return os.path.join(self.root, "manifests", appid)
+
+    def _store_chunk(self, data: bytes) -> Tuple[str, int]:
+        """
+        Store a chunk unless already present
+
+        Returns:
+            (chunk id, bytes written)
+        """
+        chunk_id = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(chunk_id)
+        if os.path.exists(path):
+            return chunk_id, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        packed = zlib.compress(data, 6)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(packed)
+        os.replace(tmp_path, path)
+        return chunk_id, len(packed)
+
+    def _load_chunk(self, chunk_id: str) -> bytes:
+        """Read and verify a chunk"""
+        with open(self._chunk_path(chunk_id), "rb") as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != chunk_id:
+            raise IOError(f"Corrupt chunk {chunk_id}")
+        return data
+
+    @staticmethod
+    def get_save_files(compatdata_path: str) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield (path relative to the user profile, stat) of save files"""
+        profile = os.path.join(get_pfx_path(compatdata_path), PROFILE_SUBDIR)
+        stack = [os.path.join(profile, name) for name in SAVE_DIRS]
+        while stack:
+            path = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in EXCLUDED_DIRS:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            rel_path = os.path.relpath(entry.path, profile)
+                            yield rel_path, entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+
+    def list_games(self) -> List[str]:
+        """Get app IDs that have at least one backup"""
+        try:
+            appids = os.listdir(os.path.join(self.root, "manifests"))
+        except OSError:
+            return []
+        return sorted(appid for appid in appids if self.list_backups(appid))
+
+    def list_backups(self, appid: str) -> List[str]:
+        """Get backup IDs of a game, oldest first"""
+        try:
+            names = os.listdir(self._manifest_dir(appid))
+        except OSError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json"))
+
+    def load_manifest(self, appid: str, backup_id: Optional[str] = None) -> Optional[Dict]:
+        """Load a backup manifest (latest by default), None if there is none"""
+        if backup_id is None:
+            backups = self.list_backups(appid)
+            if not backups:
+                return None
+            backup_id = backups[-1]
+        try:
+            with open(os.path.join(self._manifest_dir(appid), f"{backup_id}.json"), "r") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def backup(self, compatdata_path: str) -> BackupResult:
+        """
+        Back up the save files of one prefix
+
+        A new manifest is written only when something changed.
+
+        Args:
+            compatdata_path: compatdata/<appid> directory
+
+        Returns:
+            Backup result
+        """
+        appid = os.path.basename(os.path.normpath(compatdata_path))
+        result = BackupResult(appid)
+        previous = (self.load_manifest(appid) or {}).get("files", {})
+        profile = os.path.join(get_pfx_path(compatdata_path), PROFILE_SUBDIR)
+
+        files: Dict[str, Dict] = {}
+        for rel_path, st in self.get_save_files(compatdata_path):
+            result.files += 1
+            old = previous.get(rel_path)
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                files[rel_path] = old
+                result.files_reused += 1
+                continue
+
+            with open(os.path.join(profile, rel_path), "rb") as f:
+                data = f.read()
+            chunks = []
+            for chunk in chunk_data(data):
+                chunk_id, written = self._store_chunk(chunk)
+                chunks.append(chunk_id)
+                if written:
+                    result.chunks_written += 1
+                    result.bytes_written += written
+            files[rel_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "chunks": chunks}
+
+        if files == previous:
+            return result
+
+        now_ns = time.time_ns()
+        result.backup_id = time.strftime(
+            "%Y%m%d-%H%M%S", time.localtime(now_ns // 1_000_000_000)
+        ) + f"-{now_ns // 1000 % 1_000_000:06d}"
+        manifest_dir = self._manifest_dir(appid)
+        os.makedirs(manifest_dir, exist_ok=True)
+        tmp_path = os.path.join(manifest_dir, f"{result.backup_id}.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"appid": appid, "created": time.time(), "files": files}, f)
+        os.replace(tmp_path, os.path.join(manifest_dir, f"{result.backup_id}.json"))
+        return result
+
+    def backup_all(self, prefixes: Optional[List[str]] = None) -> List[BackupResult]:
+        """
+        Back up many prefixes in parallel
+
+        Args:
+            prefixes: compatdata/<appid> directories (defaults to all prefixes)
+        """
+        if prefixes is None:
+            prefixes = get_prefixes()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self.backup, prefixes))
+
+    def restore(
+        self,
+        compatdata_path: str,
+        backup_id: Optional[str] = None,
+        files: Optional[List[str]] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Restore the saves of one game
+
+        Args:
+            compatdata_path: compatdata/<appid> directory to restore into
+            backup_id: Backup to restore (latest by default)
+            files: Only restore these profile-relative paths
+
+        Returns:
+            (success, message)
+        """
+        appid = os.path.basename(os.path.normpath(compatdata_path))
+        manifest = self.load_manifest(appid, backup_id)
+        if manifest is None:
+            return False, f"ERROR: No backup found for {appid}"
+
+        profile = os.path.join(get_pfx_path(compatdata_path), PROFILE_SUBDIR)
+        restored = 0
+        try:
+            for rel_path, entry in manifest["files"].items():
+                if files is not None and rel_path not in files:
+                    continue
+                target = os.path.join(profile, rel_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tmp_path = f"{target}.restore-tmp"
+                with open(tmp_path, "wb") as f:
+                    for chunk_id in entry["chunks"]:
+                        f.write(self._load_chunk(chunk_id))
+                os.replace(tmp_path, target)
+                os.utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+                restored += 1
+        except Exception as e:
+            return False, f"ERROR: Failed to restore saves: {e}"
+        return True, f"SUCCESS: Restored {restored} save file(s) for {appid}"
+
+
+def backup_saves(
+    prefixes: Optional[List[str]] = None, backups: Optional[SaveBackupManager] = None
+) -> Tuple[bool, str]:
+    """
+    Convenience function to back up the saves of Proton prefixes
+
+    Args:
+        prefixes: compatdata/<appid> directories (defaults to all prefixes)
+        backups: Backup store (the default one if omitted)
+
+    Returns:
+        (success_flag, detailed_message)
+    """
+    try:
+        results = (backups or SaveBackupManager()).backup_all(prefixes)
+    except Exception as e:
+        return False, f"ERROR: Failed to back up saves: {e}"
+    changed = [result for result in results if result.backup_id]
+    stored_kb = sum(result.bytes_written for result in results) / 1024
+    return True, (
+        f"SUCCESS: Backed up {len(changed)} prefix(es), "
+        f"{len(results) - len(changed)} unchanged ({stored_kb:.0f} KB stored)"
+    )
+
+
+def restore_saves(
+    appid: str, backup_id: Optional[str] = None, backups: Optional[SaveBackupManager] = None
+) -> Tuple[bool, str]:
+    """
+    Convenience function to restore a game's saves into its current prefix
+
+    Args:
+        appid: App ID the backup was made for
+        backup_id: Backup to restore (latest by default)
+        backups: Backup store (the default one if omitted)
+
+    Returns:
+        (success_flag, detailed_message)
+    """
+    for prefix in get_prefixes():
+        if os.path.basename(prefix) == appid:
+            return (backups or SaveBackupManager()).restore(prefix, backup_id)
+    return False, f"ERROR: No prefix for {appid}, launch the game once to create it"
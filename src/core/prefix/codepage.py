@@ -0,0 +1,116 @@
+"""
+Codepage profiles - set a prefix's ANSI/OEM codepage (Nls\\CodePage) so
+non-Unicode games read Shift-JIS / GBK text correctly
+"""
+
+import mmap
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from src.config import TargetLanguage
+from .common import get_prefixes, get_pfx_path, get_running_prefixes
+from .registry import SYSTEM_REG, WineRegistryFile
+
+CODEPAGE_KEY = "System\\CurrentControlSet\\Control\\Nls\\CodePage"
+
+CODEPAGE_VALUES = ("ACP", "OEMCP")
+
+# Header line of the key block as stored in system.reg (backslashes doubled)
+_KEY_HEADER = re.compile(
+    b"^\\[" + re.escape(CODEPAGE_KEY.replace("\\", "\\\\").encode("ascii")) + b"\\]",
+    re.IGNORECASE | re.MULTILINE,
+)
+_VALUE_LINE = re.compile(b'^"(ACP|OEMCP)"="([^"]*)"', re.IGNORECASE | re.MULTILINE)
+
+
+def read_codepage(system_reg: str) -> Dict[str, str]:
+    """
+    Read ACP/OEMCP from system.reg with a targeted scan of the mapped file
+
+    Only the CodePage key block is looked at; nothing else is parsed.
+
+    Returns:
+        {"ACP": ..., "OEMCP": ...} for the values present
+    """
+    with open(system_reg, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            header = _KEY_HEADER.search(data)
+            if header is None:
+                return {}
+            end = data.find(b"\n[", header.end())
+            block = data[header.end() : end if end != -1 else len(data)]
+    return {
+        match.group(1).decode("ascii").upper(): match.group(2).decode("ascii")
+        for match in _VALUE_LINE.finditer(block)
+    }
+
+
+def apply_codepage(compatdata_path: str, codepage: str) -> Tuple[str, str]:
+    """
+    Set one prefix's codepage
+
+    Returns:
+        (status, message), status is "updated", "skipped" or "failed"
+    """
+    system_reg = os.path.join(get_pfx_path(compatdata_path), SYSTEM_REG)
+    try:
+        current = read_codepage(system_reg)
+        if all(current.get(name) == codepage for name in CODEPAGE_VALUES):
+            return "skipped", compatdata_path
+        WineRegistryFile(system_reg).apply(
+            {CODEPAGE_KEY: {name: codepage for name in CODEPAGE_VALUES}}
+        )
+        return "updated", f"{compatdata_path}: codepage {codepage}"
+    except OSError as e:
+        return "failed", f"{compatdata_path}: {e}"
+
+
+def apply_codepage_profile(
+    lang: str, prefixes: Optional[List[str]] = None, max_workers: int = 8
+) -> Dict[str, List[str]]:
+    """
+    Apply the codepage of a target language to many prefixes in parallel
+
+    Args:
+        lang: Target language (TargetLanguage.CHINESE / JAPANESE)
+        prefixes: compatdata/<appid> directories (defaults to all prefixes)
+        max_workers: Parallel prefixes
+
+    Returns:
+        {"updated": [...], "skipped": [...], "failed": [...]} messages
+    """
+    if prefixes is None:
+        prefixes = get_prefixes()
+    codepage = TargetLanguage.get_codepage(lang)
+    running = get_running_prefixes()
+
+    def apply_prefix(compatdata_path: str) -> Tuple[str, str]:
+        if os.path.realpath(compatdata_path) in running:
+            return "failed", f"{compatdata_path}: prefix is in use, retry after the game exits"
+        return apply_codepage(compatdata_path, codepage)
+
+    results: Dict[str, List[str]] = {"updated": [], "skipped": [], "failed": []}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for status, message in pool.map(apply_prefix, prefixes):
+            results[status].append(message)
+    return results
+
+
+def set_prefix_codepages(lang: str, prefixes: Optional[List[str]] = None) -> Tuple[bool, str]:
+    """
+    Convenience function to apply a language's codepage to Proton prefixes
+
+    Returns:
+        (success_flag, detailed_message)
+    """
+    results = apply_codepage_profile(lang, prefixes)
+    message = (
+        f"Codepage {TargetLanguage.get_codepage(lang)} set in {len(results['updated'])} "
+        f"prefix(es), {len(results['skipped'])} already set"
+    )
+    if results["failed"]:
+        return False, "ERROR: " + message + "\n" + "\n".join(results["failed"])
+    return True, "SUCCESS: " + message
@@ -0,0 +1,75 @@
+"""
+Shared helpers for Proton prefixes (compatdata/<appid>)
+"""
+
+import os
+from typing import List, Set
+from src.core.steam_manager import SteamManager
+
+# Wine prefix directory inside compatdata/<appid>
+PFX_DIR = "pfx"
+
+# Files Wine never modifies in place once installed (safe to share between prefixes)
+IMMUTABLE_EXTENSIONS = (
+    ".dll", ".exe", ".sys", ".drv", ".ocx", ".cpl", ".acm", ".ax", ".tlb",
+    ".nls", ".mui", ".com", ".vxd", ".msi", ".ttf", ".ttc", ".otf", ".fon",
+)
+
+
+def is_immutable_file(name: str) -> bool:
+    """Check if a prefix file is an installed binary/font that Wine treats as read-only"""
+    return name.lower().endswith(IMMUTABLE_EXTENSIONS)
+
+
+def get_pfx_path(compatdata_path: str) -> str:
+    """Get the Wine prefix inside a compatdata/<appid> directory"""
+    return os.path.join(compatdata_path, PFX_DIR)
+
+
+def get_prefixes() -> List[str]:
+    """
+    Get all initialized Proton prefixes
+
+    Returns:
+        compatdata/<appid> directories (across all libraries) that contain a pfx
+    """
+    prefixes = []
+    for compatdata_dir in SteamManager.get_compatdata_dirs():
+        try:
+            for entry in os.scandir(compatdata_dir):
+                if entry.is_dir() and os.path.isdir(get_pfx_path(entry.path)):
+                    prefixes.append(entry.path)
+        except OSError as e:
+            print(f"Warning: Failed to scan {compatdata_dir}: {e}")
+    return sorted(prefixes)
+
+
+def get_running_prefixes() -> Set[str]:
+    """
+    Get prefixes a running Wine process uses
+
+    Read from the environment of this user's processes (WINEPREFIX and
+    STEAM_COMPAT_DATA_PATH), so Proton games and wineserver are both seen.
+
+    Returns:
+        Real paths of compatdata/<appid> directories
+    """
+    running = set()
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return running
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/environ", "rb") as f:
+                environ = f.read().split(b"\0")
+        except OSError:
+            continue
+        for entry in environ:
+            if entry.startswith(b"STEAM_COMPAT_DATA_PATH="):
+                running.add(os.path.realpath(os.fsdecode(entry.split(b"=", 1)[1])))
+            elif entry.startswith(b"WINEPREFIX="):
+                pfx = os.path.realpath(os.fsdecode(entry.split(b"=", 1)[1]))
+                if os.path.basename(pfx) == PFX_DIR:
+                    running.add(os.path.dirname(pfx))
+    return running
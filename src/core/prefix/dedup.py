@@ -0,0 +1,252 @@
+"""
+Content-hash deduplication of immutable files across Proton prefixes
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.utils import get_cache_dir
+from .common import get_prefixes, get_pfx_path, is_immutable_file
+
+# Only files below drive_c/windows hold the shared system DLLs and fonts
+SCAN_SUBDIR = os.path.join("drive_c", "windows")
+
+# Smaller files are not worth a hash (and save less than an inode)
+MIN_FILE_SIZE = 4096
+
+# Sampled hash reads this many bytes at the start, middle and end
+SAMPLE_BLOCK = 16 * 1024
+
+READ_BLOCK = 1024 * 1024
+
+
+class FileRecord:
+    """Regular file found during the prefix walk"""
+
+    __slots__ = ("path", "size", "dev", "ino", "mtime_ns", "nlink")
+
+    def __init__(self, path: str, st: os.stat_result):
+        self.path = path
+        self.size = st.st_size
+        self.dev = st.st_dev
+        self.ino = st.st_ino
+        self.mtime_ns = st.st_mtime_ns
+        self.nlink = st.st_nlink
+
+    @property
+    def cache_key(self) -> str:
+        """Identity of the underlying inode"""
+        return f"{self.dev}:{self.ino}"
+
+
+class DedupReport:
+    """Result of a deduplication run"""
+
+    def __init__(self):
+        self.files_scanned = 0
+        self.files_hashed = 0
+        self.files_linked = 0
+        self.bytes_reclaimed = 0
+        self.errors: List[str] = []
+
+    def get_reclaimed_mb(self) -> float:
+        """Get reclaimed space in MB"""
+        return self.bytes_reclaimed / (1024 * 1024)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.files_linked} file(s) linked, {self.get_reclaimed_mb():.1f} MB reclaimed "
+            f"({self.files_scanned} scanned, {self.files_hashed} hashed)"
+        )
+
+
+def _walk_files(root: str) -> Iterator[FileRecord]:
+    """Yield immutable regular files below root using os.scandir"""
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) and is_immutable_file(entry.name):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_size >= MIN_FILE_SIZE:
+                            yield FileRecord(entry.path, st)
+        except OSError:
+            continue
+
+
+def _sample_hash(path: str, size: int) -> str:
+    """Hash the first, middle and last blocks of a file"""
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        for offset in (0, max(0, size // 2 - SAMPLE_BLOCK // 2), max(0, size - SAMPLE_BLOCK)):
+            f.seek(offset)
+            digest.update(f.read(SAMPLE_BLOCK))
+    return digest.hexdigest()
+
+
+def _full_hash(path: str) -> str:
+    """SHA-256 of the whole file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PrefixDeduplicator:
+    """
+    Replaces identical immutable files across prefixes with hardlinks
+
+    Candidates are grouped by (device, size) first; only groups with more
+    than one distinct inode are hashed, with a cheap sampled hash before the
+    full SHA-256. Hashes are cached by (device, inode) and reused while the
+    file's mtime and size are unchanged, so re-runs only hash new files.
+    """
+
+    CACHE_FILE_NAME = "dedup_hashes.json"
+
+    def __init__(self, max_workers: int = 4, cache_file: Optional[str] = None):
+        self.max_workers = max_workers
+        self.cache_file = cache_file or os.path.join(get_cache_dir(), self.CACHE_FILE_NAME)
+        self._cache: Dict[str, Dict] = {}
+
+    def _load_cache(self):
+        """Load the persisted hash cache"""
+        try:
+            with open(self.cache_file, "r") as f:
+                self._cache = json.load(f)
+        except Exception:
+            self._cache = {}
+
+    def _save_cache(self):
+        """Persist the hash cache"""
+        try:
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._cache, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"Warning: Failed to save dedup cache: {e}")
+
+    def _cached(self, record: FileRecord, kind: str) -> Optional[str]:
+        """Get a cached value for a file, None if missing or the file changed"""
+        entry = self._cache.get(record.cache_key)
+        if entry and entry["mtime_ns"] == record.mtime_ns and entry["size"] == record.size:
+            return entry.get(kind)
+        return None
+
+    def _hash(
+        self, records: List[FileRecord], kind: str, report: DedupReport
+    ) -> Dict[str, List[FileRecord]]:
+        """Group records by sampled or full hash, hashing each inode once in parallel"""
+        by_inode: Dict[str, List[FileRecord]] = {}
+        for record in records:
+            by_inode.setdefault(record.cache_key, []).append(record)
+
+        todo = [group[0] for group in by_inode.values() if self._cached(group[0], kind) is None]
+
+        def compute(record: FileRecord) -> Tuple[FileRecord, Optional[str]]:
+            try:
+                if kind == "sample":
+                    return record, _sample_hash(record.path, record.size)
+                return record, _full_hash(record.path)
+            except OSError as e:
+                report.errors.append(f"{record.path}: {e}")
+                return record, None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for record, value in pool.map(compute, todo):
+                if value is None:
+                    continue
+                if kind == "full":
+                    report.files_hashed += 1
+                entry = self._cache.get(record.cache_key)
+                if not entry or (entry["mtime_ns"], entry["size"]) != (
+                    record.mtime_ns,
+                    record.size,
+                ):
+                    entry = {"mtime_ns": record.mtime_ns, "size": record.size}
+                    self._cache[record.cache_key] = entry
+                entry[kind] = value
+
+        groups: Dict[str, List[FileRecord]] = {}
+        for group in by_inode.values():
+            value = self._cached(group[0], kind)
+            if value is not None:
+                groups.setdefault(value, []).extend(group)
+        return groups
+
+    def _link_group(self, records: List[FileRecord], dry_run: bool, report: DedupReport):
+        """Point every path of an identical-content group at one inode"""
+        inodes: Dict[str, List[FileRecord]] = {}
+        for record in records:
+            inodes.setdefault(record.cache_key, []).append(record)
+        if len(inodes) < 2:
+            return
+
+        # Keep the inode that already has the most links
+        keep = max(inodes.values(), key=lambda group: group[0].nlink)[0]
+        for key, group in inodes.items():
+            if key == keep.cache_key:
+                continue
+            for record in group:
+                if not dry_run:
+                    tmp_path = f"{record.path}.dedup-tmp"
+                    try:
+                        os.link(keep.path, tmp_path)
+                        os.replace(tmp_path, record.path)
+                    except OSError as e:
+                        report.errors.append(f"{record.path}: {e}")
+                        if os.path.lexists(tmp_path):
+                            os.unlink(tmp_path)
+                        continue
+                report.files_linked += 1
+            # Space comes back once every link to the old inode is replaced
+            if group[0].nlink <= len(group):
+                report.bytes_reclaimed += group[0].size
+
+    def deduplicate(
+        self, prefixes: Optional[List[str]] = None, dry_run: bool = False
+    ) -> DedupReport:
+        """
+        Deduplicate files across prefixes
+
+        Args:
+            prefixes: compatdata/<appid> directories (defaults to all prefixes)
+            dry_run: Only report what would be reclaimed
+
+        Returns:
+            Deduplication report
+        """
+        if prefixes is None:
+            prefixes = get_prefixes()
+        report = DedupReport()
+        self._load_cache()
+
+        seen = set()
+        by_size: Dict[Tuple[int, int], List[FileRecord]] = {}
+        for prefix in prefixes:
+            for record in _walk_files(os.path.join(get_pfx_path(prefix), SCAN_SUBDIR)):
+                report.files_scanned += 1
+                seen.add(record.cache_key)
+                by_size.setdefault((record.dev, record.size), []).append(record)
+
+        for records in by_size.values():
+            if len({record.ino for record in records}) < 2:
+                continue
+            for sampled in self._hash(records, "sample", report).values():
+                if len({record.ino for record in sampled}) < 2:
+                    continue
+                for identical in self._hash(sampled, "full", report).values():
+                    self._link_group(identical, dry_run, report)
+
+        # Forget inodes that no longer exist (e.g. replaced by links above)
+        self._cache = {key: entry for key, entry in self._cache.items() if key in seen}
+        self._save_cache()
+        return report
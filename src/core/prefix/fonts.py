@@ -0,0 +1,292 @@
+"""
+Shared CJK font store linked into every Proton prefix
+"""
+
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from src.config import Config, TargetLanguage
+from .common import get_prefixes, get_pfx_path
+
+# Font formats Wine's GDI can load
+PREFIX_FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Fonts directory inside a Wine prefix
+PREFIX_FONTS_SUBDIR = os.path.join("drive_c", "windows", "Fonts")
+
+# Per-prefix record of the links created from the store
+MANIFEST_NAME = ".galgame_fonts.json"
+
+
+# OS/2 ulCodePageRange1 bit of each target language's ANSI codepage
+CODEPAGE_RANGE_BITS = {
+    TargetLanguage.JAPANESE: 17,  # 932
+    TargetLanguage.CHINESE: 18,  # 936
+}
+
+# Windows platform, English (US) - the names Wine matches face requests on
+_NAME_PLATFORM_WINDOWS = 3
+_NAME_LANGUAGE_EN_US = 0x409
+_NAME_FAMILY = 1
+
+
+class FontFace:
+    """Family name, weight and codepage coverage of a font file"""
+
+    def __init__(self, family: str, weight: int, codepage_range: int):
+        self.family = family
+        self.weight = weight
+        self.codepage_range = codepage_range  # OS/2 ulCodePageRange1
+
+    def covers(self, lang: str) -> bool:
+        """Check if the font declares the language's ANSI codepage"""
+        bit = CODEPAGE_RANGE_BITS.get(lang)
+        return bit is not None and bool(self.codepage_range & (1 << bit))
+
+    def __repr__(self) -> str:
+        return f"FontFace({self.family}, {self.weight})"
+
+
+def read_font_face(path: str) -> Optional[FontFace]:
+    """
+    Read the name and OS/2 tables of a TrueType/OpenType font
+
+    Only the table directory and the two tables are read. For collections
+    (.ttc) the first font is used.
+
+    Returns:
+        Font face, None if the file is not a readable sfnt font
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(12)
+            offset = 0
+            if header[:4] == b"ttcf":
+                offset = struct.unpack(">I", f.read(4))[0]
+                f.seek(offset)
+                header = f.read(12)
+            if len(header) < 12:
+                return None
+            num_tables = struct.unpack(">H", header[4:6])[0]
+            tables = {}
+            directory = f.read(16 * num_tables)
+            for index in range(num_tables):
+                tag, _, table_offset, length = struct.unpack(
+                    ">4sIII", directory[index * 16 : index * 16 + 16]
+                )
+                tables[tag] = (table_offset, length)
+            if b"name" not in tables:
+                return None
+
+            f.seek(tables[b"name"][0])
+            name_table = f.read(tables[b"name"][1])
+            os2 = b""
+            if b"OS/2" in tables:
+                f.seek(tables[b"OS/2"][0])
+                os2 = f.read(tables[b"OS/2"][1])
+    except (OSError, struct.error):
+        return None
+
+    family = _read_family_name(name_table)
+    if not family:
+        return None
+    weight = struct.unpack(">H", os2[4:6])[0] if len(os2) >= 6 else 400
+    codepage_range = struct.unpack(">I", os2[78:82])[0] if len(os2) >= 82 else 0
+    return FontFace(family, weight, codepage_range)
+
+
+def _read_family_name(table: bytes) -> Optional[str]:
+    """Get the English Windows family name from a name table"""
+    try:
+        _, count, string_offset = struct.unpack(">HHH", table[:6])
+        fallback = None
+        for index in range(count):
+            platform, _, language, name_id, length, offset = struct.unpack(
+                ">HHHHHH", table[6 + index * 12 : 18 + index * 12]
+            )
+            if platform != _NAME_PLATFORM_WINDOWS or name_id != _NAME_FAMILY:
+                continue
+            start = string_offset + offset
+            name = table[start : start + length].decode("utf-16-be", errors="replace")
+            if language == _NAME_LANGUAGE_EN_US:
+                return name
+            fallback = fallback or name
+        return fallback
+    except struct.error:
+        return None
+
+
+def find_substitute_font(lang: str, store_dir: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """
+    Pick the installed font that stands in for a language's Windows fonts
+
+    Fonts declaring the language's codepage qualify; the one closest to
+    regular weight wins.
+
+    Returns:
+        (family name, file name), None if no installed font covers the language
+    """
+    store_dir = store_dir or Config.get_fonts_dir()
+    candidates = []
+    try:
+        names = sorted(os.listdir(store_dir))
+    except OSError:
+        return None
+    for name in names:
+        if not name.lower().endswith(PREFIX_FONT_EXTENSIONS):
+            continue
+        face = read_font_face(os.path.join(store_dir, name))
+        if face is not None and face.covers(lang):
+            candidates.append((abs(face.weight - 400), name, face.family))
+    if not candidates:
+        return None
+    _, name, family = min(candidates)
+    return family, name
+
+
+class PrefixFontLinker:
+    """
+    Links fonts from one shared store (~/.fonts by default) into each
+    prefix's drive_c/windows/Fonts instead of copying them
+
+    Every prefix keeps a manifest with a hash of the store contents; prefixes
+    whose manifest matches the current store are skipped.
+    """
+
+    MODE_SYMLINK = "symlink"
+    MODE_HARDLINK = "hardlink"
+
+    def __init__(
+        self, store_dir: Optional[str] = None, mode: str = MODE_SYMLINK, max_workers: int = 4
+    ):
+        self.store_dir = store_dir or Config.get_fonts_dir()
+        self.mode = mode
+        self.max_workers = max_workers
+
+    def get_store_fonts(self) -> Dict[str, os.stat_result]:
+        """Get font files in the store: name -> stat"""
+        fonts = {}
+        if not os.path.isdir(self.store_dir):
+            return fonts
+        for entry in os.scandir(self.store_dir):
+            if entry.name.lower().endswith(PREFIX_FONT_EXTENSIONS) and entry.is_file():
+                fonts[entry.name] = entry.stat()
+        return fonts
+
+    def get_store_hash(self, fonts: Dict[str, os.stat_result]) -> str:
+        """Hash of the store listing (names, sizes, mtimes) and link mode"""
+        digest = hashlib.sha256(f"{self.mode}:{self.store_dir}".encode("utf-8"))
+        for name in sorted(fonts):
+            st = fonts[name]
+            digest.update(f"\0{name}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _read_manifest(fonts_dir: str) -> Dict:
+        """Read a prefix's font manifest, empty if missing"""
+        try:
+            with open(os.path.join(fonts_dir, MANIFEST_NAME), "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _link(self, src: str, dst: str):
+        """Create one link, replacing a stale link of ours"""
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        if self.mode == self.MODE_HARDLINK:
+            os.link(src, dst)
+        else:
+            os.symlink(src, dst)
+
+    def _is_our_link(self, path: str, name: str, st: os.stat_result) -> bool:
+        """Check if a prefix font file already points at the store copy"""
+        try:
+            if self.mode == self.MODE_SYMLINK:
+                return os.readlink(path) == os.path.join(self.store_dir, name)
+            return os.stat(path).st_ino == st.st_ino
+        except OSError:
+            return False
+
+    def sync_prefix(
+        self, compatdata_path: str, fonts: Dict[str, os.stat_result], store_hash: str
+    ) -> Tuple[str, str]:
+        """
+        Bring one prefix's font links in line with the store
+
+        Returns:
+            (status, message), status is "updated", "skipped" or "failed"
+        """
+        fonts_dir = os.path.join(get_pfx_path(compatdata_path), PREFIX_FONTS_SUBDIR)
+        manifest = self._read_manifest(fonts_dir)
+        if manifest.get("hash") == store_hash:
+            return "skipped", compatdata_path
+
+        try:
+            os.makedirs(fonts_dir, exist_ok=True)
+            linked: List[str] = []
+            for name, st in fonts.items():
+                dst = os.path.join(fonts_dir, name)
+                ours = name in manifest.get("files", [])
+                if os.path.lexists(dst) and not ours:
+                    # Never replace fonts that shipped with the prefix
+                    continue
+                if not self._is_our_link(dst, name, st):
+                    self._link(os.path.join(self.store_dir, name), dst)
+                linked.append(name)
+
+            # Drop links to fonts that left the store
+            for name in manifest.get("files", []):
+                if name not in fonts and os.path.lexists(os.path.join(fonts_dir, name)):
+                    os.unlink(os.path.join(fonts_dir, name))
+
+            tmp_path = os.path.join(fonts_dir, f"{MANIFEST_NAME}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"hash": store_hash, "files": sorted(linked)}, f)
+            os.replace(tmp_path, os.path.join(fonts_dir, MANIFEST_NAME))
+            return "updated", f"{compatdata_path}: {len(linked)} font(s) linked"
+        except OSError as e:
+            return "failed", f"{compatdata_path}: {e}"
+
+    def apply(self, prefixes: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """
+        Link the store's fonts into prefixes in parallel
+
+        Args:
+            prefixes: compatdata/<appid> directories (defaults to all prefixes)
+
+        Returns:
+            {"updated": [...], "skipped": [...], "failed": [...]} messages
+        """
+        if prefixes is None:
+            prefixes = get_prefixes()
+        fonts = self.get_store_fonts()
+        store_hash = self.get_store_hash(fonts)
+
+        results: Dict[str, List[str]] = {"updated": [], "skipped": [], "failed": []}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for status, message in pool.map(
+                lambda prefix: self.sync_prefix(prefix, fonts, store_hash), prefixes
+            ):
+                results[status].append(message)
+        return results
+
+
+def link_fonts_to_prefixes(prefixes: Optional[List[str]] = None) -> Tuple[bool, str]:
+    """
+    Convenience function to link installed fonts into Proton prefixes
+
+    Returns:
+        (success_flag, detailed_message)
+    """
+    results = PrefixFontLinker().apply(prefixes)
+    message = (
+        f"Fonts linked into {len(results['updated'])} prefix(es), "
+        f"{len(results['skipped'])} already up to date"
+    )
+    if results["failed"]:
+        return False, "ERROR: " + message + "\n" + "\n".join(results["failed"])
+    return True, "SUCCESS: " + message
@@ -0,0 +1,292 @@
+"""
+Orphaned compatdata detection - prefixes left behind by removed shortcuts
+and uninstalled games
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from src.config import Config
+from src.core.steam_manager import SteamManager
+from src.utils import get_cache_dir
+from .backup import SaveBackupManager
+
+# compatdata/0 is shared by Steam itself
+RESERVED_APPIDS = {0}
+
+# Run deletions at idle I/O and lowest CPU priority when available
+LOW_PRIORITY_PREFIX = ["ionice", "-c3", "nice", "-n19"]
+
+
+class OrphanedPrefix:
+    """compatdata/<appid> directory without a shortcut or installed app"""
+
+    def __init__(self, appid: int, path: str, size: int, name: str = ""):
+        self.appid = appid
+        self.path = path
+        self.size = size
+        self.name = name  # Game name if known, "" otherwise
+
+    def get_size_mb(self) -> float:
+        """Get size in MB"""
+        return self.size / (1024 * 1024)
+
+    def __repr__(self) -> str:
+        return f"OrphanedPrefix({self.appid}, {self.get_size_mb():.1f} MB)"
+
+
+def get_owned_appids() -> Set[int]:
+    """
+    Get app IDs that legitimately own a compatdata directory
+
+    Returns:
+        32-bit app IDs of every user's shortcuts plus installed Steam apps
+
+    Raises:
+        OSError: A shortcuts.vdf exists but cannot be read; its prefixes
+            would all look orphaned
+    """
+    owned = set(RESERVED_APPIDS)
+    for user_dir in SteamManager.get_steam_userdata_dirs():
+        vdf_path = SteamManager.get_shortcuts_vdf_path(user_dir)
+        try:
+            shortcuts = SteamManager.read_vdf_shortcuts(vdf_path, strict=True)
+        except Exception as e:
+            raise OSError(f"Cannot read {vdf_path}: {e}") from e
+        for shortcut in shortcuts:
+            owned.add(SteamManager.get_shortcut_key(shortcut))
+
+    for library in SteamManager.get_library_dirs():
+        steamapps = os.path.join(library, "steamapps")
+        try:
+            names = os.listdir(steamapps)
+        except OSError:
+            continue
+        for name in names:
+            if name.startswith("appmanifest_") and name.endswith(".acf"):
+                appid = name[len("appmanifest_") : -len(".acf")]
+                if appid.isdigit():
+                    owned.add(int(appid))
+    return owned
+
+
+def get_known_app_names() -> Dict[int, str]:
+    """
+    Get names of app IDs this program created shortcuts for
+
+    Returns:
+        App ID -> game name, from managed games and removed ones
+    """
+    data = Config.load_section(Config.SECTION_GAMES)
+    names = {int(appid): name for appid, name in data.get("removed_names", {}).items()}
+    for game in data.get("managed_games", []):
+        synced = game.get("steam_sync")
+        if synced:
+            names[synced["appid"]] = game.get("name", "")
+    return names
+
+
+def _prune_removed_names(keep: Callable[[int], bool]):
+    """Forget the names of removed games whose prefix is gone"""
+    names = Config.load_section(Config.SECTION_GAMES).get("removed_names", {})
+    if all(keep(int(appid)) for appid in names):
+        return
+
+    def prune(data: Dict):
+        data["removed_names"] = {
+            appid: name
+            for appid, name in data.get("removed_names", {}).items()
+            if keep(int(appid))
+        }
+
+    Config.update_section(Config.SECTION_GAMES, prune)
+
+
+class PrefixSizeScanner:
+    """
+    Measures directory trees with scandir, one worker per prefix
+
+    Each directory's own file total is cached together with its mtime; a
+    directory whose mtime is unchanged is not re-listed on the next scan.
+    In-place file rewrites do not touch the mtime, so sizes are estimates
+    until an entry is added, removed or renamed.
+    """
+
+    CACHE_FILE_NAME = "compatdata_sizes.json"
+
+    def __init__(self, max_workers: int = 8, cache_file: Optional[str] = None):
+        self.max_workers = max_workers
+        self.cache_file = cache_file or os.path.join(get_cache_dir(), self.CACHE_FILE_NAME)
+        self._cache: Dict[str, List] = {}
+        self._seen: Set[str] = set()
+
+    def _load_cache(self):
+        """Load the persisted directory cache"""
+        try:
+            with open(self.cache_file, "r") as f:
+                self._cache = json.load(f)
+        except Exception:
+            self._cache = {}
+
+    def _save_cache(self):
+        """Persist the directory cache, dropping directories not seen this scan"""
+        self._cache = {path: entry for path, entry in self._cache.items() if path in self._seen}
+        try:
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._cache, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"Warning: Failed to save size cache: {e}")
+
+    def _scan_dir(self, path: str) -> Tuple[int, List[str]]:
+        """Get (bytes of files directly in path, subdirectory names)"""
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        size = 0
+        subdirs = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    size += entry.stat(follow_symlinks=False).st_blocks * 512
+        self._cache[path] = [mtime, size, subdirs]
+        return size, subdirs
+
+    def get_tree_size(self, root: str) -> int:
+        """Get the on-disk size of a directory tree in bytes"""
+        total = 0
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            try:
+                size, subdirs = self._scan_dir(path)
+            except OSError:
+                continue
+            self._seen.add(path)
+            total += size
+            stack.extend(os.path.join(path, name) for name in subdirs)
+        return total
+
+    def get_sizes(self, paths: List[str]) -> Dict[str, int]:
+        """Get sizes of several trees in parallel"""
+        self._load_cache()
+        self._seen = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            sizes = dict(zip(paths, pool.map(self.get_tree_size, paths)))
+        self._save_cache()
+        return sizes
+
+
+def find_orphaned_prefixes(scanner: Optional[PrefixSizeScanner] = None) -> List[OrphanedPrefix]:
+    """
+    Find compatdata directories whose app ID has no owner
+
+    Returns:
+        Orphaned prefixes, largest first
+
+    Raises:
+        OSError: A shortcuts.vdf cannot be read (see get_owned_appids)
+    """
+    owned = get_owned_appids()
+    candidates: Dict[str, int] = {}
+    present: Set[int] = set()
+    complete = True
+    for compatdata_dir in SteamManager.get_compatdata_dirs():
+        try:
+            for entry in os.scandir(compatdata_dir):
+                if entry.name.isdigit() and entry.is_dir(follow_symlinks=False):
+                    present.add(int(entry.name))
+                    if int(entry.name) not in owned:
+                        candidates[entry.path] = int(entry.name)
+        except OSError as e:
+            complete = False
+            print(f"Warning: Failed to scan {compatdata_dir}: {e}")
+    if complete:
+        _prune_removed_names(lambda appid: appid in present)
+
+    sizes = (scanner or PrefixSizeScanner()).get_sizes(list(candidates))
+    names = get_known_app_names()
+    orphans = [
+        OrphanedPrefix(appid, path, sizes[path], names.get(appid, ""))
+        for path, appid in candidates.items()
+    ]
+    return sorted(orphans, key=lambda orphan: orphan.size, reverse=True)
+
+
+def _remove_tree(path: str):
+    """Remove a directory tree at low I/O priority"""
+    if shutil.which("ionice") and shutil.which("nice"):
+        result = subprocess.run(LOW_PRIORITY_PREFIX + ["rm", "-rf", "--", path])
+        if result.returncode == 0:
+            return
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def delete_prefixes(
+    paths: List[str],
+    on_done: Optional[Callable[[bool, str], None]] = None,
+    backups: Optional[SaveBackupManager] = None,
+) -> threading.Thread:
+    """
+    Delete compatdata directories in a background thread
+
+    Each directory is first renamed to a hidden name so it disappears from
+    Steam immediately, then removed with ionice/nice.
+
+    Args:
+        paths: compatdata/<appid> directories
+        on_done: Called with (success_flag, detailed_message) when finished
+        backups: Back up each prefix's saves here first; a prefix whose
+            backup fails is kept
+
+    Returns:
+        The started thread
+    """
+    compatdata_dirs = {os.path.realpath(path) for path in SteamManager.get_compatdata_dirs()}
+
+    def task():
+        removed, errors = 0, []
+        deleted: Set[int] = set()
+        for path in paths:
+            parent, name = os.path.split(os.path.normpath(path))
+            if not name.isdigit() or os.path.realpath(parent) not in compatdata_dirs:
+                errors.append(f"{path}: not a compatdata directory")
+                continue
+            if backups is not None:
+                try:
+                    backups.backup(path)
+                except Exception as e:
+                    errors.append(f"{path}: save backup failed, not deleted: {e}")
+                    continue
+            trash = os.path.join(parent, f".{name}.deleting")
+            try:
+                os.rename(path, trash)
+            except OSError as e:
+                errors.append(f"{path}: {e}")
+                continue
+            _remove_tree(trash)
+            deleted.add(int(name))
+            removed += 1
+        if deleted:
+            _prune_removed_names(lambda appid: appid not in deleted)
+
+        message = f"Removed {removed} orphaned prefix(es)"
+        if errors:
+            message = "ERROR: " + message + "\n" + "\n".join(errors)
+        else:
+            message = "SUCCESS: " + message
+        if on_done is not None:
+            on_done(not errors, message)
+
+    thread = threading.Thread(target=task, daemon=True)
+    thread.start()
+    return thread
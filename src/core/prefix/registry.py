@@ -0,0 +1,443 @@
+"""
+Wine registry (.reg hive) engine - indexed, block-level edits of
+system.reg / user.reg without loading the whole hive
+
+Registry files must not be edited while the prefix is running; wineserver
+rewrites them when it exits.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+from src.config import TargetLanguage
+from .common import get_prefixes, get_pfx_path, get_running_prefixes
+from .fonts import find_substitute_font
+
+# Value types: str -> REG_SZ, int -> REG_DWORD, list -> REG_MULTI_SZ
+RegValue = Union[str, int, List[str]]
+
+# key path -> {value name ("" for default) -> value, None deletes}
+RegistryEdits = Dict[str, Dict[str, Optional[RegValue]]]
+
+SYSTEM_REG = "system.reg"
+USER_REG = "user.reg"
+
+FONT_SUBSTITUTES_KEY = "Software\\Microsoft\\Windows NT\\CurrentVersion\\FontSubstitutes"
+FONT_SYSTEM_LINK_KEY = "Software\\Microsoft\\Windows NT\\CurrentVersion\\FontLink\\SystemLink"
+WINE_FONT_REPLACEMENTS_KEY = "Software\\Wine\\Fonts\\Replacements"
+
+# Seconds between 1601-01-01 (FILETIME epoch) and 1970-01-01
+_FILETIME_EPOCH_DELTA = 11644473600
+
+_C_ESCAPES = {"a": "\a", "b": "\b", "e": "\x1b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+_C_ESCAPES_REVERSE = {v: k for k, v in _C_ESCAPES.items()}
+
+_HEX_DIGITS = "0123456789abcdefABCDEF"
+_OCT_DIGITS = "01234567"
+
+
+def escape_reg_string(value: str, quote: str = '"') -> str:
+    """Escape a string the way wineserver writes it"""
+    out = []
+    for i, char in enumerate(value):
+        code = ord(char)
+        if code > 127:
+            # Encode as UTF-16 code units, padded when a hex digit follows
+            units = [code] if code <= 0xFFFF else [
+                0xD800 + ((code - 0x10000) >> 10),
+                0xDC00 + ((code - 0x10000) & 0x3FF),
+            ]
+            follows_hex = i + 1 < len(value) and value[i + 1] in _HEX_DIGITS
+            for n, unit in enumerate(units):
+                pad = follows_hex or n + 1 < len(units)
+                out.append(f"\\x{unit:04x}" if pad else f"\\x{unit:x}")
+        elif char in _C_ESCAPES_REVERSE:
+            out.append("\\" + _C_ESCAPES_REVERSE[char])
+        elif code < 32:
+            out.append(f"\\{code:o}")
+        elif char == "\\" or char == quote:
+            out.append("\\" + char)
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def unescape_reg_string(value: str) -> str:
+    """Resolve wineserver string escapes (\\xHHHH, octal, C escapes)"""
+    if "\\" not in value:
+        return value
+
+    units: List[int] = []
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char != "\\" or i + 1 >= len(value):
+            units.append(ord(char))
+            i += 1
+            continue
+        nxt = value[i + 1]
+        i += 2
+        if nxt == "x":
+            digits = ""
+            while i < len(value) and len(digits) < 4 and value[i] in _HEX_DIGITS:
+                digits += value[i]
+                i += 1
+            units.append(int(digits, 16) if digits else ord("x"))
+        elif nxt in _OCT_DIGITS:
+            digits = nxt
+            while i < len(value) and len(digits) < 3 and value[i] in _OCT_DIGITS:
+                digits += value[i]
+                i += 1
+            units.append(int(digits, 8))
+        else:
+            units.append(ord(_C_ESCAPES.get(nxt, nxt)))
+
+    # Re-join UTF-16 surrogate pairs
+    data = b"".join(min(unit, 0xFFFF).to_bytes(2, "little") for unit in units)
+    return data.decode("utf-16-le", errors="surrogatepass")
+
+
+def format_reg_value(name: str, value: RegValue) -> str:
+    """Format one value line"""
+    prefix = "@" if name == "" else f'"{escape_reg_string(name)}"'
+    if isinstance(value, int):
+        return f"{prefix}=dword:{int(value) & 0xFFFFFFFF:08x}"
+    if isinstance(value, list):
+        joined = "".join(item + "\0" for item in value)
+        return f'{prefix}=str(7):"{escape_reg_string(joined)}"'
+    return f'{prefix}="{escape_reg_string(value)}"'
+
+
+def parse_reg_value(raw: str) -> RegValue:
+    """Decode the data part of a value line (after '='); other types stay raw"""
+    if raw.startswith('"') and raw.endswith('"'):
+        return unescape_reg_string(raw[1:-1])
+    if raw.startswith("dword:"):
+        return int(raw[6:], 16)
+    match = re.match(r'str\((\d+)\):"(.*)"$', raw, re.S)
+    if match:
+        text = unescape_reg_string(match.group(2))
+        if match.group(1) == "7":
+            return [item for item in text.split("\0") if item]
+        return text
+    return raw
+
+
+def _split_value_name(line: str) -> Tuple[Optional[str], str]:
+    """Split a value line into (unescaped name, raw data), name None if not a value"""
+    if line.startswith("@="):
+        return "", line[2:]
+    if not line.startswith('"'):
+        return None, ""
+    i = 1
+    while i < len(line):
+        if line[i] == "\\":
+            i += 2
+            continue
+        if line[i] == '"':
+            break
+        i += 1
+    if line[i + 1 : i + 2] != "=":
+        return None, ""
+    return unescape_reg_string(line[1:i]), line[i + 2 :]
+
+
+class WineRegistryFile:
+    """
+    One Wine registry hive with a key -> byte range index
+
+    The index is built with a single streaming pass over the file. Edits
+    rewrite only the affected key blocks; everything else is copied through
+    byte for byte.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index: Optional[Dict[str, Tuple[int, int]]] = None
+        self._signature: Optional[Tuple[int, int]] = None
+
+    @staticmethod
+    def _key_from_header(line: str) -> str:
+        """Get the unescaped key path of a "[key] timestamp" line"""
+        i = 1
+        while i < len(line) and line[i] != "]":
+            i += 2 if line[i] == "\\" else 1
+        return unescape_reg_string(line[1:i])
+
+    def build_index(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Build (or reuse) the key index
+
+        Returns:
+            lowercase key path -> (start, end) byte range of its block
+        """
+        st = os.stat(self.path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if self._index is not None and self._signature == signature:
+            return self._index
+
+        index: Dict[str, Tuple[int, int]] = {}
+        current: Optional[str] = None
+        start = offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.startswith(b"["):
+                    if current is not None:
+                        index[current] = (start, offset)
+                    header = line.decode("utf-8", errors="surrogateescape")
+                    current = self._key_from_header(header).lower()
+                    start = offset
+                offset += len(line)
+        if current is not None:
+            index[current] = (start, offset)
+
+        self._index = index
+        self._signature = signature
+        return index
+
+    def _read_block(self, key: str) -> Optional[str]:
+        """Read the text of one key block, None if the key does not exist"""
+        span = self.build_index().get(key.lower())
+        if span is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(span[0])
+            return f.read(span[1] - span[0]).decode("utf-8", errors="surrogateescape")
+
+    @staticmethod
+    def _block_entries(block: str) -> List[Tuple[Optional[str], str]]:
+        """Split a block body into (value name or None, raw lines) entries"""
+        entries: List[Tuple[Optional[str], str]] = []
+        lines = block.split("\n")[1:]
+        i = 0
+        while i < len(lines):
+            text = lines[i]
+            # Values continue onto the next line after a trailing backslash
+            while text.endswith("\\") and i + 1 < len(lines):
+                i += 1
+                text += "\n" + lines[i]
+            i += 1
+            if text == "":
+                continue
+            name, _ = _split_value_name(text)
+            entries.append((name, text))
+        return entries
+
+    def get_values(self, key: str) -> Optional[Dict[str, RegValue]]:
+        """
+        Get the values of a key
+
+        Returns:
+            value name -> decoded value, None if the key does not exist
+        """
+        block = self._read_block(key)
+        if block is None:
+            return None
+        values: Dict[str, RegValue] = {}
+        for name, text in self._block_entries(block):
+            if name is not None:
+                values[name] = parse_reg_value(_split_value_name(text)[1])
+        return values
+
+    @staticmethod
+    def _render_block(
+        key: str, block: Optional[str], edits: Dict[str, Optional[RegValue]]
+    ) -> str:
+        """Render a key block with edits applied"""
+        now = int(time.time())
+        filetime = (now + _FILETIME_EPOCH_DELTA) * 10_000_000
+        lines = [f"[{escape_reg_string(key, ']')}] {now}", f"#time={filetime:x}"]
+
+        pending = {name.lower(): (name, value) for name, value in edits.items()}
+        if block is not None:
+            for name, text in WineRegistryFile._block_entries(block):
+                if name is None:
+                    if not text.startswith("#time="):
+                        lines.append(text)
+                    continue
+                edit = pending.pop(name.lower(), None)
+                if edit is None:
+                    lines.append(text)
+                elif edit[1] is not None:
+                    lines.append(format_reg_value(edit[0], edit[1]))
+
+        for name, value in pending.values():
+            if value is not None:
+                lines.append(format_reg_value(name, value))
+        return "\n".join(lines) + "\n\n"
+
+    def apply(self, edits: RegistryEdits) -> int:
+        """
+        Apply value edits, rewriting only the affected key blocks
+
+        Keys that do not exist yet are appended at the end of the file.
+        Blocks whose values already match are left untouched.
+
+        Args:
+            edits: key path -> {value name -> value or None to delete}
+
+        Returns:
+            Number of key blocks rewritten
+        """
+        index = self.build_index()
+        replacements: List[Tuple[int, int, str]] = []
+        appended: List[str] = []
+
+        for key, values in edits.items():
+            current = self.get_values(key)
+            if current is not None:
+                lowered = {name.lower(): value for name, value in current.items()}
+                if all(lowered.get(name.lower()) == value for name, value in values.items()):
+                    continue
+            block = self._read_block(key)
+            rendered = self._render_block(key, block, values)
+            span = index.get(key.lower())
+            if span is None:
+                appended.append(rendered)
+            else:
+                replacements.append((span[0], span[1], rendered))
+
+        if not replacements and not appended:
+            return 0
+
+        replacements.sort()
+        tmp_path = f"{self.path}.tmp"
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+            position = 0
+            for start, end, rendered in replacements:
+                self._copy_range(src, dst, position, start)
+                dst.write(rendered.encode("utf-8", errors="surrogateescape"))
+                position = end
+            self._copy_range(src, dst, position, os.fstat(src.fileno()).st_size)
+            if appended:
+                # New blocks are separated from the previous one by a blank line
+                dst.flush()
+                if dst.tell() >= 2:
+                    with open(tmp_path, "rb") as written:
+                        written.seek(-2, os.SEEK_END)
+                        tail = written.read()
+                    if tail != b"\n\n":
+                        dst.write(b"\n" if tail.endswith(b"\n") else b"\n\n")
+                for rendered in appended:
+                    dst.write(rendered.encode("utf-8", errors="surrogateescape"))
+        os.replace(tmp_path, self.path)
+
+        self._index = None
+        return len(replacements) + len(appended)
+
+    @staticmethod
+    def _copy_range(src, dst, start: int, end: int, chunk_size: int = 1024 * 1024):
+        """Copy src[start:end] to dst"""
+        src.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = src.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            dst.write(chunk)
+            remaining -= len(chunk)
+
+
+# Font faces games request, per target language
+_REQUESTED_FACES = {
+    TargetLanguage.JAPANESE: [
+        "MS Gothic", "MS PGothic", "MS UI Gothic", "MS Mincho", "MS PMincho",
+        "ＭＳ ゴシック", "ＭＳ Ｐゴシック", "ＭＳ 明朝", "ＭＳ Ｐ明朝", "Meiryo", "Yu Gothic",
+    ],
+    TargetLanguage.CHINESE: [
+        "SimSun", "NSimSun", "SimHei", "Microsoft YaHei", "KaiTi", "FangSong",
+        "宋体", "新宋体", "黑体", "微软雅黑",
+    ],
+}
+
+# Western UI fonts that need a CJK fallback through FontLink
+_LINKED_FACES = ["Tahoma", "Microsoft Sans Serif", "MS Shell Dlg", "MS Shell Dlg 2", "Segoe UI"]
+
+
+def build_font_edits(lang: str, face: str, font_file: str) -> Dict[str, RegistryEdits]:
+    """
+    Build the substitution set mapping CJK font requests to an installed font
+
+    Args:
+        lang: Target language (TargetLanguage.CHINESE / JAPANESE)
+        face: Installed font face name (e.g. "Noto Sans CJK JP")
+        font_file: Installed font file name (e.g. "NotoSansCJK-Regular.ttc")
+
+    Returns:
+        {"system.reg": edits, "user.reg": edits}
+    """
+    requested = _REQUESTED_FACES.get(lang, _REQUESTED_FACES[TargetLanguage.CHINESE])
+    substitutes: Dict[str, Optional[RegValue]] = {name: face for name in requested}
+    links: Dict[str, Optional[RegValue]] = {
+        name: [f"{font_file},{face}"] for name in _LINKED_FACES
+    }
+    return {
+        SYSTEM_REG: {FONT_SUBSTITUTES_KEY: substitutes, FONT_SYSTEM_LINK_KEY: links},
+        USER_REG: {WINE_FONT_REPLACEMENTS_KEY: dict(substitutes)},
+    }
+
+
+def apply_registry_edits(
+    edits: Dict[str, RegistryEdits],
+    prefixes: Optional[List[str]] = None,
+    max_workers: int = 4,
+) -> Dict[str, List[str]]:
+    """
+    Apply the same registry edits to many prefixes in parallel
+
+    Args:
+        edits: hive file name (system.reg / user.reg) -> edits
+        prefixes: compatdata/<appid> directories (defaults to all prefixes)
+        max_workers: Parallel prefixes
+
+    Returns:
+        {"updated": [...], "unchanged": [...], "failed": [...]} prefix paths/messages
+    """
+    if prefixes is None:
+        prefixes = get_prefixes()
+    running = get_running_prefixes()
+
+    def apply_prefix(compatdata_path: str) -> Tuple[str, str]:
+        if os.path.realpath(compatdata_path) in running:
+            return "failed", f"{compatdata_path}: prefix is in use, retry after the game exits"
+        try:
+            changed = 0
+            for hive, hive_edits in edits.items():
+                path = os.path.join(get_pfx_path(compatdata_path), hive)
+                if os.path.isfile(path):
+                    changed += WineRegistryFile(path).apply(hive_edits)
+            return ("updated" if changed else "unchanged"), compatdata_path
+        except Exception as e:
+            return "failed", f"{compatdata_path}: {e}"
+
+    results: Dict[str, List[str]] = {"updated": [], "unchanged": [], "failed": []}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for status, message in pool.map(apply_prefix, prefixes):
+            results[status].append(message)
+    return results
+
+
+def apply_font_substitutes(
+    lang: str, prefixes: Optional[List[str]] = None, store_dir: Optional[str] = None
+) -> Tuple[bool, str]:
+    """
+    Convenience function to map a language's Windows fonts to an installed
+    CJK font in Proton prefixes
+
+    Returns:
+        (success_flag, detailed_message)
+    """
+    font = find_substitute_font(lang, store_dir)
+    if font is None:
+        return False, f"ERROR: No installed font covers {TargetLanguage.get_name(lang)}"
+    face, font_file = font
+    results = apply_registry_edits(build_font_edits(lang, face, font_file), prefixes)
+    message = (
+        f"Font substitutes ({face}) set in {len(results['updated'])} prefix(es), "
+        f"{len(results['unchanged'])} already set"
+    )
+    if results["failed"]:
+        return False, "ERROR: " + message + "\n" + "\n".join(results["failed"])
+    return True, "SUCCESS: " + message
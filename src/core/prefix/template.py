@@ -0,0 +1,350 @@
+"""
+Proton prefix templates - clone a pre-initialized "golden" prefix per
+Proton version so new shortcuts skip Wine's first-launch prefix setup
+"""
+
+import errno
+import os
+import shutil
+import subprocess
+import time
+from typing import Callable, Dict, Optional, Tuple
+from src.config import Config
+from src.utils import get_data_dir
+from .codepage import apply_codepage_profile
+from .common import is_immutable_file, get_pfx_path, get_running_prefixes
+from .fonts import PrefixFontLinker
+from .registry import apply_font_substitutes
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl(dest_fd, FICLONE, src_fd) - share extents copy-on-write (btrfs, xfs)
+FICLONE = 0x40049409
+
+# Files that belong to a running Proton session, never cloned
+SKIP_FILES = ("pfx.lock",)
+
+# Wine user profiles (saves, AppData) inside compatdata/<appid>
+USERS_DIR = os.path.join("pfx", "drive_c", "users")
+
+# Seconds to wait for wineserver to leave a freshly built prefix
+WINESERVER_EXIT_TIMEOUT = 60
+
+
+def reflink_file(src: str, dst: str) -> bool:
+    """
+    Create dst as a copy-on-write clone of src
+
+    Returns:
+        False when the filesystem does not support reflinks
+    """
+    if fcntl is None:
+        return False
+
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL):
+                raise
+            cloned = False
+        else:
+            cloned = True
+
+    if not cloned:
+        os.unlink(dst)
+    else:
+        shutil.copystat(src, dst)
+    return cloned
+
+
+def clone_tree(
+    src_dir: str,
+    dst_dir: str,
+    hardlink: bool = True,
+    skip: Optional[Callable[[str, bool], bool]] = None,
+) -> Dict[str, int]:
+    """
+    Clone a directory tree as cheaply as the filesystem allows
+
+    Immutable files (DLLs, executables, fonts) are hardlinked, falling back
+    to a reflink and then a copy. Mutable files (registry hives, configs) are
+    reflinked or copied so the clone can diverge. Symlinks are recreated.
+
+    Args:
+        src_dir: Tree to clone
+        dst_dir: Where to create the clone
+        hardlink: Hardlink immutable files (disable when src_dir is a live
+            prefix that Proton may still update)
+        skip: Called with (path relative to src_dir, is_dir); True leaves
+            the entry (and a directory's contents) out
+
+    Returns:
+        Counts of {"hardlinked", "reflinked", "copied", "symlinks"}
+    """
+    stats = {"hardlinked": 0, "reflinked": 0, "copied": 0, "symlinks": 0}
+    os.makedirs(dst_dir, exist_ok=True)
+
+    for root, dirs, files in os.walk(src_dir):
+        rel_root = os.path.relpath(root, src_dir)
+        target_root = os.path.normpath(os.path.join(dst_dir, rel_root))
+
+        if skip is not None:
+            dirs[:] = [
+                name
+                for name in dirs
+                if not skip(os.path.normpath(os.path.join(rel_root, name)), True)
+            ]
+            files = [
+                name
+                for name in files
+                if not skip(os.path.normpath(os.path.join(rel_root, name)), False)
+            ]
+
+        for name in dirs + files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target_root, name)
+
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), dst)
+                stats["symlinks"] += 1
+            elif name in dirs:
+                os.makedirs(dst, exist_ok=True)
+                shutil.copystat(src, dst)
+            elif name in SKIP_FILES:
+                continue
+            elif hardlink and is_immutable_file(name) and _try_hardlink(src, dst):
+                stats["hardlinked"] += 1
+            elif reflink_file(src, dst):
+                stats["reflinked"] += 1
+            else:
+                shutil.copy2(src, dst)
+                stats["copied"] += 1
+
+    return stats
+
+
+def is_profile_state(rel_path: str, is_dir: bool) -> bool:
+    """
+    Check if a compatdata entry is per-game user state
+
+    Everything under the Wine user profiles is, except the empty folder
+    skeleton (users/<name>/<folder> and users/<name>/AppData/<folder>).
+    """
+    parts = rel_path.split(os.sep)
+    base = USERS_DIR.split(os.sep)
+    if parts[: len(base)] != base:
+        return False
+    if not is_dir:
+        return True
+    inner = parts[len(base) :]
+    return not (len(inner) <= 2 or (len(inner) == 3 and inner[1] == "AppData"))
+
+
+def _try_hardlink(src: str, dst: str) -> bool:
+    """Hardlink src to dst, False if not possible (e.g. across filesystems)"""
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        return False
+
+
+class PrefixTemplateManager:
+    """Manages golden prefixes, one per compatibility tool"""
+
+    TEMPLATES_DIR_NAME = "prefix_templates"
+
+    @staticmethod
+    def get_templates_dir() -> str:
+        """Get directory holding all prefix templates"""
+        return os.path.join(get_data_dir(), PrefixTemplateManager.TEMPLATES_DIR_NAME)
+
+    @staticmethod
+    def get_template_path(tool_name: str) -> str:
+        """Get template directory (compatdata layout) for a compat tool"""
+        return os.path.join(PrefixTemplateManager.get_templates_dir(), tool_name)
+
+    @staticmethod
+    def has_template(tool_name: str) -> bool:
+        """Check if an initialized template exists for a compat tool"""
+        template = PrefixTemplateManager.get_template_path(tool_name)
+        return os.path.isdir(get_pfx_path(template))
+
+    @staticmethod
+    def prepare_template(compatdata_path: str, lang: str) -> Tuple[bool, str]:
+        """
+        Apply the CJK setup to a prefix about to become a template
+
+        Links the font store, sets font substitutes and the codepage, so
+        every prefix cloned from it starts configured.
+
+        Returns:
+            (success, message)
+        """
+        links = PrefixFontLinker().apply([compatdata_path])
+        if links["failed"]:
+            return False, "ERROR: " + "\n".join(links["failed"])
+        substituted, msg = apply_font_substitutes(lang, [compatdata_path])
+        if not substituted:
+            # No CJK font installed yet: the template still gets the codepage
+            print(f"Warning: {msg}")
+        codepages = apply_codepage_profile(lang, [compatdata_path])
+        if codepages["failed"]:
+            return False, "ERROR: " + "\n".join(codepages["failed"])
+        return True, "SUCCESS: Prefix prepared"
+
+    @staticmethod
+    def _freeze(tool_name: str, staging: str, lang: str) -> Tuple[bool, str]:
+        """Prepare a staged prefix and move it into place as the template"""
+        success, msg = PrefixTemplateManager.prepare_template(staging, lang)
+        if not success:
+            return False, msg
+        template = PrefixTemplateManager.get_template_path(tool_name)
+        if os.path.exists(template):
+            shutil.rmtree(template)
+        os.replace(staging, template)
+        return True, f"SUCCESS: Saved prefix template for {tool_name}"
+
+    @staticmethod
+    def build_template(
+        tool_name: str, tool_path: str, lang: Optional[str] = None, timeout: int = 300
+    ) -> Tuple[bool, str]:
+        """
+        Create a template by letting a compat tool initialize a new prefix
+
+        Runs the tool's proton script on an empty compatdata directory (no
+        game involved), waits for wineserver to exit and applies the CJK
+        setup before the template is frozen.
+
+        Args:
+            tool_name: Compat tool internal name (e.g. "proton_9")
+            tool_path: Tool install directory (holding the proton script)
+            lang: Target language (default: configured target language)
+            timeout: Seconds allowed for the prefix initialization
+
+        Returns:
+            (success, message)
+        """
+        proton = os.path.join(tool_path, "proton")
+        if not os.path.isfile(proton):
+            return False, f"ERROR: No proton script in {tool_path}"
+
+        staging = f"{PrefixTemplateManager.get_template_path(tool_name)}.staging"
+        env = dict(
+            os.environ,
+            STEAM_COMPAT_DATA_PATH=staging,
+            STEAM_COMPAT_CLIENT_INSTALL_PATH=Config.get_steam_root(),
+        )
+        try:
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
+            os.makedirs(staging)
+            result = subprocess.run(
+                [proton, "run", "wineboot", "-u"],
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            if not os.path.isdir(get_pfx_path(staging)):
+                detail = (result.stderr or result.stdout).strip()[-500:]
+                shutil.rmtree(staging, ignore_errors=True)
+                return False, f"ERROR: {tool_name} did not create a prefix\n{detail}"
+
+            # wineserver lingers after wineboot and rewrites the hives on exit
+            deadline = time.monotonic() + WINESERVER_EXIT_TIMEOUT
+            while os.path.realpath(staging) in get_running_prefixes():
+                if time.monotonic() > deadline:
+                    shutil.rmtree(staging, ignore_errors=True)
+                    return False, f"ERROR: wineserver did not exit for {tool_name}"
+                time.sleep(0.5)
+
+            success, msg = PrefixTemplateManager._freeze(
+                tool_name, staging, lang or Config.get_target_language()
+            )
+            if not success:
+                shutil.rmtree(staging, ignore_errors=True)
+            return success, msg
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            return False, f"ERROR: Failed to build prefix template: {e}"
+
+    @staticmethod
+    def capture_template(
+        tool_name: str, compatdata_path: str, lang: Optional[str] = None
+    ) -> Tuple[bool, str]:
+        """
+        Store a copy of an initialized prefix as the template for a compat tool
+
+        User profiles (saves, AppData) are left out and every file is copied
+        or reflinked, never hardlinked, so later changes to the source prefix
+        cannot reach the template. Prefer build_template: registry settings
+        a game wrote into the source prefix are kept.
+
+        Args:
+            tool_name: Compat tool internal name (e.g. "proton_9")
+            compatdata_path: compatdata/<appid> directory created by that tool
+            lang: Target language (default: configured target language)
+
+        Returns:
+            (success, message)
+        """
+        if not os.path.isdir(get_pfx_path(compatdata_path)):
+            return False, f"ERROR: No initialized prefix in {compatdata_path}"
+        if os.path.realpath(compatdata_path) in get_running_prefixes():
+            return False, f"ERROR: Prefix is in use: {compatdata_path}"
+
+        staging = f"{PrefixTemplateManager.get_template_path(tool_name)}.staging"
+        try:
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
+            clone_tree(compatdata_path, staging, hardlink=False, skip=is_profile_state)
+            success, msg = PrefixTemplateManager._freeze(
+                tool_name, staging, lang or Config.get_target_language()
+            )
+            if not success:
+                shutil.rmtree(staging, ignore_errors=True)
+            return success, msg
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            return False, f"ERROR: Failed to save prefix template: {e}"
+
+    @staticmethod
+    def clone_template(
+        tool_name: str, compatdata_path: str, stats: Optional[Dict[str, int]] = None
+    ) -> Tuple[bool, str]:
+        """
+        Create a new prefix from the template of a compat tool
+
+        Args:
+            tool_name: Compat tool internal name
+            compatdata_path: compatdata/<appid> directory to create
+            stats: Optional dict receiving clone_tree counts
+
+        Returns:
+            (success, message)
+        """
+        if not PrefixTemplateManager.has_template(tool_name):
+            return False, f"ERROR: No prefix template for {tool_name}"
+        if os.path.exists(get_pfx_path(compatdata_path)):
+            return False, f"ERROR: Prefix already exists: {compatdata_path}"
+
+        staging = f"{compatdata_path}.staging"
+        try:
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
+            result = clone_tree(PrefixTemplateManager.get_template_path(tool_name), staging)
+            if stats is not None:
+                stats.update(result)
+            if os.path.isdir(compatdata_path):
+                # Steam may have created an empty compatdata dir already
+                os.rmdir(compatdata_path)
+            os.replace(staging, compatdata_path)
+            return True, f"SUCCESS: Prefix created from {tool_name} template"
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            return False, f"ERROR: Failed to clone prefix template: {e}"
@@ -0,0 +1,246 @@
+"""
+Progress event bus - throttled progress for downloads and installs with
+throughput/ETA, fanned out to terminal, GUI and log sinks
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Stages reported by the download and install pipeline
+STAGE_DOWNLOAD = "download"
+STAGE_EXTRACT = "extract"
+STAGE_COPY = "copy"
+STAGE_FC_CACHE = "fc-cache"
+
+UNIT_BYTES = "bytes"
+UNIT_FILES = "files"
+
+
+class ProgressEvent:
+    """Coalesced progress of one stage"""
+
+    def __init__(
+        self,
+        stage: str,
+        name: str,
+        done: int,
+        total: int,
+        unit: str,
+        rate: float,
+        eta: Optional[float],
+        finished: bool,
+    ):
+        self.stage = stage
+        self.name = name
+        self.done = done
+        self.total = total
+        self.unit = unit
+        self.rate = rate  # units per second (EMA)
+        self.eta = eta  # seconds, None if unknown
+        self.finished = finished
+
+    def get_fraction(self) -> float:
+        """Get completion as 0..1 (0 when the total is unknown)"""
+        if self.total <= 0:
+            return 1.0 if self.finished else 0.0
+        return min(1.0, self.done / self.total)
+
+    def format_amount(self) -> str:
+        """Format done/total, e.g. "23.5/52.1 MB" or "3/12 files\""""
+        if self.unit == UNIT_BYTES:
+            mb = 1024 * 1024
+            return f"{self.done / mb:.1f}/{self.total / mb:.1f} MB"
+        return f"{self.done}/{self.total} {self.unit}"
+
+    def format_rate(self) -> str:
+        """Format throughput and ETA, e.g. "3.2 MB/s, ETA 8s\""""
+        if self.rate <= 0:
+            return ""
+        if self.unit == UNIT_BYTES:
+            text = f"{self.rate / (1024 * 1024):.1f} MB/s"
+        else:
+            text = f"{self.rate:.1f} {self.unit}/s"
+        if self.eta is not None and not self.finished:
+            text += f", ETA {int(self.eta)}s"
+        return text
+
+
+ProgressSink = Callable[[ProgressEvent], None]
+
+
+class ProgressBus:
+    """
+    Coalesces high-frequency progress updates into at most rate_hz events
+    per second
+
+    Producers call update() as often as they like (e.g. per 64 KB chunk,
+    from several threads); sinks only see throttled events. Throttling and
+    throughput are tracked per stage, so interleaved stages (a download
+    feeding an extraction) do not reset each other. The first update and
+    finish() of a stage are always delivered. Throughput is an exponential
+    moving average over the delivered events.
+    """
+
+    def __init__(
+        self,
+        sinks: Optional[List[ProgressSink]] = None,
+        rate_hz: float = 10.0,
+        ema_alpha: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.sinks: List[ProgressSink] = list(sinks or [])
+        self.interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.ema_alpha = ema_alpha
+        self.clock = clock
+        self._lock = threading.Lock()
+        # stage -> time, done count and rate of the last delivered event
+        self._last_emit: Dict[str, float] = {}
+        self._last_done: Dict[str, int] = {}
+        self._rate: Dict[str, float] = {}
+
+    def add_sink(self, sink: ProgressSink):
+        """Register a sink"""
+        self.sinks.append(sink)
+
+    def update(
+        self, stage: str, done: int, total: int = 0, name: str = "", unit: str = UNIT_BYTES
+    ):
+        """Report progress of a stage (cheap when throttled)"""
+        self._report(stage, done, total, name, unit, finished=False)
+
+    def finish(
+        self, stage: str, done: int, total: int = 0, name: str = "", unit: str = UNIT_BYTES
+    ):
+        """Report a stage as finished (always delivered)"""
+        self._report(stage, done, total, name, unit, finished=True)
+
+    def callback(self, stage: str, name: str = "", unit: str = UNIT_BYTES) -> Callable[[int, int], None]:
+        """Get a legacy (done, total) callback feeding this bus"""
+        return lambda done, total: self.update(stage, done, total, name, unit)
+
+    def _report(self, stage: str, done: int, total: int, name: str, unit: str, finished: bool):
+        now = self.clock()
+        with self._lock:
+            if stage not in self._last_emit:
+                # New stage: start throughput tracking
+                self._last_emit[stage] = now
+                self._last_done[stage] = done
+                self._rate[stage] = 0.0
+                if not finished:
+                    event = self._make_event(stage, name, done, total, unit, False)
+                    self._emit(event)
+                    return
+            elif not finished and now - self._last_emit[stage] < self.interval:
+                return
+
+            elapsed = now - self._last_emit[stage]
+            if elapsed > 0:
+                rate = (done - self._last_done[stage]) / elapsed
+                previous = self._rate[stage]
+                self._rate[stage] = rate if previous <= 0 else (
+                    self.ema_alpha * rate + (1 - self.ema_alpha) * previous
+                )
+            self._last_emit[stage] = now
+            self._last_done[stage] = done
+            event = self._make_event(stage, name, done, total, unit, finished)
+            if finished:
+                del self._last_emit[stage], self._last_done[stage], self._rate[stage]
+            self._emit(event)
+
+    def _make_event(
+        self, stage: str, name: str, done: int, total: int, unit: str, finished: bool
+    ) -> ProgressEvent:
+        rate = self._rate[stage]
+        eta = None
+        if total > 0 and rate > 0:
+            eta = max(0.0, (total - done) / rate)
+        return ProgressEvent(stage, name, done, total, unit, rate, eta, finished)
+
+    def _emit(self, event: ProgressEvent):
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception as e:
+                logger.warning(f"Progress sink failed: {e}")
+
+
+class TerminalSink:
+    """Renders a single updating progress line on stderr"""
+
+    BAR_LENGTH = 30
+
+    def __call__(self, event: ProgressEvent):
+        filled = int(self.BAR_LENGTH * event.get_fraction())
+        bar = "█" * filled + "░" * (self.BAR_LENGTH - filled)
+        line = f"\r{event.stage:>8} [{bar}] {event.get_fraction() * 100:5.1f}% {event.format_amount()}"
+        rate = event.format_rate()
+        if rate:
+            line += f" {rate}"
+        if event.finished:
+            line += "\n"
+        self._write(line)
+
+    @staticmethod
+    def _write(text: str):
+        # Write directly to raw stderr to bypass buffering
+        try:
+            os.write(2, text.encode("utf-8", errors="ignore"))
+        except OSError:
+            sys.stderr.write(text)
+            sys.stderr.flush()
+
+
+class LogSink:
+    """Logs stage completion and at most one progress line per interval"""
+
+    def __init__(self, log: Optional[logging.Logger] = None, interval: float = 5.0):
+        self.log = log or logger
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, event: ProgressEvent):
+        now = time.monotonic()
+        if not event.finished and now - self._last < self.interval:
+            return
+        self._last = now
+        state = "done" if event.finished else f"{event.get_fraction() * 100:.0f}%"
+        self.log.info(f"{event.stage} {event.name}: {state} {event.format_amount()} {event.format_rate()}")
+
+
+class CallbackSink:
+    """Adapts a legacy (done, total) callback to the bus for one stage"""
+
+    def __init__(self, callback: Callable[[int, int], None], stage: str = STAGE_DOWNLOAD):
+        self.callback = callback
+        self.stage = stage
+
+    def __call__(self, event: ProgressEvent):
+        if event.stage == self.stage:
+            self.callback(event.done, event.total)
+
+
+def get_progress_bus(
+    progress: Optional[ProgressBus] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> ProgressBus:
+    """
+    Get the bus to report to: the given one, or a new terminal bus
+
+    A legacy progress_callback is attached as a throttled download sink.
+    """
+    if progress is None:
+        progress = ProgressBus([TerminalSink()])
+    if progress_callback is None:
+        return progress
+    return ProgressBus(
+        progress.sinks + [CallbackSink(progress_callback)],
+        rate_hz=1.0 / progress.interval if progress.interval else 0.0,
+        ema_alpha=progress.ema_alpha,
+        clock=progress.clock,
+    )
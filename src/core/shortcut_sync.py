@@ -0,0 +1,404 @@
+"""
+Two-way sync between managed games and Steam shortcuts
+"""
+
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+from src.config import Config
+from src.utils import vdf
+from .steam_manager import SteamManager, debug_log
+from .nonsteam_manager import NonSteamManager
+from .prefix import PrefixTemplateManager
+
+# Location of per-app compatibility tool overrides in config/config.vdf
+COMPAT_MAPPING_PATH = ("InstallConfigStore", "Software", "Valve", "Steam", "CompatToolMapping")
+
+# Fields kept in sync: managed game state key -> shortcuts.vdf key
+SHORTCUT_FIELDS = {"launch_options": "LaunchOptions"}
+
+
+class SyncPlan:
+    """Keyed diff between managed games and Steam shortcuts"""
+
+    def __init__(self):
+        # shortcuts.vdf path -> [(action, appid, shortcut fields)],
+        # action is "add", "update" or "remove"
+        self.shortcut_changes: Dict[str, List[Tuple[str, int, Dict[str, Any]]]] = {}
+        # appid -> compat tool internal name ("" removes the mapping)
+        self.compat_changes: Dict[int, str] = {}
+        # game name -> state pulled from Steam
+        self.game_updates: Dict[str, Dict[str, str]] = {}
+        # games whose shortcut was deleted in Steam
+        self.dropped_games: List[str] = []
+        # game name -> synced state to record as the new baseline
+        self.baselines: Dict[str, Dict[str, Any]] = {}
+        # appids of deleted games whose shortcuts are handled by this plan
+        self.tombstones: List[int] = []
+        # appid -> compat tool of shortcuts created by this plan
+        self.new_prefixes: Dict[int, str] = {}
+        # game name -> compat layer that matches no installed tool
+        self.unresolved_layers: Dict[str, str] = {}
+
+    def count(self) -> int:
+        """Number of entry updates the plan applies"""
+        return (
+            sum(len(changes) for changes in self.shortcut_changes.values())
+            + len(self.compat_changes)
+            + len(self.game_updates)
+            + len(self.dropped_games)
+        )
+
+    def is_empty(self) -> bool:
+        """Whether nothing needs to change (baselines aside)"""
+        return self.count() == 0
+
+    def __repr__(self) -> str:
+        return f"SyncPlan({self.count()} changes)"
+
+
+class ShortcutSync:
+    """
+    Reconciles Config's managed_games with every user's shortcuts.vdf
+
+    Each synced game stores the last synced state under "steam_sync". A
+    field that differs between the two sides is pushed to Steam when the
+    managed value changed since that baseline, and pulled from Steam when
+    only the Steam side changed.
+    """
+
+    @staticmethod
+    def get_compat_config_path() -> str:
+        """Get Steam's config.vdf holding CompatToolMapping"""
+        return os.path.join(Config.get_steam_root(), "config", "config.vdf")
+
+    @staticmethod
+    def _read_compat_mapping() -> Dict[int, str]:
+        """Read appid -> compat tool name from config.vdf"""
+        path = ShortcutSync.get_compat_config_path()
+        if not os.path.isfile(path):
+            return {}
+
+        node: Any = vdf.load(path)
+        for key in COMPAT_MAPPING_PATH:
+            node = vdf.find_key(node, key, {})
+        mapping = {}
+        for appid, entry in node.items():
+            if appid.isdigit() and isinstance(entry, dict):
+                mapping[int(appid)] = vdf.find_key(entry, "name", "")
+        return mapping
+
+    @staticmethod
+    def _write_compat_mapping(changes: Dict[int, str]) -> Tuple[bool, str]:
+        """
+        Apply compat tool changes to config.vdf in a single write
+
+        Only the changed CompatToolMapping entries are rewritten, the rest
+        of Steam's file is kept as is and the previous file is saved as
+        config.vdf.bak. Refused while Steam runs, as it would overwrite
+        the file on exit.
+        """
+        path = ShortcutSync.get_compat_config_path()
+        if SteamManager.is_steam_running():
+            return False, "ERROR: Close Steam before changing compatibility tools"
+        try:
+            text = ""
+            if os.path.isfile(path):
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            entries = {
+                str(appid): {"name": tool, "config": "", "priority": "250"} if tool else None
+                for appid, tool in changes.items()
+            }
+            updated = vdf.update_text(text, COMPAT_MAPPING_PATH, entries)
+            if updated == text:
+                return True, "SUCCESS: Compatibility tools saved"
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if text:
+                shutil.copy2(path, f"{path}.bak")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(updated)
+            os.replace(tmp_path, path)
+            return True, "SUCCESS: Compatibility tools saved"
+        except Exception as e:
+            return False, f"ERROR: Failed to write compatibility tools: {e}"
+
+    @staticmethod
+    def _tool_name(layer: str) -> Optional[str]:
+        """
+        Map a managed compat layer (display name) to Steam's internal name
+
+        Returns:
+            Internal name ("" for no layer), None if no installed tool matches
+        """
+        if not layer:
+            return ""
+        tool = NonSteamManager.find_compatibility_tool(layer)
+        return tool.name if tool is not None else None
+
+    @staticmethod
+    def _game_state(game: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        """Get the synced fields of a managed game (compat_tool None if unresolved)"""
+        return {
+            "launch_options": game.get("properties", {}).get("launch_options", ""),
+            "compat_tool": ShortcutSync._tool_name(game.get("compat_layer", "")),
+        }
+
+    @staticmethod
+    def plan(games: Optional[List[Dict[str, Any]]] = None) -> SyncPlan:
+        """
+        Compute the minimal changes needed to bring both sides in sync
+
+        Args:
+            games: Managed games (defaults to Config's managed games)
+
+        Returns:
+            Sync plan
+        """
+        if games is None:
+            games = Config.get_managed_games()
+        tombstones = set(Config.load_section(Config.SECTION_GAMES).get("removed_shortcuts", []))
+
+        user_shortcuts: Dict[str, Dict[int, Dict]] = {}
+        for user_dir in SteamManager.get_steam_userdata_dirs():
+            vdf_path = SteamManager.get_shortcuts_vdf_path(user_dir)
+            user_shortcuts[vdf_path] = {
+                SteamManager.get_shortcut_key(s): s
+                for s in SteamManager.read_vdf_shortcuts(vdf_path)
+            }
+        compat = ShortcutSync._read_compat_mapping()
+
+        plan = SyncPlan()
+        managed_ids = set()
+
+        for game in games:
+            name = game.get("name", "")
+            exe_path = game.get("exe_path", "")
+            appid = SteamManager.get_shortcut_appid(exe_path, name)
+            managed_ids.add(appid)
+
+            state = ShortcutSync._game_state(game)
+            base = game.get("steam_sync")
+            if base and base.get("appid") != appid:
+                base = None
+
+            # Steam ignores unknown tool names: leave its mapping alone
+            unresolved = state["compat_tool"] is None
+            if unresolved:
+                plan.unresolved_layers[name] = game.get("compat_layer", "")
+                debug_log(f"Unknown compatibility tool for {name}: {game.get('compat_layer')}")
+                state["compat_tool"] = (base or {}).get("compat_tool", "")
+            present = [s[appid] for s in user_shortcuts.values() if appid in s]
+
+            if base and user_shortcuts and not present:
+                plan.dropped_games.append(name)
+                continue
+
+            # Pull fields changed only on the Steam side
+            steam_values = {
+                field: [s.get(key, "") for s in present]
+                for field, key in SHORTCUT_FIELDS.items()
+            }
+            if not unresolved:
+                steam_values["compat_tool"] = [compat.get(appid, "")]
+            updates = {}
+            for field, values in steam_values.items():
+                changed = [value for value in values if value != state[field]]
+                if not changed:
+                    continue
+                # Pull when the managed side kept its baseline, or on first
+                # sync when only Steam has a value
+                if base is not None:
+                    pull = state[field] == base.get(field)
+                else:
+                    pull = not state[field]
+                if pull:
+                    updates[field] = state[field] = changed[0]
+            if updates:
+                plan.game_updates[name] = updates
+
+            # Push the (merged) managed state to every user
+            for vdf_path, shortcuts in user_shortcuts.items():
+                shortcut = shortcuts.get(appid)
+                if shortcut is None:
+                    new_shortcut = SteamManager.build_shortcut(
+                        exe_path, name, state["launch_options"]
+                    )
+                    plan.shortcut_changes.setdefault(vdf_path, []).append(
+                        ("add", appid, new_shortcut)
+                    )
+                    if state["compat_tool"] and not unresolved:
+                        plan.new_prefixes[appid] = state["compat_tool"]
+                    continue
+                fields = {
+                    key: state[field]
+                    for field, key in SHORTCUT_FIELDS.items()
+                    if shortcut.get(key, "") != state[field]
+                }
+                if fields:
+                    plan.shortcut_changes.setdefault(vdf_path, []).append(
+                        ("update", appid, fields)
+                    )
+            if not unresolved and compat.get(appid, "") != state["compat_tool"]:
+                plan.compat_changes[appid] = state["compat_tool"]
+
+            baseline = dict(state, appid=appid)
+            if baseline != game.get("steam_sync"):
+                plan.baselines[name] = baseline
+
+        # Remove shortcuts of games deleted from the managed list
+        plan.tombstones = sorted(tombstones)
+        for appid in tombstones - managed_ids:
+            for vdf_path, shortcuts in user_shortcuts.items():
+                if appid in shortcuts:
+                    plan.shortcut_changes.setdefault(vdf_path, []).append(
+                        ("remove", appid, {})
+                    )
+            if appid in compat:
+                plan.compat_changes[appid] = ""
+
+        return plan
+
+    @staticmethod
+    def _apply_shortcut_changes(
+        vdf_path: str, changes: List[Tuple[str, int, Dict[str, Any]]]
+    ) -> Tuple[bool, str]:
+        """Apply keyed changes to one shortcuts.vdf in a single write"""
+        shortcuts = SteamManager.read_vdf_shortcuts(vdf_path)
+        by_key = {SteamManager.get_shortcut_key(s): s for s in shortcuts}
+
+        removed = set()
+        for action, appid, fields in changes:
+            if action == "add" and appid not in by_key:
+                by_key[appid] = dict(fields)
+                shortcuts.append(by_key[appid])
+            elif action == "update" and appid in by_key:
+                by_key[appid].update(fields)
+            elif action == "remove":
+                removed.add(appid)
+
+        shortcuts = [s for s in shortcuts if SteamManager.get_shortcut_key(s) not in removed]
+        return SteamManager.write_vdf_shortcuts(vdf_path, shortcuts)
+
+    @staticmethod
+    def apply(plan: SyncPlan) -> Tuple[bool, str]:
+        """
+        Apply a sync plan: one write per shortcuts.vdf, one write of
+        config.vdf and one update of the games section
+
+        Args:
+            plan: Plan from ShortcutSync.plan
+
+        Returns:
+            (success, message)
+        """
+        errors = []
+
+        for vdf_path, changes in plan.shortcut_changes.items():
+            debug_log(f"Applying {len(changes)} shortcut change(s) to {vdf_path}")
+            success, msg = ShortcutSync._apply_shortcut_changes(vdf_path, changes)
+            if not success:
+                errors.append(msg)
+
+        if plan.compat_changes:
+            success, msg = ShortcutSync._write_compat_mapping(plan.compat_changes)
+            if not success:
+                errors.append(msg)
+
+        # Give new shortcuts a ready-made prefix when a template exists
+        for appid, tool in plan.new_prefixes.items():
+            compatdata_path = SteamManager.get_compatdata_path(appid)
+            if PrefixTemplateManager.has_template(tool) and not os.path.exists(
+                os.path.join(compatdata_path, "pfx")
+            ):
+                success, msg = PrefixTemplateManager.clone_template(tool, compatdata_path)
+                debug_log(msg)
+
+        def update_games(data: Dict[str, Any]):
+            games = []
+            for game in data.get("managed_games", []):
+                name = game.get("name")
+                if name in plan.dropped_games:
+                    continue
+                updates = plan.game_updates.get(name, {})
+                if "launch_options" in updates:
+                    game.setdefault("properties", {})["launch_options"] = updates[
+                        "launch_options"
+                    ]
+                if "compat_tool" in updates:
+                    tool = NonSteamManager.find_compatibility_tool(updates["compat_tool"])
+                    game["compat_layer"] = (
+                        tool.display_name if tool is not None else updates["compat_tool"]
+                    )
+                if name in plan.baselines and not errors:
+                    game["steam_sync"] = plan.baselines[name]
+                games.append(game)
+            data["managed_games"] = games
+            if not errors:
+                data["removed_shortcuts"] = [
+                    appid
+                    for appid in data.get("removed_shortcuts", [])
+                    if appid not in plan.tombstones
+                ]
+
+        if plan.game_updates or plan.dropped_games or plan.baselines or plan.tombstones:
+            Config.update_section(Config.SECTION_GAMES, update_games)
+
+        if errors:
+            return False, "\n".join(errors)
+        message = f"SUCCESS: Synced with Steam ({plan.count()} change(s))"
+        if plan.unresolved_layers:
+            message += "\nWarning: Compatibility tool not installed, left unchanged: " + ", ".join(
+                f"{name} ({layer})" for name, layer in sorted(plan.unresolved_layers.items())
+            )
+        return True, message
+
+    @staticmethod
+    def build_prefix_templates(
+        games: Optional[List[Dict[str, Any]]] = None, lang: Optional[str] = None
+    ) -> Tuple[bool, str]:
+        """
+        Build a prefix template for every compat tool used by managed games
+
+        Shortcuts created by later syncs are then given a clone of it.
+
+        Args:
+            games: Managed games (defaults to Config's managed games)
+            lang: Target language (default: configured target language)
+
+        Returns:
+            (success, message)
+        """
+        if games is None:
+            games = Config.get_managed_games()
+        tools = {}
+        for game in games:
+            tool = NonSteamManager.find_compatibility_tool(game.get("compat_layer", ""))
+            if tool is not None:
+                tools[tool.name] = tool
+
+        if not tools:
+            return False, "ERROR: No managed game uses an installed compatibility tool"
+
+        built, errors = [], []
+        for name, tool in sorted(tools.items()):
+            debug_log(f"Building prefix template for {tool}")
+            success, msg = PrefixTemplateManager.build_template(name, tool.path, lang)
+            if success:
+                built.append(tool.display_name)
+            else:
+                errors.append(msg)
+
+        if errors:
+            return False, "\n".join(errors)
+        return True, f"SUCCESS: Built prefix templates for {', '.join(built)}"
+
+    @staticmethod
+    def sync() -> Tuple[bool, str]:
+        """Plan and apply a full two-way sync"""
+        try:
+            return ShortcutSync.apply(ShortcutSync.plan())
+        except Exception as e:
+            return False, f"ERROR: Exception occurred: {e}"
@@ -5,11 +5,10 @@ Handles adding non-Steam games to Steam library
 
 import os
 import sys
-import struct
 import binascii
 from typing import List, Tuple, Dict, Optional
 from src.config import Config
-from src.utils import get_home_dir
+from src.utils import get_home_dir, vdf
 
 
 def debug_log(message: str):
@@ -81,6 +80,79 @@ class SteamManager:
         """Get shortcuts.vdf file path for a user"""
         return os.path.join(user_dir, "config", "shortcuts.vdf")
 
+    # Parsed libraryfolders.vdf: (mtime_ns, library dirs)
+    _library_cache: Optional[Tuple[Optional[int], List[str]]] = None
+
+    @staticmethod
+    def get_library_dirs() -> List[str]:
+        """
+        Get all Steam library root directories
+
+        Parses steamapps/libraryfolders.vdf; the result is reused until the
+        file's mtime changes.
+
+        Returns:
+            Library roots, the Steam root first
+        """
+        steam_root = Config.get_steam_root()
+        vdf_path = os.path.join(steam_root, "steamapps", "libraryfolders.vdf")
+        try:
+            mtime = os.stat(vdf_path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        cached = SteamManager._library_cache
+        if cached is not None and cached[0] == mtime:
+            return list(cached[1])
+
+        libraries = [steam_root]
+        if mtime is not None:
+            try:
+                folders = vdf.find_key(vdf.load(vdf_path), "libraryfolders", {})
+                for entry in folders.values():
+                    # New format: {"path": ...}, old format: plain path string
+                    path = vdf.find_key(entry, "path") if isinstance(entry, dict) else entry
+                    if not path or not os.path.isdir(path):
+                        continue
+                    if os.path.realpath(path) not in map(os.path.realpath, libraries):
+                        libraries.append(path)
+            except Exception as e:
+                debug_log(f"Error reading library folders: {e}")
+
+        SteamManager._library_cache = (mtime, libraries)
+        return list(libraries)
+
+    @staticmethod
+    def get_compatdata_dirs() -> List[str]:
+        """Get existing steamapps/compatdata directories of all libraries"""
+        dirs = []
+        for library in SteamManager.get_library_dirs():
+            path = os.path.join(library, "steamapps", "compatdata")
+            if os.path.isdir(path):
+                dirs.append(path)
+        return dirs
+
+    @staticmethod
+    def is_steam_running() -> bool:
+        """Check if the Steam client is running (it rewrites config.vdf on exit)"""
+        try:
+            pids = [name for name in os.listdir("/proc") if name.isdigit()]
+        except OSError:
+            return False
+        for pid in pids:
+            try:
+                with open(f"/proc/{pid}/comm", "r") as f:
+                    if f.read().strip() == "steam":
+                        return True
+            except OSError:
+                continue
+        return False
+
+    @staticmethod
+    def get_compatdata_path(appid: int) -> str:
+        """Get the compatdata directory Steam uses for a non-Steam shortcut"""
+        return os.path.join(Config.get_steam_root(), "steamapps", "compatdata", str(appid))
+
     @staticmethod
     def browse_directory(path: str) -> Tuple[List[str], List[str]]:
         """
@@ -140,12 +212,60 @@ class SteamManager:
         return shortcut_id
 
     @staticmethod
-    def read_vdf_shortcuts(vdf_path: str) -> List[Dict]:
+    def get_shortcut_appid(exe_path: str, app_name: str) -> int:
+        """
+        Get the 32-bit app ID of a shortcut (as used for compatdata and
+        CompatToolMapping), i.e. the upper half of calculate_shortcut_id
+        """
+        return SteamManager.calculate_shortcut_id(exe_path, app_name) >> 32
+
+    @staticmethod
+    def get_shortcut_key(shortcut: Dict) -> int:
+        """Get the 32-bit app ID of an existing shortcut entry"""
+        appid = shortcut.get("appid")
+        if appid:
+            return appid & 0xFFFFFFFF
+        exe_path = shortcut.get("exe", "").strip('"')
+        return SteamManager.get_shortcut_appid(exe_path, shortcut.get("appname", ""))
+
+    @staticmethod
+    def build_shortcut(
+        exe_path: str,
+        app_name: str,
+        launch_options: str = "",
+        start_dir: Optional[str] = None,
+    ) -> Dict:
+        """Build a new shortcuts.vdf entry"""
+        if start_dir is None:
+            start_dir = os.path.dirname(exe_path)
+
+        return {
+            "appid": SteamManager.get_shortcut_appid(exe_path, app_name),
+            "appname": app_name,
+            "exe": f'"{exe_path}"',
+            "StartDir": f'"{start_dir}"',
+            "icon": "",
+            "ShortcutPath": "",
+            "LaunchOptions": launch_options,
+            "IsHidden": 0,
+            "AllowDesktopConfig": 1,
+            "AllowOverlay": 1,
+            "OpenVR": 0,
+            "Devkit": 0,
+            "DevkitGameID": "",
+            "LastPlayTime": 0,
+            "tags": {},
+        }
+
+    @staticmethod
+    def read_vdf_shortcuts(vdf_path: str, strict: bool = False) -> List[Dict]:
         """
         Read existing shortcuts from VDF file
 
         Args:
             vdf_path: Path to shortcuts.vdf file
+            strict: Raise when the file exists but cannot be read or parsed,
+                instead of returning an empty list
 
         Returns:
             List of shortcut dictionaries
@@ -157,84 +277,18 @@ class SteamManager:
                 return shortcuts
 
             with open(vdf_path, "rb") as f:
-                data = f.read()
-
-            # VDF binary format parsing (simplified)
-            # This is a basic implementation - Steam's VDF format is complex
-            # For production use, consider using a VDF parsing library
-
-            # Skip header ("shortcuts")
-            offset = 0
-            while offset < len(data):
-                if data[offset : offset + 10] == b"shortcuts\x00":
-                    offset += 10
-                    break
-                offset += 1
-
-            # Parse shortcuts
-            index = 0
-            while offset < len(data) - 1:
-                if data[offset] == 0x00:  # Section start
-                    offset += 1
-                    # Read section index
-                    if offset >= len(data):
-                        break
+                data = vdf.loads_binary(f.read())
 
+            entries = vdf.find_key(data, "shortcuts", {})
+            for index, entry in enumerate(entries.values()):
+                if isinstance(entry, dict):
                     shortcut = {"index": index}
-                    index += 1
-
-                    # Parse key-value pairs
-                    while offset < len(data) - 1:
-                        type_byte = data[offset]
-
-                        if type_byte == 0x08:  # End of section
-                            offset += 1
-                            break
-                        elif type_byte == 0x01:  # String value
-                            offset += 1
-                            # Read key
-                            key_end = data.find(b"\x00", offset)
-                            if key_end == -1:
-                                break
-                            key = data[offset:key_end].decode("utf-8", errors="ignore")
-                            offset = key_end + 1
-
-                            # Read value
-                            value_end = data.find(b"\x00", offset)
-                            if value_end == -1:
-                                break
-                            value = data[offset:value_end].decode(
-                                "utf-8", errors="ignore"
-                            )
-                            offset = value_end + 1
-
-                            shortcut[key] = value
-                        elif type_byte == 0x02:  # Integer value
-                            offset += 1
-                            # Read key
-                            key_end = data.find(b"\x00", offset)
-                            if key_end == -1:
-                                break
-                            key = data[offset:key_end].decode("utf-8", errors="ignore")
-                            offset = key_end + 1
-
-                            # Read 4-byte integer
-                            if offset + 4 > len(data):
-                                break
-                            value = struct.unpack("<I", data[offset : offset + 4])[0]
-                            offset += 4
-
-                            shortcut[key] = value
-                        else:
-                            offset += 1
-
+                    shortcut.update(entry)
                     shortcuts.append(shortcut)
-                elif data[offset] == 0x08:  # End of shortcuts
-                    break
-                else:
-                    offset += 1
 
         except Exception as e:
+            if strict:
+                raise
             print(f"Error reading VDF shortcuts: {e}")
 
         return shortcuts
@@ -255,47 +309,16 @@ class SteamManager:
             # Ensure directory exists
             os.makedirs(os.path.dirname(vdf_path), exist_ok=True)
 
-            # Build VDF binary data
-            data = bytearray()
-
-            # Header
-            data.extend(b"\x00shortcuts\x00")
-
-            # Write shortcuts
+            entries = {}
             for idx, shortcut in enumerate(shortcuts):
-                # Section start
-                data.extend(b"\x00")
-                data.extend(str(idx).encode("utf-8"))
-                data.extend(b"\x00")
-
-                # Write key-value pairs
-                for key, value in shortcut.items():
-                    if key == "index":
-                        continue
+                entries[str(idx)] = {k: v for k, v in shortcut.items() if k != "index"}
+            data = vdf.dumps_binary({"shortcuts": entries})
 
-                    if isinstance(value, str):
-                        # String value
-                        data.extend(b"\x01")
-                        data.extend(key.encode("utf-8"))
-                        data.extend(b"\x00")
-                        data.extend(value.encode("utf-8"))
-                        data.extend(b"\x00")
-                    elif isinstance(value, int):
-                        # Integer value
-                        data.extend(b"\x02")
-                        data.extend(key.encode("utf-8"))
-                        data.extend(b"\x00")
-                        data.extend(struct.pack("<I", value))
-
-                # Section end
-                data.extend(b"\x08")
-
-            # File end markers
-            data.extend(b"\x08\x08")
-
-            # Write to file
-            with open(vdf_path, "wb") as f:
+            # Write to a temporary file first so Steam never sees a partial file
+            tmp_path = f"{vdf_path}.tmp"
+            with open(tmp_path, "wb") as f:
                 f.write(data)
+            os.replace(tmp_path, vdf_path)
 
             return True, "SUCCESS: Shortcuts saved"
 
@@ -356,27 +379,10 @@ class SteamManager:
                         f"ERROR: Game '{app_name}' already exists in Steam library",
                     )
 
-            # Set start directory
-            if start_dir is None:
-                start_dir = os.path.dirname(exe_path)
-
             # Create new shortcut
-            new_shortcut = {
-                "appname": app_name,
-                "exe": f'"{exe_path}"',
-                "StartDir": f'"{start_dir}"',
-                "icon": "",
-                "ShortcutPath": "",
-                "LaunchOptions": launch_options,
-                "IsHidden": 0,
-                "AllowDesktopConfig": 1,
-                "AllowOverlay": 1,
-                "OpenVR": 0,
-                "Devkit": 0,
-                "DevkitGameID": "",
-                "LastPlayTime": 0,
-                "tags": {},
-            }
+            new_shortcut = SteamManager.build_shortcut(
+                exe_path, app_name, launch_options, start_dir
+            )
 
             # Add to shortcuts list
             shortcuts.append(new_shortcut)
@@ -15,13 +15,27 @@ from src.core.installers import (
     setup_locale,
     check_locale_status,
     setup_fonts,
+    download_and_install_fonts,
     check_fonts_status,
     get_fonts_count,
     list_available_fonts,
+    list_cached_fonts,
 )
 from src.utils.locale import t, is_chinese
 from src.core.nonsteam_manager import NonSteamManager
+from src.core.shortcut_sync import ShortcutSync
+from src.core.prefix import (
+    SaveBackupManager,
+    backup_saves,
+    delete_prefixes,
+    find_orphaned_prefixes,
+    get_known_app_names,
+    restore_saves,
+    set_prefix_codepages,
+)
 from src.core.game_launcher import get_locale_command
+from src.core.downloader import CancellationToken
+from src.core.progress import STAGE_DOWNLOAD, ProgressBus, ProgressEvent, TerminalSink
 from src.config import Config, TargetLanguage
 
 
@@ -213,6 +227,41 @@ class GUIApplication(ctk.CTk):
         if not self.target_language:
             self.after(100, self._show_language_dialog)
 
+        # Revalidate the cached font list once startup has settled
+        self.after(3000, lambda: self.after_idle(self._prefetch_font_list))
+
+        # Share the download cache with other Decks on the LAN if enabled
+        self.peer_server = None
+        if Config.get_peer_cache_serve():
+            self.after_idle(self._start_peer_cache)
+
+    def _prefetch_font_list(self):
+        """Refresh stale release metadata in the background (ETag request)"""
+        if list_cached_fonts()[1]:
+            return
+        threading.Thread(target=list_available_fonts, daemon=True).start()
+
+    def _start_peer_cache(self):
+        """Serve the download cache to LAN peers"""
+        from src.core.downloader import FontReleaseDownloader
+
+        try:
+            self.peer_server = FontReleaseDownloader().serve_peer_cache()
+        except OSError as e:
+            self._log(
+                t("peer_cache_failed", f"无法启动局域网缓存: {e}", f"Failed to start peer cache: {e}"),
+                "error",
+            )
+            return
+        self._log(
+            t(
+                "peer_cache_started",
+                f"正在局域网共享字体下载 (端口 {self.peer_server.port})",
+                f"Sharing font downloads on the LAN (port {self.peer_server.port})",
+            ),
+            "info",
+        )
+
     def _create_header(self):
         """Create header with title and language button"""
         header_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -448,6 +497,14 @@ class GUIApplication(ctk.CTk):
         )
         self.locale_install_btn.grid(row=0, column=0, pady=10)
 
+        # Non-Unicode games also need the prefix's codepage set
+        ctk.CTkButton(
+            btn_frame,
+            text=t("set_codepages", "设置 Proton 前缀代码页", "Set Proton Prefix Codepages"),
+            width=200,
+            command=self._set_prefix_codepages,
+        ).grid(row=1, column=0, pady=(0, 10))
+
         # Steps frame
         steps_frame = ctk.CTkFrame(scroll)
         steps_frame.grid(row=2, column=0, padx=20, pady=10, sticky="ew")
@@ -615,7 +672,37 @@ class GUIApplication(ctk.CTk):
             btn_frame,
             text=t("delete_game", "删除游戏", "Delete Game"),
             command=self._delete_nonsteam_game,
-        ).grid(row=0, column=2)
+        ).grid(row=0, column=2, padx=(0, 10))
+
+        ctk.CTkButton(
+            btn_frame,
+            text=t("sync_steam", "同步到 Steam", "Sync with Steam"),
+            command=self._sync_nonsteam_games,
+        ).grid(row=0, column=3, padx=(0, 10))
+
+        ctk.CTkButton(
+            btn_frame,
+            text=t("clean_prefixes", "清理残留前缀", "Clean Orphaned Prefixes"),
+            command=self._clean_orphaned_prefixes,
+        ).grid(row=0, column=4)
+
+        ctk.CTkButton(
+            btn_frame,
+            text=t("build_templates", "生成前缀模板", "Build Prefix Templates"),
+            command=self._build_prefix_templates,
+        ).grid(row=1, column=0, padx=(0, 10), pady=(10, 0))
+
+        ctk.CTkButton(
+            btn_frame,
+            text=t("backup_saves", "备份存档", "Back Up Saves"),
+            command=self._backup_saves,
+        ).grid(row=1, column=1, padx=(0, 10), pady=(10, 0))
+
+        ctk.CTkButton(
+            btn_frame,
+            text=t("restore_saves", "恢复存档", "Restore Saves"),
+            command=self._show_save_restore,
+        ).grid(row=1, column=2, padx=(0, 10), pady=(10, 0))
 
         # Refresh games list initially
         self.after(200, self._refresh_games_list)
@@ -870,6 +957,24 @@ class GUIApplication(ctk.CTk):
 
         threading.Thread(target=task, daemon=True).start()
 
+    def _set_prefix_codepages(self):
+        """Apply the target language's codepage to all Proton prefixes"""
+        if not self.target_language:
+            self._show_language_dialog()
+            return
+
+        self._log(
+            t("setting_codepages", "正在设置前缀代码页...", "Setting prefix codepages..."),
+            "info",
+        )
+        lang = self.target_language
+
+        def task():
+            success, msg = set_prefix_codepages(lang)
+            self.after(0, lambda: self._on_task_complete(success, msg))
+
+        threading.Thread(target=task, daemon=True).start()
+
     def _on_task_complete(self, success: bool, message: str):
         """Handle task completion"""
         if success:
@@ -882,6 +987,14 @@ class GUIApplication(ctk.CTk):
 
     def _install_fonts_github(self):
         """Install fonts from GitHub"""
+        # Show the last known list at once and revalidate it in the background
+        cached_assets, fresh = list_cached_fonts()
+        if cached_assets:
+            dialog = self._show_font_selection(cached_assets)
+            if not fresh:
+                self._revalidate_font_list(cached_assets, dialog)
+            return
+
         # 禁用按钮并修改文本显示处理中
         self.font_download_btn.configure(
             state="disabled", text=t("downloading", "处理中...", "Working...")
@@ -946,6 +1059,27 @@ class GUIApplication(ctk.CTk):
 
         threading.Thread(target=fetch_and_show, daemon=True).start()
 
+    def _revalidate_font_list(self, assets, dialog):
+        """Fetch the font list and reopen the picker if it changed"""
+
+        def key(items):
+            return [(a.name, a.size, a.download_url) for a in items]
+
+        def task():
+            success, new_assets = list_available_fonts()
+            if not success or key(new_assets) == key(assets):
+                return
+
+            def update_ui():
+                self._log(t("font_list_updated", "字体列表已更新", "Font list updated"), "info")
+                if dialog.winfo_exists():
+                    dialog.destroy()
+                    self._show_font_selection(new_assets)
+
+            self.after(0, update_ui)
+
+        threading.Thread(target=task, daemon=True).start()
+
     def _show_font_selection(self, assets):
         """Show font selection dialog"""
         dialog = ctk.CTkToplevel(self)
@@ -966,21 +1100,26 @@ class GUIApplication(ctk.CTk):
         scroll_frame = ctk.CTkScrollableFrame(dialog)
         scroll_frame.grid(row=1, column=0, padx=20, pady=5, sticky="nsew")
 
-        self.font_radio_var = tk.StringVar(value="0")
+        font_vars = []
         for i, asset in enumerate(assets):
             size_mb = asset.size / (1024 * 1024)
-            ctk.CTkRadioButton(
+            var = tk.BooleanVar(value=i == 0)
+            ctk.CTkCheckBox(
                 scroll_frame,
                 text=f"{asset.name} ({size_mb:.2f} MB)",
-                variable=self.font_radio_var,
-                value=str(i),
+                variable=var,
             ).pack(anchor="w", pady=5)
+            font_vars.append(var)
 
         def on_install():
-            idx = int(self.font_radio_var.get())
-            asset = assets[idx]
+            selected = [asset for asset, var in zip(assets, font_vars) if var.get()]
+            if not selected:
+                return
             dialog.destroy()
-            self._download_and_install_font(asset)
+            if len(selected) == 1:
+                self._download_and_install_font(selected[0])
+            else:
+                self._download_and_install_fonts(selected)
 
         btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
         btn_frame.grid(row=2, column=0, pady=15)
@@ -998,9 +1137,10 @@ class GUIApplication(ctk.CTk):
         y = self.winfo_y() + (self.winfo_height() - 350) // 2
         dialog.geometry(f"+{x}+{y}")
         dialog.after(100, lambda: dialog.grab_set())
+        return dialog
 
     def _download_and_install_font(self, asset):
-        """Download font with progress dialog, then confirm before installing"""
+        """Download and install a font package with a progress dialog"""
         dialog = ctk.CTkToplevel(self)
         dialog.title(t("downloading", "下载中", "Downloading"))
         dialog.geometry("480x280")
@@ -1043,14 +1183,14 @@ class GUIApplication(ctk.CTk):
 
         # Track download state
         download_state = {
-            "cancelled": False,
             "success": False,
-            "zip_path": None,
-            "error_msg": None,
+            "message": None,
         }
+        cancel_token = CancellationToken()
 
         def on_cancel():
-            download_state["cancelled"] = True
+            # Closes the connection at once and drops the partial file
+            cancel_token.cancel(keep_partial=False)
             self.status_label.configure(
                 text=t("cancelling", "正在取消...", "Cancelling...")
             )
@@ -1067,40 +1207,34 @@ class GUIApplication(ctk.CTk):
         dialog.geometry(f"+{x}+{y}")
         dialog.after(100, lambda: dialog.grab_set())
 
-        def update_progress(downloaded: int, total: int):
-            """Update progress bar from download callback"""
-            if total > 0:
-                percent = downloaded / total
-                mb_downloaded = downloaded / (1024 * 1024)
-                mb_total = total / (1024 * 1024)
+        def on_progress(event: ProgressEvent):
+            """GUI progress sink, called at most ~10 times per second by the bus"""
+            if event.stage == STAGE_DOWNLOAD:
+                status = t("downloading", "下载中...", "Downloading...")
+            else:
+                # Tar packs are extracted while they download
+                status = t("installing", "安装中...", "Installing...")
 
-                def do_update():
-                    self.progress_bar.set(percent)
+            def do_update():
+                if event.stage == STAGE_DOWNLOAD:
+                    self.progress_bar.set(event.get_fraction())
                     self.progress_label.configure(
-                        text=f"{percent * 100:.1f}%  {mb_downloaded:.2f} / {mb_total:.2f} MB"
-                    )
-                    self.status_label.configure(
-                        text=t("downloading", "下载中...", "Downloading...")
+                        text=f"{event.get_fraction() * 100:.1f}%  {event.format_amount()}  {event.format_rate()}"
                     )
+                self.status_label.configure(text=status)
 
-                self.after(0, do_update)
+            self.after(0, do_update)
 
-        def download_task():
-            """Background download task"""
-            from src.core.downloader import FontReleaseDownloader
+        progress = ProgressBus([TerminalSink(), on_progress])
 
+        def download_task():
+            """Background download and install task"""
             try:
-                downloader = FontReleaseDownloader()
-                success, msg, zip_path = downloader.download_font(
-                    asset, update_progress
+                success, msg = download_and_install_fonts(
+                    asset, progress=progress, cancel_token=cancel_token
                 )
 
-                if download_state["cancelled"]:
-                    if zip_path and os.path.exists(zip_path):
-                        try:
-                            os.remove(zip_path)
-                        except:
-                            pass
+                if cancel_token.is_cancelled:
                     self.after(0, dialog.destroy)
                     self.after(
                         0,
@@ -1112,14 +1246,13 @@ class GUIApplication(ctk.CTk):
                     return
 
                 download_state["success"] = success
-                download_state["zip_path"] = zip_path
-                download_state["error_msg"] = msg
+                download_state["message"] = msg
 
                 self.after(0, on_download_complete)
 
             except Exception as e:
                 download_state["success"] = False
-                download_state["error_msg"] = str(e)
+                download_state["message"] = str(e)
                 self.after(0, on_download_complete)
 
         def on_download_complete():
@@ -1130,59 +1263,29 @@ class GUIApplication(ctk.CTk):
 
             dialog.protocol("WM_DELETE_WINDOW", dialog.destroy)
 
-            if download_state["success"] and download_state["zip_path"]:
+            if download_state["success"]:
                 self.progress_bar.set(1)
                 self.progress_label.configure(
                     text="100%  " + t("complete", "完成", "Complete")
                 )
                 self.status_label.configure(
-                    text=t(
-                        "download_success",
-                        "下载成功！点击安装按钮开始安装字体。",
-                        "Download successful! Click Install to begin.",
-                    ),
+                    text=t("install_success", "字体安装完成", "Fonts installed"),
                     text_color="#2FA572",
                 )
-
-                self._log(
-                    t(
-                        "download_complete",
-                        f"下载完成: {asset.name}",
-                        f"Download complete: {asset.name}",
-                    ),
-                    "success",
-                )
-
-                def on_install():
-                    dialog.destroy()
-                    self._install_downloaded_font(
-                        download_state["zip_path"], asset.name
-                    )
-
-                def on_close():
-                    dialog.destroy()
-                    self._log(
-                        t("install_skipped", "已跳过安装", "Installation skipped"),
-                        "warning",
-                    )
+                self._on_task_complete(True, download_state["message"])
 
-                ctk.CTkButton(
-                    self.dl_btn_frame,
-                    text=t("install", "安装", "Install"),
-                    command=on_install,
-                ).pack(side="left", padx=10)
                 ctk.CTkButton(
                     self.dl_btn_frame,
                     text=t("close", "关闭", "Close"),
-                    command=on_close,
-                ).pack(side="left", padx=10)
+                    command=dialog.destroy,
+                ).pack()
             else:
                 self.status_label.configure(
                     text=t("download_failed", "下载失败", "Download failed"),
                     text_color="#E74C3C",
                 )
 
-                error_msg = download_state["error_msg"] or t(
+                error_msg = download_state["message"] or t(
                     "unknown_error", "未知错误", "Unknown error"
                 )
                 self._log(
@@ -1210,26 +1313,135 @@ class GUIApplication(ctk.CTk):
         )
         threading.Thread(target=download_task, daemon=True).start()
 
-    def _install_downloaded_font(self, zip_path: str, asset_name: str):
-        """Install font from downloaded zip file"""
+    def _download_and_install_fonts(self, assets):
+        """Download and install several font packages concurrently"""
+        from src.core.downloader import DownloadManager
+
+        dialog = ctk.CTkToplevel(self)
+        dialog.title(t("downloading", "下载中", "Downloading"))
+        dialog.geometry("520x420")
+        dialog.transient(self)
+        dialog.grid_columnconfigure(0, weight=1)
+        dialog.grid_rowconfigure(0, weight=1)
+
+        list_frame = ctk.CTkScrollableFrame(dialog)
+        list_frame.grid(row=0, column=0, padx=20, pady=(20, 5), sticky="nsew")
+        list_frame.grid_columnconfigure(0, weight=1)
+
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.grid(row=1, column=0, pady=15)
+
+        rows = {}
+        queue_state = {"finished": False}
+        state_text = {
+            "queued": t("queued", "等待中", "Queued"),
+            "running": t("downloading", "下载中...", "Downloading..."),
+            "paused": t("paused", "已暂停", "Paused"),
+            "done": t("complete", "完成", "Complete"),
+            "failed": t("download_failed", "下载失败", "Download failed"),
+            "cancelled": t("download_cancelled", "下载已取消", "Download cancelled"),
+        }
+
+        def refresh(job):
+            row = rows.get(job.asset.name)
+            if row is None or not dialog.winfo_exists():
+                return
+            text = state_text.get(job.state, job.state)
+            if job.progress is not None and job.progress.stage == STAGE_DOWNLOAD:
+                row["bar"].set(job.progress.get_fraction())
+                if job.state == "running":
+                    text = f"{job.progress.get_fraction() * 100:.1f}%  {job.progress.format_rate()}"
+            if job.state == "done":
+                row["bar"].set(1)
+            row["status"].configure(text=text)
+            row["pause"].configure(
+                text=t("resume", "继续", "Resume")
+                if job.state == "paused"
+                else t("pause", "暂停", "Pause"),
+                state="disabled" if job.is_finished() else "normal",
+            )
+            if all(j.is_finished() for j in manager.jobs):
+                on_all_finished()
+
+        manager = DownloadManager(
+            on_update=lambda job: self.after(0, lambda: refresh(job))
+        )
+
+        def on_all_finished():
+            if queue_state["finished"]:
+                return
+            queue_state["finished"] = True
+            # Joining the loop thread must not block the Tk thread
+            threading.Thread(target=manager.shutdown, daemon=True).start()
+            dialog.protocol("WM_DELETE_WINDOW", dialog.destroy)
+            for widget in btn_frame.winfo_children():
+                widget.destroy()
+
+            for job in manager.jobs:
+                if job.state == "done":
+                    self._log(job.message, "success")
+                elif job.state == "failed":
+                    self._log(
+                        t(
+                            "download_error",
+                            f"下载失败: {job.message}",
+                            f"Download failed: {job.message}",
+                        ),
+                        "error",
+                    )
+            self._refresh_status()
+
+            ctk.CTkButton(
+                btn_frame, text=t("close", "关闭", "Close"), command=dialog.destroy
+            ).pack(side="left", padx=10)
+
+        for i, asset in enumerate(assets):
+            job = manager.submit(asset, install=True)
+            ctk.CTkLabel(list_frame, text=asset.name, text_color="#3B8ED0").grid(
+                row=i * 2, column=0, columnspan=3, padx=5, pady=(8, 0), sticky="w"
+            )
+            bar = ctk.CTkProgressBar(list_frame, width=260)
+            bar.grid(row=i * 2 + 1, column=0, padx=5, sticky="w")
+            bar.set(0)
+            status = ctk.CTkLabel(list_frame, text=state_text["queued"], text_color="gray")
+            status.grid(row=i * 2 + 1, column=1, padx=5, sticky="w")
+
+            def toggle_pause(job=job):
+                if job.state == "paused":
+                    job.resume()
+                else:
+                    job.pause()
+
+            pause_btn = ctk.CTkButton(
+                list_frame, text=t("pause", "暂停", "Pause"), width=60, command=toggle_pause
+            )
+            pause_btn.grid(row=i * 2 + 1, column=2, padx=5)
+            rows[asset.name] = {"bar": bar, "status": status, "pause": pause_btn}
+
+        def on_cancel_all():
+            manager.cancel_all()
+
+        dialog.protocol("WM_DELETE_WINDOW", on_cancel_all)
+        ctk.CTkButton(
+            btn_frame, text=t("cancel", "取消", "Cancel"), command=on_cancel_all
+        ).pack()
+
+        # Center and grab after content is created
+        dialog.update_idletasks()
+        x = self.winfo_x() + (self.winfo_width() - 520) // 2
+        y = self.winfo_y() + (self.winfo_height() - 420) // 2
+        dialog.geometry(f"+{x}+{y}")
+        dialog.after(100, lambda: dialog.grab_set())
+
         self._log(
             t(
-                "installing_font",
-                f"正在安装字体: {asset_name}...",
-                f"Installing font: {asset_name}...",
+                "starting_download",
+                f"开始下载 {len(assets)} 个字体包...",
+                f"Starting download of {len(assets)} font packages...",
             ),
             "info",
         )
 
-        def task():
-            try:
-                success, msg = setup_fonts(zip_path)
-                self.after(0, lambda: self._on_task_complete(success, msg))
-            except Exception as e:
-                self.after(0, lambda: self._on_task_complete(False, str(e)))
-
-        threading.Thread(target=task, daemon=True).start()
-
     def _install_fonts_local(self):
         """Install fonts from local file"""
         file_path = filedialog.askopenfilename(
@@ -1501,6 +1713,224 @@ class GUIApplication(ctk.CTk):
             show_error(self, t("error", "错误", "Error"), msg)
         self._refresh_games_list()
 
+    def _sync_nonsteam_games(self):
+        """Sync managed games with Steam shortcuts in the background"""
+        self._log(t("syncing_steam", "正在与 Steam 同步...", "Syncing with Steam..."), "info")
+
+        def task():
+            success, msg = NonSteamManager.sync_with_steam()
+
+            def done():
+                self._log(msg, "success" if success else "error")
+                self._refresh_games_list()
+
+            self.after(0, done)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def _build_prefix_templates(self):
+        """Build prefix templates for the compat tools of managed games"""
+        self._log(
+            t("building_templates", "正在生成前缀模板...", "Building prefix templates..."),
+            "info",
+        )
+
+        def task():
+            success, msg = ShortcutSync.build_prefix_templates()
+            self.after(0, lambda: self._log(msg, "success" if success else "error"))
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def _backup_saves(self):
+        """Back up the saves of every Proton prefix"""
+        self._log(t("backing_up_saves", "正在备份存档...", "Backing up saves..."), "info")
+
+        def task():
+            success, msg = backup_saves()
+            self.after(0, lambda: self._on_task_complete(success, msg))
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def _show_save_restore(self):
+        """Let the user pick a game and one of its backups to restore"""
+        backups = SaveBackupManager()
+        appids = backups.list_games()
+        if not appids:
+            self._log(t("no_backups", "没有存档备份", "No save backups found"), "info")
+            return
+        names = get_known_app_names()
+
+        dialog = ctk.CTkToplevel(self)
+        dialog.title(t("restore_saves", "恢复存档", "Restore Saves"))
+        dialog.geometry("520x420")
+        dialog.transient(self)
+
+        dialog.grid_columnconfigure(0, weight=1)
+        dialog.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(
+            dialog,
+            text=t("select_backup", "选择要恢复的游戏和备份:", "Select a game and backup to restore:"),
+            font=ctk.CTkFont(size=14, weight="bold"),
+        ).grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
+
+        scroll_frame = ctk.CTkScrollableFrame(dialog)
+        scroll_frame.grid(row=1, column=0, padx=20, pady=5, sticky="nsew")
+
+        appid_var = tk.StringVar(value=appids[0])
+        backup_var = tk.StringVar()
+        backup_menu = ctk.CTkOptionMenu(dialog, variable=backup_var, values=[""])
+        backup_menu.grid(row=2, column=0, padx=20, pady=(10, 0), sticky="w")
+
+        def on_game_selected():
+            # Newest first
+            backup_ids = list(reversed(backups.list_backups(appid_var.get())))
+            backup_menu.configure(values=backup_ids)
+            backup_var.set(backup_ids[0])
+
+        unknown = t("unknown_game", "未知游戏", "Unknown game")
+        for appid in appids:
+            name = names.get(int(appid), "") if appid.isdigit() else ""
+            ctk.CTkRadioButton(
+                scroll_frame,
+                text=f"{appid}  {name or unknown}",
+                variable=appid_var,
+                value=appid,
+                command=on_game_selected,
+            ).pack(anchor="w", pady=5)
+        on_game_selected()
+
+        def on_restore():
+            appid, backup_id = appid_var.get(), backup_var.get()
+            if not ask_yes_no(
+                dialog,
+                t("confirm", "确认", "Confirm"),
+                t(
+                    "confirm_restore_saves",
+                    f"用备份 {backup_id} 覆盖 {appid} 的当前存档?",
+                    f"Overwrite the current saves of {appid} with backup {backup_id}?",
+                ),
+            ):
+                return
+            dialog.destroy()
+
+            def task():
+                success, msg = restore_saves(appid, backup_id, backups)
+                self.after(0, lambda: self._on_task_complete(success, msg))
+
+            threading.Thread(target=task, daemon=True).start()
+
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.grid(row=3, column=0, pady=15)
+
+        ctk.CTkButton(
+            btn_frame, text=t("restore", "恢复", "Restore"), command=on_restore
+        ).pack(side="left", padx=10)
+        ctk.CTkButton(
+            btn_frame, text=t("cancel", "取消", "Cancel"), command=dialog.destroy
+        ).pack(side="left", padx=10)
+
+        # Center and grab after content is created
+        dialog.update_idletasks()
+        x = self.winfo_x() + (self.winfo_width() - 520) // 2
+        y = self.winfo_y() + (self.winfo_height() - 420) // 2
+        dialog.geometry(f"+{x}+{y}")
+        dialog.after(100, lambda: dialog.grab_set())
+
+    def _clean_orphaned_prefixes(self):
+        """Find compatdata prefixes without an owner and offer to delete them"""
+        self._log(t("scanning_prefixes", "正在扫描残留前缀...", "Scanning for orphaned prefixes..."), "info")
+
+        def show(orphans):
+            if not orphans:
+                self._log(t("no_orphans", "没有残留前缀", "No orphaned prefixes found"), "success")
+                return
+            self._show_orphan_selection(orphans)
+
+        def task():
+            try:
+                orphans = find_orphaned_prefixes()
+            except OSError as e:
+                self.after(0, lambda: self._log(f"ERROR: {e}", "error"))
+                return
+            self.after(0, lambda: show(orphans))
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def _show_orphan_selection(self, orphans):
+        """Let the user pick orphaned prefixes to back up and delete"""
+        dialog = ctk.CTkToplevel(self)
+        dialog.title(t("clean_prefixes", "清理残留前缀", "Clean Orphaned Prefixes"))
+        dialog.geometry("520x380")
+        dialog.transient(self)
+
+        dialog.grid_columnconfigure(0, weight=1)
+        dialog.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(
+            dialog,
+            text=t(
+                "select_orphans",
+                "选择要删除的前缀 (存档会先备份):",
+                "Select prefixes to delete (saves are backed up first):",
+            ),
+            font=ctk.CTkFont(size=14, weight="bold"),
+        ).grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
+
+        scroll_frame = ctk.CTkScrollableFrame(dialog)
+        scroll_frame.grid(row=1, column=0, padx=20, pady=5, sticky="nsew")
+
+        unknown = t("unknown_game", "未知游戏", "Unknown game")
+        orphan_vars = []
+        for orphan in orphans:
+            var = tk.BooleanVar(value=False)
+            ctk.CTkCheckBox(
+                scroll_frame,
+                text=f"{orphan.appid}  {orphan.name or unknown}  ({orphan.get_size_mb():.0f} MB)",
+                variable=var,
+            ).pack(anchor="w", pady=5)
+            orphan_vars.append(var)
+
+        def on_deleted(success: bool, msg: str):
+            self.after(0, lambda: self._log(msg, "success" if success else "error"))
+
+        def on_delete():
+            selected = [orphan for orphan, var in zip(orphans, orphan_vars) if var.get()]
+            if not selected:
+                return
+            total_mb = sum(orphan.get_size_mb() for orphan in selected)
+            if not ask_yes_no(
+                dialog,
+                t("confirm", "确认", "Confirm"),
+                t(
+                    "confirm_clean_prefixes",
+                    f"备份存档并删除 {len(selected)} 个前缀 ({total_mb:.0f} MB)?",
+                    f"Back up saves and delete {len(selected)} prefix(es) ({total_mb:.0f} MB)?",
+                ),
+            ):
+                return
+            dialog.destroy()
+            delete_prefixes(
+                [orphan.path for orphan in selected], on_deleted, backups=SaveBackupManager()
+            )
+
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.grid(row=2, column=0, pady=15)
+
+        ctk.CTkButton(
+            btn_frame, text=t("delete_selected", "删除所选", "Delete Selected"), command=on_delete
+        ).pack(side="left", padx=10)
+        ctk.CTkButton(
+            btn_frame, text=t("cancel", "取消", "Cancel"), command=dialog.destroy
+        ).pack(side="left", padx=10)
+
+        # Center and grab after content is created
+        dialog.update_idletasks()
+        x = self.winfo_x() + (self.winfo_width() - 520) // 2
+        y = self.winfo_y() + (self.winfo_height() - 380) // 2
+        dialog.geometry(f"+{x}+{y}")
+        dialog.after(100, lambda: dialog.grab_set())
+
     def _show_game_dialog(self, edit: bool = False):
         """Show add/edit game dialog"""
         dialog = ctk.CTkToplevel(self)
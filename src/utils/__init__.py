@@ -14,7 +14,7 @@ from .system import (
     is_zh_locale_enabled,
     is_fonts_installed,
 )
-from .path import get_home_dir, get_config_dir
+from .path import get_home_dir, get_config_dir, get_data_dir, get_cache_dir
 
 __all__ = [
     "run_command",
@@ -31,4 +31,6 @@ __all__ = [
     "is_fonts_installed",
     "get_home_dir",
     "get_config_dir",
+    "get_data_dir",
+    "get_cache_dir",
 ]
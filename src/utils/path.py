@@ -15,3 +15,17 @@ def get_config_dir() -> str:
     config_dir = os.path.join(get_home_dir(), ".config", "steamdeck-galgame")
     os.makedirs(config_dir, exist_ok=True)
     return config_dir
+
+
+def get_data_dir() -> str:
+    """Get data directory (~/.local/share/steamdeck-galgame), create if not exists"""
+    data_dir = os.path.join(get_home_dir(), ".local", "share", "steamdeck-galgame")
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+
+def get_cache_dir() -> str:
+    """Get cache directory (~/.cache/steamdeck-galgame), create if not exists"""
+    cache_dir = os.path.join(get_home_dir(), ".cache", "steamdeck-galgame")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
@@ -0,0 +1,293 @@
+"""
+Valve KeyValues (text and binary VDF) utilities module
+"""
+
+import re
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Quoted string | { | } | // comment | [$CONDITIONAL] | bare token
+_TOKEN_RE = re.compile(
+    r'"((?:[^"\\]|\\.)*)"|(\{)|(\})|//[^\n]*|\[[^\]\n]*\]|([^\s{}"]+)'
+)
+
+_ESCAPES = {"n": "\n", "t": "\t", "\\": "\\", '"': '"'}
+
+
+def _unescape(value: str) -> str:
+    """Resolve backslash escapes in a quoted VDF string"""
+    if "\\" not in value:
+        return value
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(0)), value)
+
+
+def loads(text: str) -> Dict[str, Any]:
+    """
+    Parse text VDF into nested dictionaries
+
+    Args:
+        text: VDF document
+
+    Returns:
+        Nested dictionary, string leaves
+    """
+    root: Dict[str, Any] = {}
+    stack = [root]
+    key: Optional[str] = None
+
+    for match in _TOKEN_RE.finditer(text):
+        quoted, open_brace, close_brace, bare = match.groups()
+        if open_brace:
+            child: Dict[str, Any] = {}
+            stack[-1][key if key is not None else ""] = child
+            stack.append(child)
+            key = None
+        elif close_brace:
+            if len(stack) > 1:
+                stack.pop()
+            key = None
+        elif quoted is not None or bare is not None:
+            token = _unescape(quoted) if quoted is not None else bare
+            if key is None:
+                key = token
+            else:
+                stack[-1][key] = token
+                key = None
+
+    return root
+
+
+def load(path: str) -> Dict[str, Any]:
+    """Parse a text VDF file"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return loads(f.read())
+
+
+def find_key(data: Dict[str, Any], key: str, default: Any = None) -> Any:
+    """Case-insensitive key lookup (Steam treats VDF keys case-insensitively)"""
+    if key in data:
+        return data[key]
+    lower = key.lower()
+    for k, v in data.items():
+        if k.lower() == lower:
+            return v
+    return default
+
+
+def _escape(value: str) -> str:
+    """Escape a string for a quoted VDF token"""
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def dumps(data: Dict[str, Any], indent: int = 0) -> str:
+    """Serialize nested dictionaries to text VDF (Steam's tab-indented style)"""
+    lines = []
+    tabs = "\t" * indent
+    for key, value in data.items():
+        if isinstance(value, dict):
+            lines.append(f'{tabs}"{_escape(key)}"')
+            lines.append(f"{tabs}{{")
+            body = dumps(value, indent + 1)
+            if body:
+                lines.append(body)
+            lines.append(f"{tabs}}}")
+        else:
+            lines.append(f'{tabs}"{_escape(key)}"\t\t"{_escape(str(value))}"')
+    return "\n".join(lines)
+
+
+def _scan_blocks(text: str) -> Dict[str, Any]:
+    """
+    Locate every entry of a text VDF document
+
+    Returns:
+        Root block: {"entries": [[key, start, end, child block or None]],
+        "close": offset of the closing brace}, offsets into text
+    """
+    root: Dict[str, Any] = {"entries": [], "close": len(text)}
+    stack = [root]
+    key: Optional[str] = None
+    key_start = 0
+
+    for match in _TOKEN_RE.finditer(text):
+        quoted, open_brace, close_brace, bare = match.groups()
+        entries = stack[-1]["entries"]
+        if open_brace:
+            child: Dict[str, Any] = {"entries": [], "close": len(text)}
+            start = key_start if key is not None else match.start()
+            entries.append([key if key is not None else "", start, len(text), child])
+            stack.append(child)
+            key = None
+        elif close_brace:
+            if len(stack) > 1:
+                stack.pop()["close"] = match.start()
+                stack[-1]["entries"][-1][2] = match.end()
+            key = None
+        elif quoted is not None or bare is not None:
+            token = _unescape(quoted) if quoted is not None else bare
+            if key is None:
+                key, key_start = token, match.start()
+            else:
+                entries.append([key, key_start, match.end(), None])
+                key = None
+        elif match.group(0).startswith("[") and key is None and entries:
+            # A [$CONDITIONAL] belongs to the entry it follows
+            if not text[entries[-1][2] : match.start()].strip():
+                entries[-1][2] = match.end()
+
+    return root
+
+
+def _line_start(text: str, pos: int) -> int:
+    """Widen pos to its line start when only whitespace precedes it"""
+    start = text.rfind("\n", 0, pos) + 1
+    return start if not text[start:pos].strip() else pos
+
+
+def _line_end(text: str, pos: int) -> int:
+    """Widen pos past its newline when only whitespace follows it"""
+    end = text.find("\n", pos)
+    if end < 0:
+        return pos if text[pos:].strip() else len(text)
+    return end + 1 if not text[pos:end].strip() else pos
+
+
+def update_text(text: str, path: Sequence[str], changes: Dict[str, Optional[Any]]) -> str:
+    """
+    Set or remove entries of one block in a text VDF document
+
+    Only the changed entries are rewritten; comments, [$CONDITIONAL]s,
+    key order, duplicate keys and formatting elsewhere are kept byte for
+    byte. Missing blocks along path are created.
+
+    Args:
+        text: VDF document
+        path: Keys of the nested block (case-insensitive)
+        changes: Entry key -> new value (string or dictionary), None removes
+
+    Returns:
+        Updated document
+    """
+    node = _scan_blocks(text)
+    depth = 0
+    for key in path:
+        blocks = [e for e in node["entries"] if e[3] is not None and e[0].lower() == key.lower()]
+        if not blocks:
+            break
+        # Later duplicates win, as in loads()
+        node = blocks[-1][3]
+        depth += 1
+
+    edits: List[Tuple[int, int, str]] = []
+    added = {key: value for key, value in changes.items() if value is not None}
+    if depth == len(path):
+        for key, value in changes.items():
+            matches = [e for e in node["entries"] if e[0].lower() == key.lower()]
+            for entry in matches:
+                start, end = _line_start(text, entry[1]), _line_end(text, entry[2])
+                body = ""
+                if entry is matches[-1] and value is not None:
+                    body = dumps({key: value}, depth) + "\n"
+                    added.pop(key)
+                edits.append((start, end, body))
+    elif added:
+        for key in reversed(path[depth:]):
+            added = {key: added}
+
+    if added:
+        pos = _line_start(text, node["close"])
+        body = dumps(added, depth) + "\n"
+        if pos and text[pos - 1] != "\n":
+            body = "\n" + body
+        edits.append((pos, pos, body))
+
+    for start, end, body in sorted(edits, reverse=True):
+        text = text[:start] + body + text[end:]
+    return text
+
+
+# Binary VDF type bytes
+BIN_MAP = 0x00
+BIN_STRING = 0x01
+BIN_INT32 = 0x02
+BIN_FLOAT32 = 0x03
+BIN_UINT64 = 0x07
+BIN_END = 0x08
+
+
+def _read_cstring(data: bytes, offset: int) -> Tuple[str, int]:
+    """Read a NUL-terminated UTF-8 string, returns (string, next offset)"""
+    end = data.index(b"\x00", offset)
+    return data[offset:end].decode("utf-8", errors="replace"), end + 1
+
+
+def _loads_binary_map(data: bytes, offset: int) -> Tuple[Dict[str, Any], int]:
+    """Parse binary VDF entries until the map's end marker"""
+    result: Dict[str, Any] = {}
+    while offset < len(data):
+        type_byte = data[offset]
+        offset += 1
+        if type_byte == BIN_END:
+            return result, offset
+
+        key, offset = _read_cstring(data, offset)
+        if type_byte == BIN_MAP:
+            result[key], offset = _loads_binary_map(data, offset)
+        elif type_byte == BIN_STRING:
+            result[key], offset = _read_cstring(data, offset)
+        elif type_byte == BIN_INT32:
+            result[key] = struct.unpack_from("<I", data, offset)[0]
+            offset += 4
+        elif type_byte == BIN_FLOAT32:
+            result[key] = struct.unpack_from("<f", data, offset)[0]
+            offset += 4
+        elif type_byte == BIN_UINT64:
+            result[key] = struct.unpack_from("<Q", data, offset)[0]
+            offset += 8
+        else:
+            raise ValueError(f"Unknown binary VDF type 0x{type_byte:02x} at {offset - 1}")
+    return result, offset
+
+
+def loads_binary(data: bytes) -> Dict[str, Any]:
+    """
+    Parse binary VDF (shortcuts.vdf format) into nested dictionaries
+
+    Integers are returned unsigned, floats as float.
+    """
+    result, _ = _loads_binary_map(data, 0)
+    return result
+
+
+def dumps_binary(data: Dict[str, Any]) -> bytes:
+    """Serialize nested dictionaries to binary VDF"""
+    out = bytearray()
+
+    def write_map(mapping: Dict[str, Any]):
+        for key, value in mapping.items():
+            name = str(key).encode("utf-8") + b"\x00"
+            if isinstance(value, dict):
+                out.append(BIN_MAP)
+                out.extend(name)
+                write_map(value)
+            elif isinstance(value, float):
+                out.append(BIN_FLOAT32)
+                out.extend(name)
+                out.extend(struct.pack("<f", value))
+            elif isinstance(value, int):
+                if -0x80000000 <= value <= 0xFFFFFFFF:
+                    out.append(BIN_INT32)
+                    out.extend(name)
+                    out.extend(struct.pack("<I", value & 0xFFFFFFFF))
+                else:
+                    out.append(BIN_UINT64)
+                    out.extend(name)
+                    out.extend(struct.pack("<Q", value))
+            else:
+                out.append(BIN_STRING)
+                out.extend(name)
+                out.extend(str(value).encode("utf-8") + b"\x00")
+        out.append(BIN_END)
+
+    write_map(data)
+    return bytes(out)
@@ -37,6 +37,7 @@ a = Analysis(
         'src.core',
         'src.core.downloader',
         'src.core.installers',
+        'src.core.prefix',
         'src.utils',
         'src.config',
         'requests',
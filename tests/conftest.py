@@ -0,0 +1,157 @@
+"""
+Shared test fixtures
+"""
+
+import hashlib
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.config import Config
+from src.core.nonsteam_manager import NonSteamManager
+from src.core.steam_manager import SteamManager
+
+
+@pytest.fixture
+def config_home(tmp_path, monkeypatch):
+    """Point Config at an empty temporary config file"""
+    monkeypatch.setattr(Config, "_config_file", str(tmp_path / Config.CONFIG_FILE_NAME))
+    monkeypatch.setattr(Config, "_sections", {})
+    monkeypatch.setattr(Config, "_migrated", False)
+    monkeypatch.setattr(Config, "_target_language", None)
+    monkeypatch.setattr(Config, "_default_font_path", None)
+    return tmp_path
+
+
+@pytest.fixture
+def steam_root(tmp_path, monkeypatch):
+    """Point Config at an empty fake Steam installation"""
+    root = tmp_path / "steam"
+    (root / "steamapps" / "common").mkdir(parents=True)
+    (root / "userdata").mkdir()
+    monkeypatch.setattr(Config, "_steam_root", str(root))
+    monkeypatch.setattr(Config, "_steam_dir", str(root / "userdata"))
+    monkeypatch.setattr(Config, "_get_home_dir", classmethod(lambda cls: str(tmp_path)))
+    monkeypatch.setattr(SteamManager, "_library_cache", None)
+    monkeypatch.setattr(NonSteamManager, "_compat_cache", None)
+    monkeypatch.setattr(SteamManager, "is_steam_running", staticmethod(lambda: False))
+    return root
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves LocalHTTPServer.files with Range/If-Range and ETag support"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers), self.client_address))
+        if server.delay:
+            time.sleep(server.delay)
+        body = server.files.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        start, end, status = 0, len(body) - 1, 200
+        match = re.match(r"bytes=(\d*)-(\d*)$", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and server.ranges and if_range in (None, etag):
+            if not match.group(1):
+                # Suffix range: the last N bytes
+                start = max(0, len(body) - int(match.group(2)))
+            else:
+                start = int(match.group(1))
+                end = min(int(match.group(2)), end) if match.group(2) else end
+            status = 206
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        data = body[start : end + 1]
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        if server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        self.end_headers()
+
+        # Simulate a stalled connection after a number of bytes
+        stall = server.stall_after.pop(0) if server.stall_after else None
+        if stall is not None:
+            self.wfile.write(data[:stall])
+            self.wfile.flush()
+            server.unstall.wait(10)
+            self.close_connection = True
+            return
+
+        # Simulate a dropped connection after a number of bytes
+        limit = server.fail_after.pop(0) if server.fail_after else None
+        if limit is not None:
+            self.wfile.write(data[:limit])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(data)
+
+
+class LocalHTTPServer(ThreadingHTTPServer):
+    """Local stand-in for GitHub's release CDN"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RangeRequestHandler)
+        self.files = {}
+        self.requests = []
+        self.ranges = True
+        self.delay = 0.0
+        self.fail_after = []
+        self.stall_after = []
+        self.unstall = threading.Event()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+def _run_http_server():
+    """Run a LocalHTTPServer in a background thread"""
+    server = LocalHTTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.unstall.set()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def http_server():
+    """Local stand-in for GitHub"""
+    yield from _run_http_server()
+
+
+@pytest.fixture
+def mirror_server():
+    """Second local server acting as a download mirror"""
+    yield from _run_http_server()
@@ -0,0 +1,106 @@
+"""
+Config section tests - run against a temporary home directory
+"""
+
+import json
+import os
+
+from src.config import Config
+
+
+def test_legacy_config_is_split_into_sections(config_home):
+    legacy = {
+        "target_language": "ja",
+        "managed_games": [{"name": "Game", "exe_path": "/games/game.exe"}],
+    }
+    (config_home / Config.CONFIG_FILE_NAME).write_text(json.dumps(legacy))
+
+    assert Config.get_target_language() == "ja"
+    assert Config.get_managed_games()[0]["name"] == "Game"
+
+    settings = json.loads((config_home / Config.CONFIG_FILE_NAME).read_text())
+    games = json.loads((config_home / Config.GAMES_FILE_NAME).read_text())
+    assert "managed_games" not in settings
+    assert settings["schema_version"] == Config.SCHEMA_VERSION
+    assert games["managed_games"] == legacy["managed_games"]
+
+
+def test_settings_do_not_load_games(config_home):
+    Config.save_config({"target_language": "zh", "default_font_path": "/fonts"})
+    (config_home / Config.GAMES_FILE_NAME).write_text("not json")
+
+    assert Config.get_target_language() == "zh"
+    assert Config.get_default_font_path() == "/fonts"
+    assert Config.SECTION_GAMES not in Config._sections
+
+
+def test_add_managed_game_updates_existing(config_home):
+    Config.add_managed_game({"name": "Game", "exe_path": "/a.exe"})
+    Config.add_managed_game({"name": "Game", "exe_path": "/b.exe"})
+
+    games = Config.get_managed_games()
+    assert len(games) == 1
+    assert games[0]["exe_path"] == "/b.exe"
+    assert not os.path.exists(str(config_home / Config.CONFIG_FILE_NAME))
+
+
+def _add_games(prefix, count):
+    for i in range(count):
+        Config.add_managed_game({"name": f"{prefix}-{i}", "exe_path": f"/{prefix}/{i}.exe"})
+
+
+def test_concurrent_writers_do_not_lose_updates(config_home):
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_add_games, args=(f"p{n}", 20)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(Config.get_managed_games()) == 80
+    assert Config.get_section_version(Config.SECTION_GAMES) == 80
+
+
+def test_conflicting_save_merges_records(config_home):
+    Config.set_managed_games([{"name": "A"}])
+    games = Config.get_managed_games()
+
+    # Another process adds B after we loaded the list
+    path = config_home / Config.GAMES_FILE_NAME
+    on_disk = json.loads(path.read_text())
+    on_disk["managed_games"].append({"name": "B"})
+    on_disk["version"] += 1
+    path.write_text(json.dumps(on_disk))
+
+    games.append({"name": "C"})
+    Config.set_managed_games(games)
+
+    names = [game["name"] for game in Config.get_managed_games()]
+    assert names == ["A", "B", "C"]
+    assert Config.get_section_version(Config.SECTION_GAMES) == on_disk["version"] + 1
+
+
+def test_conflicting_save_keys_games_by_exe_path(config_home):
+    # Two versions of a game under one name
+    Config.set_managed_games(
+        [{"name": "Game", "exe_path": "/games/a.exe"}, {"name": "Game", "exe_path": "/games/b.exe"}]
+    )
+    games = Config.get_managed_games()
+
+    # Another process adds a game after we loaded the list
+    path = config_home / Config.GAMES_FILE_NAME
+    on_disk = json.loads(path.read_text())
+    on_disk["managed_games"].append({"name": "Other", "exe_path": "/games/c.exe"})
+    on_disk["version"] += 1
+    path.write_text(json.dumps(on_disk))
+
+    games[0]["compat_layer"] = "proton_9"
+    Config.set_managed_games(games)
+
+    assert Config.get_managed_games() == [
+        {"name": "Game", "exe_path": "/games/a.exe", "compat_layer": "proton_9"},
+        {"name": "Game", "exe_path": "/games/b.exe"},
+        {"name": "Other", "exe_path": "/games/c.exe"},
+    ]
@@ -0,0 +1,757 @@
+"""
+Downloader tests - run against a local HTTP server (see conftest.py)
+"""
+
+import hashlib
+import io
+import json
+import os
+import tarfile
+import zipfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from src.config import Config
+from src.core.downloader import (
+    CancellationToken,
+    DownloadCache,
+    DownloadManager,
+    FontReleaseDownloader,
+    GitHubAsset,
+    GitHubReleaseManager,
+    MirrorScores,
+    MirrorSet,
+    PeerCache,
+    PeerCacheServer,
+)
+from src.core.downloader.partial import PartialDownload
+from src.core.downloader.stream import ChunkSizer
+from src.core.installers import download_and_install_fonts
+
+
+@pytest.fixture
+def api_cache_home(tmp_path, monkeypatch):
+    """Empty release API cache under a temporary home"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(GitHubReleaseManager, "_api_cache", None)
+    return tmp_path
+
+
+def make_asset(http_server, name, data):
+    """Publish data on the local server and describe it as a release asset"""
+    http_server.files[f"/{name}"] = data
+    return GitHubAsset(name, len(data), http_server.url(f"/{name}"))
+
+
+def test_interrupted_download_resumes_with_range(http_server, tmp_path):
+    data = os.urandom(300 * 1024)
+    asset = make_asset(http_server, "fonts.zip", data)
+    dest = tmp_path / "fonts.zip"
+    manager = GitHubReleaseManager("owner", "repo")
+
+    http_server.fail_after = [100 * 1024]
+    ok, _ = manager.download_asset(asset, str(dest))
+    assert not ok
+    assert not dest.exists()
+    # The partial file is preallocated; the sidecar records the valid prefix
+    assert (tmp_path / "fonts.zip.part").stat().st_size == len(data)
+    partial_size = json.loads((tmp_path / "fonts.zip.part.json").read_text())["written"]
+    assert 0 < partial_size <= 100 * 1024
+
+    ok, _ = manager.download_asset(asset, str(dest))
+    assert ok
+    assert dest.read_bytes() == data
+    assert http_server.requests[-1][1]["Range"] == f"bytes={partial_size}-"
+    assert not (tmp_path / "fonts.zip.part").exists()
+    assert not (tmp_path / "fonts.zip.part.json").exists()
+
+
+def test_resume_restarts_when_remote_file_changed(http_server, tmp_path):
+    asset = make_asset(http_server, "fonts.zip", b"a" * 200000)
+    dest = tmp_path / "fonts.zip"
+    manager = GitHubReleaseManager("owner", "repo")
+
+    http_server.fail_after = [50000]
+    assert not manager.download_asset(asset, str(dest))[0]
+
+    # Same size, new content: If-Range no longer matches, server sends it all
+    asset = make_asset(http_server, "fonts.zip", b"b" * 200000)
+    assert manager.download_asset(asset, str(dest))[0]
+    assert dest.read_bytes() == b"b" * 200000
+
+
+def test_large_asset_downloads_in_segments_and_retries_failed_one(http_server, tmp_path):
+    data = os.urandom(1024 * 1024 + 123)
+    asset = make_asset(http_server, "fonts.zip", data)
+    manager = GitHubReleaseManager("owner", "repo", segments=4)
+    manager.SEGMENT_MIN_SIZE = 1024
+
+    # The probe succeeds, the first segment request drops halfway
+    http_server.fail_after = [None, 100 * 1024]
+    ok, _ = manager.download_asset(asset, str(tmp_path / "fonts.zip"))
+    assert ok
+    assert (tmp_path / "fonts.zip").read_bytes() == data
+
+    ranges = [request[1].get("Range") for request in http_server.requests]
+    assert ranges[0] == "bytes=0-0"
+    # 4 segments plus one retry that continues where the dropped one stopped
+    assert len(ranges) == 6
+    assert all(request[1].get("If-Range") for request in http_server.requests[1:])
+
+
+def test_segment_progress_is_saved_only_after_its_data_is_synced(
+    http_server, tmp_path, monkeypatch
+):
+    data = os.urandom(512 * 1024)
+    asset = make_asset(http_server, "fonts.zip", data)
+    events = []
+    monkeypatch.setattr(os, "fdatasync", lambda fd: events.append("sync"))
+    save = PartialDownload.save
+    monkeypatch.setattr(
+        PartialDownload, "save", lambda self, state: (events.append("save"), save(self, state))
+    )
+    manager = GitHubReleaseManager("owner", "repo", segments=4, sync_interval=0)
+    manager.SEGMENT_MIN_SIZE = 1024
+
+    assert manager.download_asset(asset, str(tmp_path / "fonts.zip"))[0]
+    # The first save only records the empty segment layout
+    saves = [index for index, event in enumerate(events) if event == "save"][1:]
+    assert saves and all(events[index - 1] == "sync" for index in saves)
+
+
+def test_segmented_download_falls_back_without_range_support(http_server, tmp_path):
+    data = os.urandom(200 * 1024)
+    asset = make_asset(http_server, "fonts.zip", data)
+    http_server.ranges = False
+    manager = GitHubReleaseManager("owner", "repo", segments=4)
+    manager.SEGMENT_MIN_SIZE = 1024
+
+    assert manager.download_asset(asset, str(tmp_path / "fonts.zip"))[0]
+    assert (tmp_path / "fonts.zip").read_bytes() == data
+    assert len(http_server.requests) == 2
+
+
+def test_release_metadata_uses_etag_and_pooled_connection(http_server, api_cache_home):
+    asset = {"name": "fonts.zip", "size": 3, "browser_download_url": http_server.url("/fonts.zip")}
+    release = {"tag_name": "v2", "assets": [asset]}
+    http_server.files["/repos/o/r/releases/latest"] = json.dumps(release).encode()
+    manager = GitHubReleaseManager("o", "r")
+    manager.api_url = http_server.url("/repos/o/r")
+
+    assert manager.get_release_info()["version"] == "v2"
+    assert manager.get_release_assets()[0].name == "fonts.zip"
+
+    first, second = http_server.requests
+    assert "If-None-Match" not in first[1]
+    assert second[1]["If-None-Match"]
+    # Keep-alive: both requests arrive on the same connection
+    assert first[2] == second[2]
+
+    # A fresh process still has the stored ETag and body
+    GitHubReleaseManager._api_cache = None
+    assert manager.get_latest_release() == release
+    assert http_server.requests[-1][1]["If-None-Match"] == second[1]["If-None-Match"]
+
+
+def test_release_metadata_is_served_stale_and_offline(http_server, api_cache_home, monkeypatch):
+    asset = {"name": "fonts.zip", "size": 3, "browser_download_url": http_server.url("/fonts.zip")}
+    http_server.files["/repos/o/r/releases/latest"] = json.dumps({"assets": [asset]}).encode()
+    manager = GitHubReleaseManager("o", "r", api_base=http_server.url(""))
+    assert manager.get_cached_release() == (None, False)
+    assert manager.get_release_assets()[0].name == "fonts.zip"
+
+    # Fresh entries are used without a request
+    release, fresh = manager.get_cached_release()
+    assert fresh and release["assets"][0]["name"] == "fonts.zip"
+    assert manager.get_release_assets(max_age=manager.RELEASE_TTL)
+    assert len(http_server.requests) == 1
+
+    # Past the TTL the list is stale but still available
+    monkeypatch.setattr(GitHubReleaseManager, "RELEASE_TTL", 0)
+    assert manager.get_cached_release()[1] is False
+
+    # Offline: the last known release is returned
+    def offline(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(requests.Session, "get", offline)
+    assert manager.get_release_assets()[0].name == "fonts.zip"
+
+
+def test_cached_asset_is_reused_without_network(http_server, tmp_path):
+    data = os.urandom(100 * 1024)
+    asset = make_asset(http_server, "fonts.tar.xz", data)
+    downloader = FontReleaseDownloader(cache=DownloadCache(root=str(tmp_path / "cache")))
+
+    ok, _, path = downloader.download_font(asset)
+    assert ok
+    assert asset.sha256 == hashlib.sha256(data).hexdigest()
+    assert path.endswith(os.path.join(asset.sha256, "fonts.tar.xz"))
+
+    # A fresh asset object without a digest is found by name and size
+    again = GitHubAsset("fonts.tar.xz", len(data), asset.download_url)
+    ok, _, cached_path = downloader.download_font(again)
+    assert ok and cached_path == path
+    assert len(http_server.requests) == 1
+
+
+def test_checksum_mismatch_is_rejected(http_server, tmp_path):
+    asset = make_asset(http_server, "fonts.zip", b"payload")
+    asset.sha256 = hashlib.sha256(b"other").hexdigest()
+
+    ok, msg = GitHubReleaseManager("o", "r").download_asset(asset, str(tmp_path / "fonts.zip"))
+    assert not ok and "Checksum" in msg
+    assert not os.listdir(str(tmp_path))
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = DownloadCache(root=str(tmp_path / "cache"), max_bytes=250)
+    paths = []
+    for index in range(3):
+        data = bytes([index]) * 100
+        source = tmp_path / f"font{index}.ttf"
+        source.write_bytes(data)
+        asset = GitHubAsset(source.name, 100, "", hashlib.sha256(data).hexdigest())
+        paths.append(cache.add(str(source), asset))
+        if index == 1:
+            # Touch the first entry so the second one is the oldest
+            assert cache.lookup(GitHubAsset("font0.ttf", 100, ""))
+
+    assert [os.path.exists(path) for path in paths] == [True, False, True]
+    assert cache.get_total_size() == 200
+
+
+def test_cache_fallback_lookup_tells_reuploads_apart(tmp_path):
+    cache = DownloadCache(root=str(tmp_path / "cache"))
+    source = tmp_path / "fonts.zip"
+    source.write_bytes(b"v1" * 50)
+    sha256 = hashlib.sha256(b"v1" * 50).hexdigest()
+    cache.add(str(source), GitHubAsset("fonts.zip", 100, "", sha256, "2024-01-01"))
+
+    assert cache.lookup(GitHubAsset("fonts.zip", 100, "", updated_at="2024-01-01"))
+    # Same name and size, uploaded again: not the cached file
+    assert not cache.lookup(GitHubAsset("fonts.zip", 100, "", updated_at="2024-06-01"))
+
+
+def test_cache_index_is_shared_between_instances(tmp_path):
+    root = str(tmp_path / "cache")
+
+    def fill(worker):
+        cache = DownloadCache(root=root)  # Own thread lock, like another process
+        for index in range(20):
+            data = f"{worker}-{index}".encode()
+            source = tmp_path / f"{worker}-{index}.ttf"
+            source.write_bytes(data)
+            sha256 = hashlib.sha256(data).hexdigest()
+            cache.add(str(source), GitHubAsset(source.name, len(data), "", sha256))
+
+    threads = [threading.Thread(target=fill, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(DownloadCache(root=root)._load_index()) == 80
+
+
+def test_tar_pack_installs_while_downloading(http_server, api_cache_home, monkeypatch):
+    monkeypatch.setattr(Config, "_get_home_dir", classmethod(lambda cls: str(api_cache_home)))
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:xz") as tar:
+        for name, data in (("pack/NotoSansCJK.TTC", os.urandom(50000)), ("pack/README", b"x")):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    asset = make_asset(http_server, "fonts.tar.xz", buffer.getvalue())
+    fonts_dir = api_cache_home / ".fonts"
+
+    # The caller's token reaches the streaming install
+    token = CancellationToken()
+    token.cancel(keep_partial=False)
+    assert not download_and_install_fonts(asset, cancel_token=token)[0]
+    assert not fonts_dir.exists() or os.listdir(str(fonts_dir)) == []
+    http_server.requests.clear()
+
+    ok, msg = download_and_install_fonts(asset)
+    assert ok, msg
+    assert os.listdir(str(fonts_dir)) == ["NotoSansCJK.ttc"]
+
+    # The streamed archive was saved to the cache: reinstalling needs no network
+    (fonts_dir / "NotoSansCJK.ttc").unlink()
+    assert download_and_install_fonts(asset)[0]
+    assert (fonts_dir / "NotoSansCJK.ttc").exists()
+    assert len(http_server.requests) == 1
+
+
+def test_installed_zip_pack_fetches_only_changed_fonts(http_server, api_cache_home, monkeypatch):
+    monkeypatch.setattr(Config, "_get_home_dir", classmethod(lambda cls: str(api_cache_home)))
+    big, changed, new = os.urandom(2 * 1024 * 1024), os.urandom(50000), os.urandom(30000)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as pack:
+        pack.writestr("pack/Big.TTF", big)
+        pack.writestr("pack/Changed.ttf", changed)
+        pack.writestr("pack/New.otf", new)
+        pack.writestr("pack/README", b"x")
+    asset = make_asset(http_server, "fonts.zip", buffer.getvalue())
+
+    fonts_dir = api_cache_home / ".fonts"
+    fonts_dir.mkdir()
+    (fonts_dir / "Big.ttf").write_bytes(big)
+    (fonts_dir / "Changed.ttf").write_bytes(os.urandom(50000))  # same size, other CRC
+
+    ok, msg = download_and_install_fonts(asset)
+    assert ok, msg
+    assert (fonts_dir / "Changed.ttf").read_bytes() == changed
+    assert (fonts_dir / "New.otf").read_bytes() == new
+
+    # Tail (central directory) plus one request per changed member
+    ranges = [request[1]["Range"] for request in http_server.requests]
+    assert len(ranges) == 3
+    fetched = sum(
+        int(r[len("bytes=-"):]) if r.startswith("bytes=-")
+        else int(r.split("-")[1]) - int(r[len("bytes="):].split("-")[0]) + 1
+        for r in ranges
+    )
+    assert fetched < 250 * 1024
+
+    # Nothing changed: only the central directory is read
+    assert download_and_install_fonts(asset) == (True, "SUCCESS: All 3 font(s) are up to date")
+    assert len(http_server.requests) == 4
+
+
+class GatedDownloader:
+    """Fake downloader whose transfers block until released or cancelled"""
+
+    def __init__(self, sources=None):
+        self.started = []
+        self.running = 0
+        self.peak = 0
+        self.release = threading.Event()
+        self.sources = sources or {}  # asset name -> resolved host
+        self._lock = threading.Lock()
+
+    def get_source_host(self, asset):
+        return self.sources.get(asset.name, urlsplit(asset.download_url).netloc)
+
+    def download_font(self, asset, progress=None, cancel_token=None):
+        with self._lock:
+            self.started.append(asset.name)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            while not self.release.wait(0.01):
+                if cancel_token.is_cancelled:
+                    return False, "Download cancelled", None
+            return True, "ok", f"/cache/{asset.name}"
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def discard_partial(self, asset):
+        pass
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_download_manager_installs_tar_packs_while_downloading(
+    http_server, api_cache_home, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(Config, "_get_home_dir", classmethod(lambda cls: str(api_cache_home)))
+    assets = []
+    for index in range(2):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            data = os.urandom(30000)
+            info = tarfile.TarInfo(f"pack/Font{index}.ttf")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        assets.append(make_asset(http_server, f"fonts{index}.tar.gz", buffer.getvalue()))
+    downloader = FontReleaseDownloader(cache=DownloadCache(root=str(tmp_path / "cache")))
+    streamed = []
+    stream_font = downloader.stream_font
+
+    def record_stream(asset, *args, **kwargs):
+        streamed.append(asset.name)
+        return stream_font(asset, *args, **kwargs)
+
+    monkeypatch.setattr(downloader, "stream_font", record_stream)
+    manager = DownloadManager(downloader)
+
+    jobs = [manager.submit(asset, install=True) for asset in assets]
+    assert manager.wait_all(timeout=10)
+    manager.shutdown()
+    assert [job.state for job in jobs] == ["done", "done"], [job.message for job in jobs]
+    assert sorted(os.listdir(str(api_cache_home / ".fonts"))) == ["Font0.ttf", "Font1.ttf"]
+    assert sorted(streamed) == ["fonts0.tar.gz", "fonts1.tar.gz"]
+    assert all(job.path is None for job in jobs)
+
+
+def test_download_manager_runs_higher_priority_first():
+    fake = GatedDownloader()
+    manager = DownloadManager(fake, max_concurrent=1)
+    manager.submit(GitHubAsset("first", 1, "http://a/first"))
+    wait_until(lambda: fake.started == ["first"])
+
+    manager.submit(GitHubAsset("low", 1, "http://a/low"), priority=0)
+    manager.submit(GitHubAsset("high", 1, "http://a/high"), priority=10)
+    fake.release.set()
+    assert manager.wait_all(timeout=5)
+    assert fake.started == ["first", "high", "low"]
+    assert all(job.state == "done" for job in manager.jobs)
+    manager.shutdown()
+
+
+def test_download_manager_limits_downloads_per_host():
+    fake = GatedDownloader()
+    manager = DownloadManager(fake, max_concurrent=3, max_per_host=1)
+    jobs = [
+        manager.submit(GitHubAsset(name, 1, f"http://{host}/{name}"))
+        for name, host in (("a1", "a"), ("a2", "a"), ("b1", "b"))
+    ]
+    wait_until(lambda: len(fake.started) == 2)
+    time.sleep(0.1)
+    assert sorted(fake.started) == ["a1", "b1"]
+    assert jobs[1].state == "queued"
+
+    fake.release.set()
+    assert manager.wait_all(timeout=5)
+    assert fake.peak == 2
+    assert jobs[1].path == "/cache/a2"
+    manager.shutdown()
+
+
+def test_download_manager_limits_by_resolved_source():
+    # Two GitHub assets served by different mirrors, and a cached one
+    fake = GatedDownloader({"a1": "mirror-1", "a2": "mirror-2", "a3": ""})
+    manager = DownloadManager(fake, max_concurrent=3, max_per_host=1)
+    jobs = [
+        manager.submit(GitHubAsset(name, 1, f"http://github/{name}"))
+        for name in ("a1", "a2", "a3")
+    ]
+    wait_until(lambda: len(fake.started) == 3)
+    assert [job.get_host() for job in jobs] == ["mirror-1", "mirror-2", ""]
+
+    fake.release.set()
+    assert manager.wait_all(timeout=5)
+    assert fake.peak == 3
+    manager.shutdown()
+
+
+def test_download_job_pause_resume_and_cancel():
+    fake = GatedDownloader()
+    manager = DownloadManager(fake)
+    job = manager.submit(GitHubAsset("fonts.zip", 1, "http://a/fonts.zip"))
+    wait_until(lambda: job.state == "running")
+
+    job.pause()
+    wait_until(lambda: job.state == "paused")
+    assert not job.is_finished()
+    assert manager.wait_all(timeout=1)  # Paused jobs do not block
+
+    job.resume()
+    wait_until(lambda: job.state == "running" and len(fake.started) == 2)
+    job.cancel()
+    assert job.wait(timeout=5)
+    assert job.state == "cancelled"
+    manager.shutdown()
+
+
+def test_job_cancelled_as_it_is_dispatched_never_starts():
+    fake = GatedDownloader()
+    states = []
+
+    def on_update(job):
+        states.append(job.state)
+        if job.state == "running" and not job._token.is_cancelled:
+            job.cancel()  # Before the transfer is handed to the pool
+
+    manager = DownloadManager(fake, on_update=on_update)
+    job = manager.submit(GitHubAsset("fonts.zip", 1, "http://a/fonts.zip"))
+    assert job.wait(timeout=5)
+    manager.shutdown()
+    assert job.state == "cancelled"
+    assert states[-2:] == ["running", "cancelled"]
+    assert fake.started == []
+
+
+def test_download_manager_fetches_assets_concurrently(http_server, tmp_path):
+    payloads = {f"font{i}.ttf": os.urandom(200 * 1024) for i in range(3)}
+    assets = [make_asset(http_server, name, data) for name, data in payloads.items()]
+    downloader = FontReleaseDownloader(cache=DownloadCache(root=str(tmp_path / "cache")))
+    manager = DownloadManager(downloader)
+
+    jobs = [manager.submit(asset) for asset in assets]
+    assert manager.wait_all(timeout=10)
+    for job in jobs:
+        assert job.state == "done", job.message
+        with open(job.path, "rb") as f:
+            assert f.read() == payloads[job.asset.name]
+    assert jobs[0].progress.finished
+    manager.shutdown()
+
+
+@pytest.mark.parametrize("segments", [1, 4])
+def test_cancel_aborts_stalled_download(http_server, tmp_path, segments):
+    asset = make_asset(http_server, "fonts.zip", os.urandom(20 * 1024 * 1024))
+    dest = tmp_path / "fonts.zip"
+    manager = GitHubReleaseManager("o", "r", timeout=30, segments=segments)
+    manager.SEGMENT_MIN_SIZE = 1
+    stalls = [256 * 1024] * segments
+    if segments > 1:
+        stalls = [None] + stalls  # range probe
+    http_server.stall_after = list(stalls)
+    token = CancellationToken()
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(manager.download_asset(asset, str(dest), cancel_token=token))
+    )
+    thread.start()
+    wait_until(lambda: len(http_server.requests) == len(stalls))
+    time.sleep(0.2)
+
+    started = time.monotonic()
+    token.cancel(keep_partial=True)
+    thread.join(5)
+    assert time.monotonic() - started < 1.0
+    ok, msg = result[0]
+    assert not ok and "cancelled" in msg
+    assert (tmp_path / "fonts.zip.part").exists()
+
+
+def test_cancel_can_remove_partial_file(http_server, tmp_path):
+    asset = make_asset(http_server, "fonts.zip", os.urandom(1024 * 1024))
+    http_server.stall_after = [64 * 1024]
+    token = CancellationToken()
+    threading.Timer(0.3, lambda: token.cancel(keep_partial=False)).start()
+
+    ok, msg = GitHubReleaseManager("o", "r", timeout=30).download_asset(
+        asset, str(tmp_path / "fonts.zip"), cancel_token=token
+    )
+    assert not ok and "cancelled" in msg
+    assert not os.listdir(str(tmp_path))
+
+
+RELEASE_PATH = "/owner/repo/releases/download/v1"
+
+
+def make_release_asset(servers, name, data):
+    """Publish data in the GitHub release layout on every server"""
+    for server in servers:
+        server.files[f"{RELEASE_PATH}/{name}"] = data
+    url = servers[0].url(f"{RELEASE_PATH}/{name}")
+    return GitHubAsset(name, len(data), url, hashlib.sha256(data).hexdigest())
+
+
+def test_download_manager_updates_installed_zip_pack_from_mirror(
+    http_server, mirror_server, api_cache_home, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(Config, "_get_home_dir", classmethod(lambda cls: str(api_cache_home)))
+    kept, new = os.urandom(100000), os.urandom(30000)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as pack:
+        pack.writestr("pack/Kept.ttf", kept)
+        pack.writestr("pack/New.otf", new)
+    asset = make_release_asset([http_server, mirror_server], "fonts.zip", buffer.getvalue())
+    fonts_dir = api_cache_home / ".fonts"
+    fonts_dir.mkdir()
+    (fonts_dir / "Kept.ttf").write_bytes(kept)
+    http_server.delay = 0.2
+    downloader = FontReleaseDownloader(cache=DownloadCache(root=str(tmp_path / "cache")))
+    downloader.manager.mirrors = MirrorSet(
+        [mirror_server.url("")], scores=MirrorScores(str(tmp_path / "scores.json")), timeout=2
+    )
+
+    # The caller's token stops the ranged reads
+    token = CancellationToken()
+    token.cancel(keep_partial=False)
+    ok, msg = download_and_install_fonts(asset, cancel_token=token, downloader=downloader)
+    assert not ok and "cancelled" in msg
+    assert not (fonts_dir / "New.otf").exists()
+
+    manager = DownloadManager(downloader)
+    job = manager.submit(asset, install=True)
+    assert manager.wait_all(timeout=10)
+    manager.shutdown()
+    assert job.state == "done", job.message
+    assert (fonts_dir / "New.otf").read_bytes() == new
+
+    # Only the probe went to GitHub, the zip was read from the mirror
+    probe = f"bytes=0-{MirrorSet.PROBE_BYTES - 1}"
+    assert all(request[1]["Range"] == probe for request in http_server.requests)
+    assert any(request[1]["Range"].startswith("bytes=-") for request in mirror_server.requests)
+
+
+def test_mirrors_are_ranked_by_probe_throughput(http_server, mirror_server, tmp_path):
+    asset = make_release_asset([http_server, mirror_server], "fonts.zip", os.urandom(200 * 1024))
+    http_server.delay = 0.2
+    scores = MirrorScores(str(tmp_path / "scores.json"))
+    broken = "http://127.0.0.1:9/mirror"
+    mirrors = MirrorSet([mirror_server.url(""), broken], scores=scores, timeout=2)
+
+    ranked = mirrors.rank(asset)
+    assert [source.key for source in ranked] == [mirror_server.url(""), "direct"]
+    assert mirror_server.requests[0][1]["Range"] == f"bytes=0-{MirrorSet.PROBE_BYTES - 1}"
+    assert scores.get_history(broken) == [0.0]
+    assert scores.get_score(mirror_server.url("")) > scores.get_score("direct")
+
+
+def test_download_fails_over_to_next_mirror_mid_transfer(http_server, mirror_server, tmp_path):
+    data = os.urandom(300 * 1024)
+    asset = make_release_asset([http_server, mirror_server], "fonts.zip", data)
+    http_server.delay = 0.2
+    mirror_server.fail_after = [None, 100 * 1024]  # probe, then drop the download
+    mirrors = MirrorSet([mirror_server.url("")], scores=MirrorScores(str(tmp_path / "s.json")))
+    manager = GitHubReleaseManager("owner", "repo", mirrors=mirrors)
+
+    ok, msg = manager.download_asset(asset, str(tmp_path / "fonts.zip"))
+    assert ok, msg
+    assert (tmp_path / "fonts.zip").read_bytes() == data
+    resumed = http_server.requests[-1][1]
+    assert resumed["Range"].startswith("bytes=") and resumed["Range"] != "bytes=0-"
+    assert "If-Range" not in resumed
+    assert 0.0 in mirrors.scores.get_history(mirror_server.url(""))
+
+
+def test_local_directory_mirror_is_preferred(http_server, tmp_path):
+    data = os.urandom(100 * 1024)
+    asset = make_release_asset([http_server], "fonts.zip", data)
+    local = tmp_path / "mirror" / RELEASE_PATH.lstrip("/")
+    local.mkdir(parents=True)
+    (local / "fonts.zip").write_bytes(data)
+    mirrors = MirrorSet([f"file://{tmp_path / 'mirror'}"], scores=MirrorScores(str(tmp_path / "s.json")))
+
+    ok, msg = GitHubReleaseManager("owner", "repo", mirrors=mirrors).download_asset(
+        asset, str(tmp_path / "out" / "fonts.zip")
+    )
+    assert ok and "local mirror" in msg
+    assert (tmp_path / "out" / "fonts.zip").read_bytes() == data
+    assert len(http_server.requests) == 1  # range probe only
+
+
+def test_chunk_size_follows_throughput():
+    sizer = ChunkSizer()
+    for _ in range(20):
+        sizer.update(sizer.size, 0.001)  # ~64 MB/s and up
+    assert sizer.size == ChunkSizer.MAX_CHUNK
+
+    sizer.update(100, 0.001)  # short read at the end of a range
+    assert sizer.size == ChunkSizer.MAX_CHUNK
+
+    for _ in range(20):
+        sizer.update(sizer.size, 5.0)
+    assert sizer.size == ChunkSizer.MIN_CHUNK
+
+
+def test_download_syncs_periodically(http_server, tmp_path, monkeypatch):
+    data = os.urandom(1024 * 1024)
+    asset = make_asset(http_server, "fonts.zip", data)
+    synced = []
+    monkeypatch.setattr(os, "fdatasync", lambda fd: synced.append(fd))
+
+    manager = GitHubReleaseManager("o", "r", sync_interval=256 * 1024)
+    assert manager.download_asset(asset, str(tmp_path / "fonts.zip"))[0]
+    assert (tmp_path / "fonts.zip").read_bytes() == data
+    assert 3 <= len(synced) <= 5
+
+    # Without periodic syncs the data is still synced before the offset is saved
+    synced.clear()
+    manager.sync_interval = 0
+    assert manager.download_asset(asset, str(tmp_path / "again.zip"))[0]
+    assert len(synced) == 1
+
+
+def publish_digest(asset):
+    """Put the asset and its digest into the cached GitHub release"""
+    manager = GitHubReleaseManager(FontReleaseDownloader.OWNER, FontReleaseDownloader.REPO)
+    entry = {
+        "name": asset.name,
+        "size": asset.size,
+        "browser_download_url": asset.download_url,
+        "digest": f"sha256:{asset.sha256}",
+    }
+    release = {"tag_name": "v1", "assets": [entry]}
+    manager._store_cached_response(f"{manager.api_url}/releases/latest", None, release)
+
+
+@pytest.fixture
+def peer_server(tmp_path, api_cache_home):
+    """Peer cache on localhost with its own cache root"""
+    downloader = FontReleaseDownloader(
+        cache=DownloadCache(root=str(tmp_path / "peer")), peers=PeerCache([])
+    )
+    server = downloader.serve_peer_cache(port=0, advertise=False)
+    yield server
+    server.stop()
+
+
+def add_to_peer(peer_server, tmp_path, name, data, sha256):
+    """Put data into the peer's cache under a given hash"""
+    source = tmp_path / f"peer-{name}"
+    source.write_bytes(data)
+    peer_server.cache.add(str(source), GitHubAsset(name, len(data), "", sha256))
+
+
+def make_peer_client(peer_server, tmp_path):
+    return FontReleaseDownloader(
+        cache=DownloadCache(root=str(tmp_path / "cache")),
+        peers=PeerCache([f"127.0.0.1:{peer_server.port}"]),
+    )
+
+
+def test_font_is_fetched_from_peer_by_hash(http_server, peer_server, tmp_path):
+    data = os.urandom(200 * 1024)
+    asset = make_asset(http_server, "fonts.zip", data)
+    asset.sha256 = hashlib.sha256(data).hexdigest()
+    publish_digest(asset)
+    add_to_peer(peer_server, tmp_path, "fonts.zip", data, asset.sha256)
+
+    client = make_peer_client(peer_server, tmp_path)
+    assert client.get_source_host(asset) == f"127.0.0.1:{peer_server.port}"
+    ok, _, path = client.download_font(asset)
+    assert ok
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert http_server.requests == []
+    assert client.get_source_host(asset) == ""
+
+
+def test_corrupt_peer_copy_falls_back_to_github(http_server, peer_server, tmp_path):
+    data = os.urandom(100 * 1024)
+    asset = make_asset(http_server, "fonts.zip", data)
+    asset.sha256 = hashlib.sha256(data).hexdigest()
+    publish_digest(asset)
+    add_to_peer(peer_server, tmp_path, "fonts.zip", os.urandom(len(data)), asset.sha256)
+
+    ok, _, path = make_peer_client(peer_server, tmp_path).download_font(asset)
+    assert ok
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert len(http_server.requests) == 1
+
+
+def test_peers_only_exchange_published_digests(http_server, peer_server, tmp_path, monkeypatch):
+    data = os.urandom(50 * 1024)
+    asset = make_asset(http_server, "fonts.zip", data)
+    asset.sha256 = hashlib.sha256(data).hexdigest()
+    add_to_peer(peer_server, tmp_path, "fonts.zip", data, asset.sha256)
+
+    # Not in GitHub's release metadata: the server refuses it
+    url = f"http://127.0.0.1:{peer_server.port}/objects/{asset.sha256}"
+    assert requests.get(url).status_code == 404
+
+    # ... and the client does not ask peers for it
+    def fetch(*args, **kwargs):
+        raise AssertionError("peer asked for an unpublished digest")
+
+    monkeypatch.setattr(PeerCache, "fetch", fetch)
+    ok, _, _ = make_peer_client(peer_server, tmp_path).download_font(asset)
+    assert ok
+    assert len(http_server.requests) == 1
@@ -0,0 +1,529 @@
+"""
+Proton prefix tests - operate on fake compatdata directory trees
+"""
+
+import os
+import random
+import struct
+
+import pytest
+
+from src.config import Config, TargetLanguage
+from src.core.installers.font import FontInstaller
+from src.core.shortcut_sync import ShortcutSync
+from src.core.prefix import backup
+from src.core.prefix.registry import FONT_SUBSTITUTES_KEY
+from src.core.nonsteam_manager import NonSteamManager
+from src.core.steam_manager import SteamManager
+from src.core.prefix import (
+    PrefixDeduplicator,
+    PrefixFontLinker,
+    PrefixSizeScanner,
+    SaveBackupManager,
+    PrefixTemplateManager,
+    WineRegistryFile,
+    apply_codepage_profile,
+    apply_font_substitutes,
+    apply_registry_edits,
+    backup_saves,
+    chunk_data,
+    build_font_edits,
+    clone_tree,
+    delete_prefixes,
+    find_orphaned_prefixes,
+    find_substitute_font,
+    read_codepage,
+    read_font_face,
+    restore_saves,
+)
+
+
+def make_prefix(path, files=None):
+    """Create a minimal compatdata/<appid> tree"""
+    windows = path / "pfx" / "drive_c" / "windows"
+    (windows / "system32").mkdir(parents=True)
+    (windows / "Fonts").mkdir()
+    (path / "pfx" / "dosdevices").mkdir()
+    os.symlink("../drive_c", str(path / "pfx" / "dosdevices" / "c:"))
+    (path / "version").write_text("9.0-1\n")
+    (path / "pfx" / "system.reg").write_text("WINE REGISTRY Version 2\n")
+    (path / "pfx" / "user.reg").write_text("WINE REGISTRY Version 2\n")
+    (windows / "system32" / "kernel32.dll").write_bytes(b"MZ" + b"\x01" * 4096)
+    (windows / "Fonts" / "tahoma.ttf").write_bytes(b"\x00\x01" * 2048)
+    for name, data in (files or {}).items():
+        target = path / "pfx" / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+    return path
+
+
+def make_font(path, family, codepage_bit=None, weight=400, collection=False):
+    """Write a minimal sfnt font with just a name and an OS/2 table"""
+    string = family.encode("utf-16-be")
+    record = struct.pack(">6H", 3, 1, 0x409, 1, len(string), 0)
+    name = struct.pack(">3H", 0, 1, 18) + record + string
+    os2 = bytearray(86)
+    struct.pack_into(">H", os2, 4, weight)
+    if codepage_bit is not None:
+        struct.pack_into(">I", os2, 78, 1 << codepage_bit)
+
+    # A collection header (tag, version, count, one offset) precedes the font
+    start = 16 if collection else 0
+    offset = start + 12 + 2 * 16
+    data = b"ttcf" + struct.pack(">III", 0x00010000, 1, start) if collection else b""
+    data += struct.pack(">IHHHH", 0x00010000, 2, 0, 0, 0)
+    data += struct.pack(">4sIII", b"name", 0, offset, len(name))
+    data += struct.pack(">4sIII", b"OS/2", 0, offset + len(name), len(os2))
+    path.write_bytes(data + name + bytes(os2))
+    return path
+
+
+def inode(prefix, name):
+    """Inode of a file below drive_c/windows"""
+    return os.stat(str(prefix / "pfx" / "drive_c" / "windows" / name)).st_ino
+
+
+@pytest.fixture
+def data_home(tmp_path, monkeypatch):
+    """Redirect ~/.local/share to a temporary home"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def test_clone_tree_links_immutable_and_copies_mutable(tmp_path):
+    src = make_prefix(tmp_path / "src")
+    dst = tmp_path / "dst"
+
+    stats = clone_tree(str(src), str(dst))
+
+    dll = "pfx/drive_c/windows/system32/kernel32.dll"
+    assert os.stat(str(src / dll)).st_ino == os.stat(str(dst / dll)).st_ino
+    assert os.stat(str(src / "pfx/system.reg")).st_ino != os.stat(str(dst / "pfx/system.reg")).st_ino
+    assert (dst / "pfx/system.reg").read_text() == "WINE REGISTRY Version 2\n"
+    assert os.readlink(str(dst / "pfx/dosdevices/c:")) == "../drive_c"
+    assert stats["hardlinked"] == 2
+    assert stats["symlinks"] == 1
+
+
+def test_template_clone_creates_independent_prefix(data_home, tmp_path):
+    source = make_prefix(tmp_path / "compatdata" / "100")
+    assert PrefixTemplateManager.capture_template("proton_9", str(source))[0]
+    assert PrefixTemplateManager.has_template("proton_9")
+
+    new_prefix = tmp_path / "compatdata" / "3000000000"
+    new_prefix.mkdir()
+    assert PrefixTemplateManager.clone_template("proton_9", str(new_prefix))[0]
+    assert (new_prefix / "version").read_text() == "9.0-1\n"
+
+    # Registry edits in the clone do not leak into the template
+    (new_prefix / "pfx" / "user.reg").write_text("changed")
+    template = PrefixTemplateManager.get_template_path("proton_9")
+    with open(os.path.join(template, "pfx", "user.reg")) as f:
+        assert f.read() == "WINE REGISTRY Version 2\n"
+
+    assert not PrefixTemplateManager.clone_template("proton_9", str(new_prefix))[0]
+
+
+def test_captured_template_leaves_out_game_state(steam_root, data_home, monkeypatch):
+    monkeypatch.setattr(Config, "_target_language", TargetLanguage.JAPANESE)
+    (data_home / ".fonts").mkdir()
+    make_font(data_home / ".fonts" / "NotoSansJP.otf", "Noto Sans JP", 17)
+    profile = "drive_c/users/steamuser/"
+    source = make_prefix(
+        data_home / "compatdata" / "100",
+        {
+            profile + "Saved Games/Game/save01.dat": b"save",
+            profile + "AppData/Roaming/Game/config.ini": b"[game]",
+            profile + "ntuser.dat": b"hive",
+        },
+    )
+
+    assert PrefixTemplateManager.capture_template("proton_9", str(source))[0]
+    template = data_home / ".local" / "share" / "steamdeck-galgame" / "prefix_templates"
+    users = template / "proton_9" / "pfx" / "drive_c" / "users" / "steamuser"
+    assert (users / "Saved Games").is_dir() and (users / "AppData" / "Roaming").is_dir()
+    assert not (users / "Saved Games" / "Game").exists()
+    assert not (users / "AppData" / "Roaming" / "Game").exists()
+    assert not (users / "ntuser.dat").exists()
+
+    # Nothing is shared with the live prefix
+    dll = "pfx/drive_c/windows/system32/kernel32.dll"
+    assert os.stat(str(source / dll)).st_ino != os.stat(str(template / "proton_9" / dll)).st_ino
+
+    # The CJK setup is baked in before the template is frozen
+    system_reg = str(template / "proton_9" / "pfx" / "system.reg")
+    assert read_codepage(system_reg) == {"ACP": "932", "OEMCP": "932"}
+    substitutes = WineRegistryFile(system_reg).get_values(FONT_SUBSTITUTES_KEY)
+    assert substitutes["MS Gothic"] == "Noto Sans JP"
+    fonts = template / "proton_9" / "pfx" / "drive_c" / "windows" / "Fonts"
+    assert os.path.islink(str(fonts / "NotoSansJP.otf"))
+    assert read_codepage(str(source / "pfx" / "system.reg")) == {}
+
+
+FAKE_PROTON = """#!/bin/sh
+pfx="$STEAM_COMPAT_DATA_PATH/pfx"
+mkdir -p "$pfx/drive_c/windows/Fonts" "$pfx/drive_c/users/steamuser/Documents"
+printf 'WINE REGISTRY Version 2\\n' > "$pfx/system.reg"
+printf 'WINE REGISTRY Version 2\\n' > "$pfx/user.reg"
+echo "$2 $3" > "$STEAM_COMPAT_DATA_PATH/version"
+"""
+
+
+def test_template_is_built_by_the_compat_tool(steam_root, data_home, monkeypatch):
+    monkeypatch.setattr(Config, "_target_language", TargetLanguage.CHINESE)
+    tool = steam_root / "steamapps" / "common" / "Proton 9.0"
+    tool.mkdir()
+    (tool / "proton").write_text(FAKE_PROTON)
+    (tool / "proton").chmod(0o755)
+    games = [{"name": "Game", "compat_layer": "Proton 9.0"}]
+
+    success, msg = ShortcutSync.build_prefix_templates(games)
+    assert success, msg
+    template = PrefixTemplateManager.get_template_path("proton_9")
+    assert open(os.path.join(template, "version")).read() == "wineboot -u\n"
+    system_reg = os.path.join(template, "pfx", "system.reg")
+    assert read_codepage(system_reg) == {"ACP": "936", "OEMCP": "936"}
+    assert not os.path.exists(template + ".staging")
+
+    (tool / "proton").write_text("#!/bin/sh\necho broken >&2\nexit 1\n")
+    success, msg = PrefixTemplateManager.build_template("proton_9", str(tool))
+    assert not success and "broken" in msg
+    assert PrefixTemplateManager.has_template("proton_9")
+
+
+def test_dedup_links_identical_files_and_reuses_cache(tmp_path):
+    shared = {"drive_c/windows/system32/d3dx9_43.dll": b"\x02" * 8192}
+    unique = {"drive_c/windows/system32/d3dx9_43.dll": b"\x03" * 8192}
+    prefixes = [
+        make_prefix(tmp_path / "100", shared),
+        make_prefix(tmp_path / "200", shared),
+        make_prefix(tmp_path / "300", unique),
+    ]
+    dedup = PrefixDeduplicator(cache_file=str(tmp_path / "cache.json"))
+
+    report = dedup.deduplicate([str(p) for p in prefixes])
+
+    d3dx9 = [inode(p, "system32/d3dx9_43.dll") for p in prefixes]
+    assert d3dx9[0] == d3dx9[1] != d3dx9[2]
+    assert inode(prefixes[0], "Fonts/tahoma.ttf") == inode(prefixes[2], "Fonts/tahoma.ttf")
+    # kernel32, tahoma: 2 duplicates each, d3dx9: 1 duplicate
+    assert report.files_linked == 5
+    assert report.bytes_reclaimed == 2 * 4098 + 2 * 4096 + 8192
+
+    again = dedup.deduplicate([str(p) for p in prefixes])
+    assert again.files_linked == 0
+    assert again.files_hashed == 0
+
+
+def test_font_store_links_into_prefixes_and_skips_in_sync(tmp_path):
+    store = tmp_path / "fonts"
+    store.mkdir()
+    (store / "NotoSansCJK.ttc").write_bytes(b"ttc")
+    (store / "tahoma.ttf").write_bytes(b"not the prefix tahoma")
+    prefixes = [str(make_prefix(tmp_path / str(appid))) for appid in (100, 200)]
+    linker = PrefixFontLinker(store_dir=str(store))
+
+    results = linker.apply(prefixes)
+    assert len(results["updated"]) == 2
+    fonts_dir = tmp_path / "100" / "pfx" / "drive_c" / "windows" / "Fonts"
+    assert os.readlink(str(fonts_dir / "NotoSansCJK.ttc")) == str(store / "NotoSansCJK.ttc")
+    assert not os.path.islink(str(fonts_dir / "tahoma.ttf"))
+
+    assert len(linker.apply(prefixes)["skipped"]) == 2
+
+    (store / "NotoSansCJK.ttc").unlink()
+    (store / "SourceHanSerif.otf").write_bytes(b"otf")
+    assert len(linker.apply(prefixes)["updated"]) == 2
+    assert not os.path.lexists(str(fonts_dir / "NotoSansCJK.ttc"))
+    assert os.path.islink(str(fonts_dir / "SourceHanSerif.otf"))
+
+
+def test_font_install_sets_up_prefixes(steam_root, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "_target_language", TargetLanguage.JAPANESE)
+    prefix = make_prefix(steam_root / "steamapps" / "compatdata" / "100")
+    font = make_font(tmp_path / "NotoSansCJK.ttc", "Noto Sans CJK JP", 17, collection=True)
+
+    success, msg = FontInstaller(str(font)).install()
+    assert success and "Linked into 1 Proton prefix(es)" in msg
+    linked = prefix / "pfx" / "drive_c" / "windows" / "Fonts" / "NotoSansCJK.ttc"
+    assert os.readlink(str(linked)) == str(tmp_path / ".fonts" / "NotoSansCJK.ttc")
+    registry = WineRegistryFile(str(prefix / "pfx" / "system.reg"))
+    substitutes = registry.get_values(FONT_SUBSTITUTES_KEY)
+    assert substitutes["MS Gothic"] == "Noto Sans CJK JP"
+
+
+SYSTEM_REG = """WINE REGISTRY Version 2
+;; All keys relative to \\\\Machine
+
+#arch=win64
+
+[Software\\\\Microsoft\\\\Windows NT\\\\CurrentVersion\\\\FontSubstitutes] 1600000000
+#time=1d6a0b2c3d4e5f6
+"Arial Baltic,186"="Arial,186"
+"MS Shell Dlg"="Tahoma"
+
+[Software\\\\Wine\\\\Other] 1600000000
+#time=1d6a0b2c3d4e5f6
+"Data"=hex:01,02,03,\\
+  04,05
+"""
+
+
+def test_registry_edits_rewrite_only_affected_blocks(tmp_path):
+    reg_path = tmp_path / "system.reg"
+    reg_path.write_text(SYSTEM_REG)
+    registry = WineRegistryFile(str(reg_path))
+
+    edits = build_font_edits(TargetLanguage.JAPANESE, "Noto Sans CJK JP", "NotoSansCJK.ttc")
+    assert registry.apply(edits["system.reg"]) == 2
+
+    text = reg_path.read_text()
+    assert text.isascii()
+    # Untouched block and header are copied byte for byte
+    assert text.startswith(SYSTEM_REG[: SYSTEM_REG.index("[Software")])
+    assert SYSTEM_REG[SYSTEM_REG.index("[Software\\\\Wine") :] in text
+
+    substitutes = registry.get_values("software\\microsoft\\windows nt\\currentversion\\fontsubstitutes")
+    assert substitutes["Arial Baltic,186"] == "Arial,186"
+    assert substitutes["ＭＳ ゴシック"] == "Noto Sans CJK JP"
+    link = registry.get_values("Software\\Microsoft\\Windows NT\\CurrentVersion\\FontLink\\SystemLink")
+    assert link["Tahoma"] == ["NotoSansCJK.ttc,Noto Sans CJK JP"]
+    assert registry.get_values("Software\\Wine\\Other")["Data"] == "hex:01,02,03,\\\n  04,05"
+
+    # Re-applying the same set leaves the hive untouched
+    assert registry.apply(edits["system.reg"]) == 0
+
+
+def test_registry_edits_apply_across_prefixes(tmp_path):
+    prefixes = [str(make_prefix(tmp_path / str(appid))) for appid in (100, 200)]
+    edits = build_font_edits(TargetLanguage.CHINESE, "Noto Sans CJK SC", "NotoSansCJK.ttc")
+
+    assert len(apply_registry_edits(edits, prefixes)["updated"]) == 2
+    assert len(apply_registry_edits(edits, prefixes)["unchanged"]) == 2
+
+    user_reg = WineRegistryFile(os.path.join(prefixes[0], "pfx", "user.reg"))
+    assert user_reg.get_values("Software\\Wine\\Fonts\\Replacements")["宋体"] == "Noto Sans CJK SC"
+
+
+def test_substitute_font_is_picked_by_codepage_coverage(tmp_path):
+    store = tmp_path / "fonts"
+    store.mkdir()
+    make_font(store / "latin.ttf", "Latin Sans")
+    make_font(store / "NotoSansCJK-Bold.ttc", "Noto Sans CJK JP Bold", 17, 700, collection=True)
+    make_font(store / "NotoSansCJK-Regular.ttc", "Noto Sans CJK JP", 17, collection=True)
+    make_font(store / "SourceHanSansSC.otf", "Source Han Sans SC", 18)
+    (store / "broken.ttf").write_bytes(b"not a font")
+
+    assert read_font_face(str(store / "latin.ttf")).family == "Latin Sans"
+    assert find_substitute_font(TargetLanguage.JAPANESE, str(store)) == (
+        "Noto Sans CJK JP",
+        "NotoSansCJK-Regular.ttc",
+    )
+    assert find_substitute_font(TargetLanguage.CHINESE, str(store))[1] == "SourceHanSansSC.otf"
+    (store / "SourceHanSansSC.otf").unlink()
+    assert find_substitute_font(TargetLanguage.CHINESE, str(store)) is None
+
+
+def test_font_substitutes_skip_running_prefixes(tmp_path, monkeypatch):
+    store = tmp_path / "fonts"
+    store.mkdir()
+    make_font(store / "SourceHanSansSC.otf", "Source Han Sans SC", 18)
+    prefixes = [str(make_prefix(tmp_path / str(appid))) for appid in (100, 200)]
+    monkeypatch.setattr(
+        "src.core.prefix.registry.get_running_prefixes", lambda: {os.path.realpath(prefixes[1])}
+    )
+
+    success, msg = apply_font_substitutes(TargetLanguage.CHINESE, prefixes, str(store))
+    assert not success and "in use" in msg
+    registry = WineRegistryFile(os.path.join(prefixes[0], "pfx", "system.reg"))
+    substitutes = registry.get_values(FONT_SUBSTITUTES_KEY)
+    assert substitutes["SimSun"] == "Source Han Sans SC"
+    assert "FontSubstitutes" not in (tmp_path / "200" / "pfx" / "system.reg").read_text()
+
+
+def test_codepage_profile_patches_only_mismatched_prefixes(tmp_path):
+    prefixes = [str(make_prefix(tmp_path / str(appid))) for appid in (100, 200, 300)]
+    system_reg = os.path.join(prefixes[0], "pfx", "system.reg")
+    with open(system_reg, "a") as f:
+        f.write(
+            "\n[System\\\\CurrentControlSet\\\\Control\\\\Nls\\\\CodePage] 1600000000\n"
+            '"ACP"="1252"\n"MACCP"="10000"\n"OEMCP"="437"\n'
+        )
+    assert read_codepage(system_reg) == {"ACP": "1252", "OEMCP": "437"}
+
+    results = apply_codepage_profile(TargetLanguage.JAPANESE, prefixes)
+    assert len(results["updated"]) == 3
+    for prefix in prefixes:
+        system_reg = os.path.join(prefix, "pfx", "system.reg")
+        assert read_codepage(system_reg) == {"ACP": "932", "OEMCP": "932"}
+
+    registry = WineRegistryFile(os.path.join(prefixes[0], "pfx", "system.reg"))
+    assert registry.get_values("System\\CurrentControlSet\\Control\\Nls\\CodePage")["MACCP"] == "10000"
+    assert len(apply_codepage_profile(TargetLanguage.JAPANESE, prefixes)["skipped"]) == 3
+
+
+def test_codepage_profile_leaves_running_prefixes_alone(tmp_path, monkeypatch):
+    prefixes = [str(make_prefix(tmp_path / str(appid))) for appid in (100, 200)]
+    monkeypatch.setattr(
+        "src.core.prefix.codepage.get_running_prefixes", lambda: {os.path.realpath(prefixes[0])}
+    )
+
+    results = apply_codepage_profile(TargetLanguage.CHINESE, prefixes)
+    assert results["updated"] == [f"{prefixes[1]}: codepage 936"]
+    assert "in use" in results["failed"][0]
+    assert read_codepage(os.path.join(prefixes[0], "pfx", "system.reg")) == {}
+
+
+def test_orphaned_compatdata_found_sized_and_deleted(steam_root, tmp_path):
+    user_config = steam_root / "userdata" / "1234" / "config"
+    user_config.mkdir(parents=True)
+    shortcut = SteamManager.build_shortcut("/games/a/game.exe", "Game A", "", "/games/a")
+    SteamManager.write_vdf_shortcuts(str(user_config / "shortcuts.vdf"), [shortcut])
+    (steam_root / "steamapps" / "appmanifest_10.acf").write_text('"AppState" {}')
+
+    compatdata = steam_root / "steamapps" / "compatdata"
+    owned = ["0", "10", str(SteamManager.get_shortcut_key(shortcut))]
+    for appid in owned + ["999"]:
+        make_prefix(compatdata / str(appid))
+    (compatdata / "999" / "pfx" / "drive_c" / "save.dat").write_bytes(b"\x00" * 100000)
+
+    scanner = PrefixSizeScanner(cache_file=str(tmp_path / "sizes.json"))
+    orphans = find_orphaned_prefixes(scanner)
+    assert [orphan.appid for orphan in orphans] == [999]
+    assert orphans[0].size >= 100000
+
+    # Unchanged directories are served from the cache
+    (compatdata / "999" / "pfx" / "drive_c" / "save.dat").write_bytes(b"")
+    assert find_orphaned_prefixes(scanner)[0].size == orphans[0].size
+
+    results = []
+    delete_prefixes([orphans[0].path], lambda ok, msg: results.append(ok)).join()
+    assert results == [True]
+    assert sorted(os.listdir(str(compatdata))) == sorted(owned)
+
+    delete_prefixes([str(tmp_path)], lambda ok, msg: results.append(ok)).join()
+    assert results == [True, False]
+
+    # An unreadable shortcuts.vdf aborts the scan instead of orphaning its prefixes
+    (user_config / "shortcuts.vdf").write_bytes(b"\x00shortcuts\x00\x00\x01bad")
+    with pytest.raises(OSError):
+        find_orphaned_prefixes(scanner)
+
+
+def test_orphans_are_named_and_backed_up_before_deletion(steam_root, tmp_path, monkeypatch):
+    Config.set_managed_games(
+        [
+            {"name": "Old Game", "steam_sync": {"appid": 3000000001}},
+            {"name": "Never Run", "steam_sync": {"appid": 3000000003}},
+        ]
+    )
+    assert NonSteamManager.remove_game("Old Game")[0]
+    assert NonSteamManager.remove_game("Never Run")[0]
+    compatdata = steam_root / "steamapps" / "compatdata"
+    save = "drive_c/users/steamuser/Documents/Old Game/save01.dat"
+    for appid in ("3000000001", "3000000002"):
+        make_prefix(compatdata / appid, {save: appid.encode()})
+
+    scanner = PrefixSizeScanner(cache_file=str(tmp_path / "sizes.json"))
+    names = {orphan.appid: orphan.name for orphan in find_orphaned_prefixes(scanner)}
+    assert names == {3000000001: "Old Game", 3000000002: ""}
+    # Names of games without a prefix are dropped by the scan
+    removed_names = Config.load_section(Config.SECTION_GAMES)["removed_names"]
+    assert removed_names == {"3000000001": "Old Game"}
+
+    backups = SaveBackupManager(root=str(tmp_path / "backups"))
+    backup = backups.backup
+
+    def backup_or_fail(path):
+        if path.endswith("2"):
+            raise OSError("disk full")
+        return backup(path)
+
+    monkeypatch.setattr(backups, "backup", backup_or_fail)
+    results = []
+    paths = [str(compatdata / "3000000001"), str(compatdata / "3000000002")]
+    delete_prefixes(paths, lambda ok, msg: results.append(msg), backups).join()
+    assert "save backup failed" in results[0]
+    assert os.listdir(str(compatdata)) == ["3000000002"]
+    assert Config.load_section(Config.SECTION_GAMES)["removed_names"] == {}
+
+    restored = make_prefix(tmp_path / "restored" / "3000000001")
+    assert backups.restore(str(restored))[0]
+    assert (restored / "pfx" / save).read_bytes() == b"3000000001"
+
+
+def test_chunk_boundaries_survive_insertions():
+    rng = random.Random(1)
+    data = bytes(rng.getrandbits(8) for _ in range(200000))
+    chunks = list(chunk_data(data))
+    assert b"".join(chunks) == data
+    assert len(chunks) > 5
+
+    edited = list(chunk_data(data[:1000] + b"inserted" + data[1000:]))
+    assert len(set(chunks) & set(edited)) >= len(chunks) - 2
+
+
+def test_chunk_boundaries_match_the_full_gear_hash():
+    # Chunks already in backup stores were cut with the 64-bit hash
+    rng = random.Random(2)
+    data = bytes(rng.getrandbits(8) for _ in range(300000)) + bytes(100000)
+    cuts, start, h = [], 0, 0
+    for i in range(len(data)):
+        if i - start < backup.MIN_CHUNK:
+            continue
+        h = ((h << 1) + backup._GEAR[data[i]]) & ((1 << 64) - 1)
+        if not h & backup._CUT_MASK or i + 1 - start == backup.MAX_CHUNK:
+            cuts.append(i + 1 - start)
+            start, h = i + 1, 0
+    cuts.append(len(data) - start)
+    assert [len(chunk) for chunk in chunk_data(data)] == cuts
+
+
+def test_save_backup_is_incremental_and_restores_per_game(tmp_path):
+    saves = "drive_c/users/steamuser/AppData/Roaming/Galgame/"
+    rng = random.Random(2)
+    save_data = bytes(rng.getrandbits(8) for _ in range(50000))
+    files = {saves + "save01.dat": save_data, saves + "config.ini": b"x"}
+    prefixes = [make_prefix(tmp_path / str(appid), files) for appid in (100, 200)]
+    manager = SaveBackupManager(root=str(tmp_path / "backups"))
+
+    first = [manager.backup(str(p)) for p in prefixes]
+    assert [result.files for result in first] == [2, 2]
+    # Identical saves in both prefixes are stored once
+    assert first[0].chunks_written > 0 and first[1].chunks_written == 0
+
+    second = manager.backup_all([str(p) for p in prefixes])
+    assert [result.files_reused for result in second] == [2, 2]
+    assert all(result.backup_id is None for result in second)
+
+    save = prefixes[0] / "pfx" / saves / "save01.dat"
+    save.write_bytes(b"progress" + save_data)
+    third = manager.backup(str(prefixes[0]))
+    assert third.backup_id is not None and third.chunks_written <= 2
+
+    save.write_bytes(b"corrupted")
+    (prefixes[0] / "pfx" / saves / "config.ini").write_bytes(b"keep")
+    ok, _ = manager.restore(str(prefixes[0]), files=["AppData/Roaming/Galgame/save01.dat"])
+    assert ok
+    assert save.read_bytes() == b"progress" + save_data
+    assert (prefixes[0] / "pfx" / saves / "config.ini").read_bytes() == b"keep"
+    assert len(manager.list_backups("100")) == 2
+
+
+def test_saves_are_backed_up_and_restored_by_app_id(steam_root, tmp_path):
+    save = "drive_c/users/steamuser/Saved Games/Galgame/save01.dat"
+    compatdata = steam_root / "steamapps" / "compatdata"
+    for appid in ("100", "200"):
+        make_prefix(compatdata / appid, {save: appid.encode()})
+    backups = SaveBackupManager(root=str(tmp_path / "backups"))
+
+    success, msg = backup_saves(backups=backups)
+    assert success and "Backed up 2 prefix(es), 0 unchanged" in msg
+    assert backups.list_games() == ["100", "200"]
+    first = backups.list_backups("100")[0]
+
+    (compatdata / "100" / "pfx" / save).write_bytes(b"lost")
+    assert "1 unchanged" in backup_saves(backups=backups)[1]
+    assert restore_saves("100", first, backups)[0]
+    assert (compatdata / "100" / "pfx" / save).read_bytes() == b"100"
+    assert not restore_saves("300", None, backups)[0]
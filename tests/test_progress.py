@@ -0,0 +1,87 @@
+"""
+Progress bus tests - driven by a fake clock
+"""
+
+from src.core.progress import (
+    STAGE_DOWNLOAD,
+    STAGE_EXTRACT,
+    UNIT_FILES,
+    CallbackSink,
+    ProgressBus,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bus_coalesces_updates_and_tracks_throughput():
+    clock = FakeClock()
+    events = []
+    bus = ProgressBus([events.append], rate_hz=10, clock=clock)
+
+    # 100 MB in 64 KB chunks at 10 MB/s: 1600 updates over 10 seconds
+    chunk = 64 * 1024
+    total = 1600 * chunk
+    for index in range(1, 1601):
+        clock.now = index * chunk / (10 * 1024 * 1024)
+        bus.update(STAGE_DOWNLOAD, index * chunk, total, "fonts.zip")
+    bus.finish(STAGE_DOWNLOAD, total, total, "fonts.zip")
+
+    assert 95 <= len(events) <= 105
+    assert events[-1].finished
+    middle = events[len(events) // 2]
+    assert abs(middle.rate - 10 * 1024 * 1024) < 0.05 * 10 * 1024 * 1024
+    assert abs(middle.eta - 5) < 0.5
+
+
+def test_stage_changes_are_always_delivered():
+    clock = FakeClock()
+    events = []
+    legacy = []
+    sink = CallbackSink(lambda done, total: legacy.append(done))
+    bus = ProgressBus([events.append, sink], clock=clock)
+
+    bus.update(STAGE_DOWNLOAD, 10, 100, "fonts.tar.xz")
+    bus.update(STAGE_DOWNLOAD, 50, 100, "fonts.tar.xz")  # throttled
+    bus.update(STAGE_EXTRACT, 1, 0, "a.ttf", UNIT_FILES)
+    bus.update(STAGE_EXTRACT, 2, 0, "b.ttf", UNIT_FILES)  # throttled
+    bus.finish(STAGE_EXTRACT, 2, 2, "fonts.tar.xz", UNIT_FILES)
+
+    assert [(event.stage, event.done) for event in events] == [
+        (STAGE_DOWNLOAD, 10),
+        (STAGE_EXTRACT, 1),
+        (STAGE_EXTRACT, 2),
+    ]
+    assert events[-1].format_amount() == "2/2 files"
+    assert legacy == [10]
+
+
+def test_interleaved_stages_keep_their_own_throughput():
+    clock = FakeClock()
+    events = []
+    bus = ProgressBus([events.append], rate_hz=10, clock=clock)
+
+    # Streaming extraction: 10 MB/s download and 20 files/s extract for 5 seconds
+    chunk = 64 * 1024
+    for index in range(1, 801):
+        clock.now = index * chunk / (10 * 1024 * 1024)
+        bus.update(STAGE_DOWNLOAD, index * chunk, 800 * chunk, "fonts.tar.xz")
+        bus.update(STAGE_EXTRACT, int(clock.now * 20), 100, "fonts.tar.xz", UNIT_FILES)
+
+    downloads = [event for event in events if event.stage == STAGE_DOWNLOAD]
+    extracts = [event for event in events if event.stage == STAGE_EXTRACT]
+    assert 45 <= len(downloads) <= 55 and 45 <= len(extracts) <= 55
+    assert abs(downloads[-1].rate - 10 * 1024 * 1024) < 0.05 * 10 * 1024 * 1024
+    assert abs(extracts[-1].rate - 20) < 2
+    assert abs(extracts[-1].eta - 0) < 0.5
+
+    # Finishing one stage leaves the other's state alone
+    bus.finish(STAGE_DOWNLOAD, 800 * chunk, 800 * chunk, "fonts.tar.xz")
+    clock.now += 0.1
+    bus.update(STAGE_EXTRACT, 100, 100, "fonts.tar.xz", UNIT_FILES)
+    assert events[-1].stage == STAGE_EXTRACT and events[-1].rate > 0
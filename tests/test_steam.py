@@ -0,0 +1,196 @@
+"""
+Steam integration tests - run against a fake Steam root directory
+"""
+
+import shutil
+
+from src.config import Config
+from src.core.nonsteam_manager import NonSteamManager
+from src.core.shortcut_sync import ShortcutSync
+from src.core.steam_manager import SteamManager
+from src.utils import vdf
+
+GE_MANIFEST = """
+"compatibilitytools"
+{
+  "compat_tools"
+  {
+    "GE-Proton9-1" // Internal name of this tool
+    {
+      "install_path" "."
+      "display_name" "GE-Proton 9-1"
+      "from_oslist"  "windows"
+      "to_oslist"    "linux"
+    }
+  }
+}
+"""
+
+
+def test_vdf_loads_nested_and_escaped():
+    data = vdf.loads('"a" { "b" "x\\"y" // comment\n "c" { "d" "1" } }')
+    assert data == {"a": {"b": 'x"y', "c": {"d": "1"}}}
+
+
+def test_compat_tools_from_manifests_and_libraries(steam_root, tmp_path, monkeypatch):
+    ge_dir = steam_root / "compatibilitytools.d" / "GE-Proton9-1"
+    ge_dir.mkdir(parents=True)
+    (ge_dir / "compatibilitytool.vdf").write_text(GE_MANIFEST)
+
+    library = tmp_path / "sdcard"
+    proton = library / "steamapps" / "common" / "Proton 9.0"
+    proton.mkdir(parents=True)
+    (proton / "proton").write_text("")
+    (steam_root / "steamapps" / "libraryfolders.vdf").write_text(
+        '"libraryfolders" { "0" { "path" "%s" } "1" { "path" "%s" } }' % (steam_root, library)
+    )
+
+    tools = {tool.name: tool for tool in NonSteamManager.get_compatibility_tools()}
+    assert tools["GE-Proton9-1"].display_name == "GE-Proton 9-1"
+    assert tools["GE-Proton9-1"].path == str(ge_dir)
+    assert tools["proton_9"].path == str(proton)
+
+    # Unchanged directories are served from the cache without parsing
+    def fail(path):
+        raise AssertionError(f"unexpected parse of {path}")
+
+    monkeypatch.setattr(vdf, "load", fail)
+    assert len(NonSteamManager.get_compatibility_tools()) == 2
+
+
+STEAM_CONFIG = """"InstallConfigStore"
+{
+\t"Software"
+\t{
+\t\t"Valve"
+\t\t{
+\t\t\t"Steam"
+\t\t\t{
+\t\t\t\t"AutoUpdateWindowEnabled"\t\t"0"
+\t\t\t\t"DPIScaling"\t\t"1" [$WIN32]
+\t\t\t\t"DPIScaling"\t\t"2" [$LINUX]
+\t\t\t\t// Per-app compatibility tool overrides
+\t\t\t\t"CompatToolMapping"
+\t\t\t\t{
+\t\t\t\t\t"0"
+\t\t\t\t\t{
+\t\t\t\t\t\t"name"\t\t"proton_experimental"
+\t\t\t\t\t\t"config"\t\t""
+\t\t\t\t\t\t"priority"\t\t"75"
+\t\t\t\t\t}
+\t\t\t\t\t"4242"
+\t\t\t\t\t{
+\t\t\t\t\t\t"name"\t\t"proton_8"
+\t\t\t\t\t}
+\t\t\t\t}
+\t\t\t\t"Accounts"
+\t\t\t\t{
+\t\t\t\t\t"user"\t\t{ "SteamID"\t\t"7656" }
+\t\t\t\t}
+\t\t\t}
+\t\t}
+\t}
+\t"SDL_GamepadBind"\t\t"03000000de280000ff11000001000000,Steam Virtual Gamepad"
+}
+"""
+
+
+def test_compat_mapping_write_keeps_the_rest_of_config_vdf(config_home, steam_root, monkeypatch):
+    path = steam_root / "config" / "config.vdf"
+    path.parent.mkdir()
+    path.write_text(STEAM_CONFIG)
+
+    # Steam rewrites config.vdf on exit, so nothing is written while it runs
+    monkeypatch.setattr(SteamManager, "is_steam_running", staticmethod(lambda: True))
+    assert not ShortcutSync._write_compat_mapping({4242: ""})[0]
+    assert path.read_text() == STEAM_CONFIG
+    monkeypatch.setattr(SteamManager, "is_steam_running", staticmethod(lambda: False))
+
+    assert ShortcutSync._write_compat_mapping({4242: "", 99: "proton_9"})[0]
+    assert (steam_root / "config" / "config.vdf.bak").read_text() == STEAM_CONFIG
+    text = path.read_text()
+    removed = '\t\t\t\t\t"4242"\n\t\t\t\t\t{\n\t\t\t\t\t\t"name"\t\t"proton_8"\n\t\t\t\t\t}\n'
+    added = (
+        '\t\t\t\t\t"99"\n\t\t\t\t\t{\n\t\t\t\t\t\t"name"\t\t"proton_9"\n'
+        '\t\t\t\t\t\t"config"\t\t""\n\t\t\t\t\t\t"priority"\t\t"250"\n\t\t\t\t\t}\n'
+    )
+    assert text == STEAM_CONFIG.replace(removed, added)
+    assert ShortcutSync._read_compat_mapping() == {0: "proton_experimental", 99: "proton_9"}
+
+    # Nothing to change: the file is not touched
+    shutil.copy(str(path), str(steam_root / "before.vdf"))
+    assert ShortcutSync._write_compat_mapping({99: "proton_9"})[0]
+    assert path.read_text() == (steam_root / "before.vdf").read_text()
+
+
+def _make_games(count):
+    return [
+        {"name": f"Game {i}", "exe_path": f"/games/{i}/game.exe", "properties": {}}
+        for i in range(count)
+    ]
+
+
+def _install_proton(steam_root):
+    proton = steam_root / "steamapps" / "common" / "Proton 9.0"
+    proton.mkdir()
+    (proton / "proton").write_text("")
+
+
+def test_sync_applies_only_changed_entries(config_home, steam_root):
+    (steam_root / "userdata" / "1234").mkdir()
+    vdf_path = SteamManager.get_shortcuts_vdf_path(str(steam_root / "userdata" / "1234"))
+    Config.set_managed_games(_make_games(1000))
+
+    assert ShortcutSync.plan().count() == 1000
+    assert ShortcutSync.sync()[0]
+    assert len(SteamManager.read_vdf_shortcuts(vdf_path)) == 1000
+    assert ShortcutSync.plan().is_empty()
+
+    games = Config.get_managed_games()
+    for game in games[:3]:
+        game["properties"]["launch_options"] = "LANG=ja_JP.UTF-8 %command%"
+    Config.set_managed_games(games)
+
+    plan = ShortcutSync.plan()
+    assert plan.count() == 3
+    assert ShortcutSync.apply(plan)[0]
+    shortcuts = SteamManager.read_vdf_shortcuts(vdf_path)
+    assert shortcuts[0]["LaunchOptions"] == "LANG=ja_JP.UTF-8 %command%"
+    assert shortcuts[3]["LaunchOptions"] == ""
+
+
+def test_sync_pulls_steam_edits_and_removes_deleted_games(config_home, steam_root):
+    (steam_root / "userdata" / "1234").mkdir()
+    vdf_path = SteamManager.get_shortcuts_vdf_path(str(steam_root / "userdata" / "1234"))
+    _install_proton(steam_root)
+    games = _make_games(2)
+    games[0]["compat_layer"] = "proton_9"
+    Config.set_managed_games(games)
+    assert ShortcutSync.sync()[0]
+    assert "proton_9" in (steam_root / "config" / "config.vdf").read_text()
+
+    # Edit launch options in Steam, delete the second game in the tool
+    shortcuts = SteamManager.read_vdf_shortcuts(vdf_path)
+    shortcuts[0]["LaunchOptions"] = "-windowed"
+    SteamManager.write_vdf_shortcuts(vdf_path, shortcuts)
+    assert NonSteamManager.remove_game("Game 1")[0]
+
+    assert ShortcutSync.sync()[0]
+    managed = Config.get_managed_games()
+    assert managed[0]["properties"]["launch_options"] == "-windowed"
+    assert [s["appname"] for s in SteamManager.read_vdf_shortcuts(vdf_path)] == ["Game 0"]
+    assert ShortcutSync.plan().is_empty()
+
+
+def test_sync_skips_unknown_compat_layers(config_home, steam_root):
+    (steam_root / "userdata" / "1234").mkdir()
+    games = _make_games(1)
+    games[0]["compat_layer"] = "Proton Experimental"
+    Config.set_managed_games(games)
+
+    plan = ShortcutSync.plan()
+    assert plan.unresolved_layers == {"Game 0": "Proton Experimental"}
+    assert not plan.compat_changes and not plan.new_prefixes
+    success, msg = ShortcutSync.apply(plan)
+    assert success and "Proton Experimental" in msg
+    assert not (steam_root / "config" / "config.vdf").exists()